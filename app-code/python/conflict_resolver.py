@@ -0,0 +1,119 @@
+"""
+Conflict Resolver for File Explorer
+Picks destination names for a whole paste batch from one directory listing
+"""
+
+import logging
+import os
+import platform
+from typing import Callable, Dict, NamedTuple, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Batch policies for names that already exist in the destination
+KEEP_BOTH = 'keep_both'    # Copy under a new "- Copy (n)" / "(n)" name
+OVERWRITE = 'overwrite'    # Replace the existing item
+SKIP = 'skip'              # Leave the existing item, drop the source
+KEEP_NEWER = 'keep_newer'  # Replace only if the source is newer
+POLICIES = (KEEP_BOTH, OVERWRITE, SKIP, KEEP_NEWER)
+
+
+class Resolution(NamedTuple):
+    """Where (and whether) one source goes"""
+    target: Optional[str]  # None when skipped
+    action: str            # 'new', 'overwrite' or 'skip'
+
+
+class ConflictResolver:
+    """Allocate destination names for a batch without probing the file system
+
+    The destination folder is listed once into an in-memory name set.
+    Free names and "- Copy (n)" suffixes are allocated from that set, and
+    allocated names are added to it, so items of the same batch never
+    collide with each other either. Per-name counters make each allocation
+    O(1) even when thousands of duplicates land in one folder.
+    """
+
+    def __init__(self, destination_dir: str, policy: str = KEEP_BOTH, style: str = 'copy'):
+        """
+        Args:
+            destination_dir: Folder the batch is pasted into
+            policy: One of POLICIES, applied to every conflict of the batch
+            style: 'copy' ("name - Copy (n)") or 'move' ("name (n)") for new names
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown conflict policy: {policy}")
+        self.destination_dir = destination_dir
+        self.policy = policy
+        self.style = style
+        # Windows and macOS file systems compare names case-insensitively by default
+        self._key: Callable[[str], str] = str.casefold if platform.system() in ('Windows', 'Darwin') else str
+        self._existing: Dict[str, os.DirEntry] = {}
+        self._taken: Set[str] = set()
+        self._counters: Dict[str, int] = {}
+        try:
+            with os.scandir(destination_dir) as it:
+                for entry in it:
+                    key = self._key(entry.name)
+                    self._existing[key] = entry
+                    self._taken.add(key)
+        except OSError as e:
+            logger.warning(f"Cannot list {destination_dir} for conflict checks: {e}")
+
+    def conflicts(self, name: str) -> bool:
+        """True if name is already used in the destination (or by this batch)"""
+        return self._key(name) in self._taken
+
+    def resolve(self, source: str) -> Resolution:
+        """Decide the target of one source according to the batch policy"""
+        name = os.path.basename(source.rstrip('/\\'))
+        key = self._key(name)
+        target = os.path.join(self.destination_dir, name)
+        if key not in self._taken:
+            self._taken.add(key)
+            return Resolution(target, 'new')
+
+        source_is_dir = os.path.isdir(source)
+        entry = self._existing.get(key)
+        if entry is None:
+            # Collides with an earlier item of this batch: never overwrite those
+            return self._keep_both(name, source_is_dir)
+        if os.path.abspath(source) == os.path.abspath(target):
+            # Pasting into the folder the item came from
+            if self.style == 'copy':
+                return self._keep_both(name, source_is_dir)
+            return Resolution(None, 'skip')
+
+        if self.policy == SKIP:
+            return Resolution(None, 'skip')
+        if self.policy in (OVERWRITE, KEEP_NEWER):
+            try:
+                if entry.is_dir() != source_is_dir:
+                    # Never replace a folder with a file or the other way round
+                    return self._keep_both(name, source_is_dir)
+                if self.policy == KEEP_NEWER and os.stat(source).st_mtime <= entry.stat().st_mtime:
+                    return Resolution(None, 'skip')
+            except OSError:
+                return self._keep_both(name, source_is_dir)
+            del self._existing[key]  # Replaced once; later duplicates get new names
+            return Resolution(target, 'overwrite')
+        return self._keep_both(name, source_is_dir)
+
+    def _keep_both(self, name: str, is_dir: bool) -> Resolution:
+        """Allocate the next free "name - Copy (n)" (or "name (n)") from the name set"""
+        if is_dir:
+            base, ext = name, ''
+        else:
+            base, ext = os.path.splitext(name)
+        counter = self._counters.get(self._key(name), 1)
+        while True:
+            if self.style == 'copy':
+                candidate = f"{base} - Copy{f' ({counter})' if counter > 1 else ''}{ext}"
+            else:
+                candidate = f"{base} ({counter}){ext}"
+            counter += 1
+            if self._key(candidate) not in self._taken:
+                break
+        self._counters[self._key(name)] = counter
+        self._taken.add(self._key(candidate))
+        return Resolution(os.path.join(self.destination_dir, candidate), 'new')
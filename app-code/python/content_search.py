@@ -0,0 +1,260 @@
+"""
+Content Search for File Explorer
+Searches inside the files of a folder tree on a process pool (grep)
+"""
+
+import logging
+import mmap
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import List, NamedTuple, Optional, Set, Tuple
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from scan_exclusions import ExclusionRules
+
+logger = logging.getLogger(__name__)
+
+# Bytes read to decide whether a file is binary
+SNIFF_SIZE = 8192
+# Files from this size on are searched through mmap instead of read()
+MMAP_THRESHOLD = 1024 * 1024
+# Files larger than this are not searched
+MAX_FILE_SIZE = 512 * 1024 * 1024
+# Matches reported per file
+MAX_HITS_PER_FILE = 100
+# Characters of a matching line kept for display
+MAX_LINE_LENGTH = 300
+
+
+class ContentMatch(NamedTuple):
+    """One matching line"""
+    path: str
+    line: int        # 1-based line number
+    text: str        # The line, decoded and shortened
+
+
+def compile_pattern(text: str) -> "re.Pattern[bytes]":
+    """Compile search text ("re:<pattern>" for a regex, else a literal), case-insensitive
+
+    Raises:
+        re.error: For an invalid regular expression
+    """
+    if text.startswith('re:'):
+        return re.compile(text[3:].encode('utf-8'), re.IGNORECASE | re.MULTILINE)
+    return re.compile(re.escape(text.encode('utf-8')), re.IGNORECASE)
+
+
+def search_files(paths: List[str], pattern: "re.Pattern[bytes]") -> Tuple[int, List[ContentMatch]]:
+    """Worker process entry: search paths; returns (files searched, matches)
+
+    Binary files (a NUL byte in the first SNIFF_SIZE bytes) are skipped;
+    large files are mapped rather than read into memory.
+    """
+    searched = 0
+    matches: List[ContentMatch] = []
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                head = f.read(SNIFF_SIZE)
+                if b'\0' in head:
+                    continue
+                size = os.fstat(f.fileno()).st_size
+                if size > MAX_FILE_SIZE:
+                    continue
+                searched += 1
+                if size < MMAP_THRESHOLD:
+                    data = head + f.read()
+                    matches.extend(_scan(path, data, pattern))
+                elif size:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                        matches.extend(_scan(path, data, pattern))
+        except (OSError, ValueError):
+            continue
+    return searched, matches
+
+
+def _scan(path: str, data, pattern: "re.Pattern[bytes]") -> List[ContentMatch]:
+    """Matching lines of one file's data (bytes or mmap)
+
+    After a hit the search resumes on the next line, so every byte is
+    looked at a bounded number of times however long the lines are.
+    """
+    hits = []
+    line_no, pos = 1, 0
+    size = len(data)
+    while len(hits) < MAX_HITS_PER_FILE and pos < size:
+        m = pattern.search(data, pos)
+        if m is None:
+            break
+        start = data.rfind(b'\n', pos, m.start()) + 1 or pos
+        line_no += data[pos:start].count(b'\n')  # mmap has no count()
+        end = data.find(b'\n', m.start())
+        if end < 0:
+            end = size
+        line = bytes(data[start:min(end, start + MAX_LINE_LENGTH)])
+        hits.append(ContentMatch(path, line_no, line.decode('utf-8', 'replace').rstrip('\r')))
+        line_no += 1
+        pos = end + 1
+    return hits
+
+
+class ContentSearch(QObject):
+    """Grep a folder tree in parallel without blocking the UI
+
+    A driver thread walks the tree (symlinked folders and whatever the
+    exclusion rules match are not entered) and hands batches of files to a process pool with one worker per CPU,
+    so the regex work runs on every core. At most two batches per worker
+    are in flight, so cancelling stops quickly. Matches are emitted as
+    batches complete, up to the limit given to start(); one search runs at
+    a time and a new one cancels the previous search.
+    """
+
+    # search id, List[ContentMatch]
+    found = pyqtSignal(int, object)
+    # search id, files searched so far
+    progress = pyqtSignal(int, int)
+    # search id, files searched, matches, cancelled
+    finished = pyqtSignal(int, int, int, bool)
+
+    BATCH_FILES = 64                 # Files per worker task
+    BATCH_BYTES = 16 * 1024 * 1024   # ...or fewer, if they add up to this many bytes
+
+    def __init__(self, parent: Optional[QObject] = None, max_workers: Optional[int] = None):
+        super().__init__(parent)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._cancel: Optional[threading.Event] = None
+        self._next_id = 1
+
+    # ==================== PUBLIC API ====================
+
+    def start(self, root: str, pattern: "re.Pattern[bytes]",
+              rules: Optional[ExclusionRules] = None, limit: int = 1000) -> int:
+        """Search the files below root; returns the search id used in signals
+
+        Files and folders matched by rules are skipped. The search ends
+        (not cancelled) once limit matches were found.
+        """
+        cancel = threading.Event()
+        with self._lock:
+            if self._cancel is not None:
+                self._cancel.set()
+            self._cancel = cancel
+            search_id = self._next_id
+            self._next_id += 1
+            if self._pool is None:
+                # spawn: forking a process that runs Qt and other threads is unsafe
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            pool = self._pool
+        threading.Thread(target=self._run, args=(search_id, root, pattern, rules, limit, pool, cancel),
+                         name='ContentSearch', daemon=True).start()
+        return search_id
+
+    def cancel(self) -> None:
+        """Stop the running search"""
+        with self._lock:
+            if self._cancel is not None:
+                self._cancel.set()
+
+    def shutdown(self) -> None:
+        """Cancel the search and stop the worker processes"""
+        self.cancel()
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    # ==================== DRIVER ====================
+
+    def _run(self, search_id: int, root: str, pattern: "re.Pattern[bytes]",
+             rules: Optional[ExclusionRules], limit: int,
+             pool: ProcessPoolExecutor, cancel: threading.Event) -> None:
+        t0 = time.monotonic()
+        searched = found = 0
+        inflight: Set[Future] = set()
+        window = self.max_workers * 2
+
+        def collect(block: bool) -> None:
+            nonlocal searched, found, inflight
+            if not inflight:
+                return
+            done, inflight = wait(inflight, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            batch: List[ContentMatch] = []
+            for future in done:
+                try:
+                    files, matches = future.result()
+                except Exception as e:
+                    logger.debug(f"Content search batch failed: {e}")
+                    continue
+                searched += files
+                batch.extend(matches)
+            batch = batch[:limit - found]
+            if batch and not cancel.is_set():
+                found += len(batch)
+                self.found.emit(search_id, batch)
+            if done:
+                self.progress.emit(search_id, searched)
+
+        def stopped() -> bool:
+            return cancel.is_set() or found >= limit
+
+        try:
+            for paths in self._batches(root, cancel, rules):
+                while len(inflight) >= window and not stopped():
+                    collect(block=True)
+                if stopped():
+                    break
+                inflight.add(pool.submit(search_files, paths, pattern))
+                collect(block=False)
+            while inflight and not stopped():
+                collect(block=True)
+        except RuntimeError as e:  # Pool shut down while searching
+            logger.debug(f"Content search stopped: {e}")
+        finally:
+            for future in inflight:
+                future.cancel()
+        logger.info(f"Content search {search_id} under {root}: {found} match(es) in {searched} file(s), "
+                    f"{time.monotonic() - t0:.1f}s{' (cancelled)' if cancel.is_set() else ''}")
+        self.finished.emit(search_id, searched, found, cancel.is_set())
+
+    def _batches(self, root: str, cancel: threading.Event, rules: Optional[ExclusionRules] = None):
+        """Yield lists of regular files below root, batched by count and size"""
+        batch: List[str] = []
+        batch_bytes = 0
+        stack = [root]
+        while stack:
+            if cancel.is_set():
+                return
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                            if rules and rules.excludes(entry.path, is_dir, entry.name):
+                                continue
+                            if is_dir:
+                                stack.append(entry.path)
+                                continue
+                            if not entry.is_file(follow_symlinks=False):
+                                continue
+                            size = entry.stat(follow_symlinks=False).st_size
+                        except OSError:
+                            continue
+                        if not size:
+                            continue
+                        batch.append(entry.path)
+                        batch_bytes += size
+                        if len(batch) >= self.BATCH_FILES or batch_bytes >= self.BATCH_BYTES:
+                            yield batch
+                            batch, batch_bytes = [], 0
+            except OSError:
+                continue
+        if batch:
+            yield batch
@@ -3,20 +3,38 @@ Data Manager for File Explorer
 Handles all CRUD operations for JSON data files
 """
 
+import atexit
 import json
 import logging
+import os
+import tempfile
+import threading
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
+from folder_size_engine import DirNode
+from folder_size_store import FolderSizeStore
+from file_index import FileIndex
+from scan_exclusions import ExclusionRules
 
 logger = logging.getLogger(__name__)
 
 
 class DataManager:
     """Manage all application data with CRUD operations"""
+    # Files updated on hot UI paths (every navigation / file open). They are
+    # kept in memory and flushed to disk in the background (write-behind).
+    WRITE_BEHIND = ('history', 'recent_files')
+    # Seconds to wait after a change before flushing, so bursts coalesce
+    FLUSH_DELAY = 2.0
+
     # Instance attribute type hints
-    _folder_sizes_cache: Dict[str, Any]
-    _folder_sizes_loaded: bool
+    folder_sizes: FolderSizeStore
+    file_index: FileIndex
+    _state: Dict[str, Any]
+    _state_sig: Dict[str, Optional[Tuple[int, int]]]
+    _dirty: set
+    _flush_timer: Optional[threading.Timer]
     
     def __init__(self, app_dir: Optional[Path] = None):
         """Initialize the data manager
@@ -42,17 +60,32 @@ class DataManager:
             'bookmarks': self.data_dir / 'bookmarks.json',
             'recent_files': self.data_dir / 'recent_files.json',
             'startup': self.data_dir / 'startup.json',  # Side Apps (apps/files to auto-run/open)
-            'folder_sizes': self.data_dir / 'folder_sizes.json',  # Cache of computed folder sizes
         }
         
         logger.info(f"DataManager initialized with data directory: {self.data_dir}")
         
+        # In-memory copy of every collection, validated against the file's
+        # (mtime, size) signature; write-behind files are flushed on a timer and at exit
+        self._state = {}
+        self._state_sig = {}
+        self._dirty = set()
+        self._flush_timer = None
+        self._state_lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        atexit.register(self.flush)
+        
         # Initialize all data files
         self._initialize_files()
 
-        # In-memory caches (loaded on first use)
-        self._folder_sizes_cache = {}
-        self._folder_sizes_loaded = False
+        # Cache of computed folder sizes (SQLite; migrates the old folder_sizes.json once)
+        self.folder_sizes_db = self.data_dir / 'folder_sizes.db'
+        self.folder_sizes = FolderSizeStore(
+            self.folder_sizes_db,
+            legacy_json=self.data_dir / 'folder_sizes.json',
+        )
+
+        # Filename index for subtree search (SQLite FTS5 trigram)
+        self.file_index = FileIndex(self.data_dir / 'file_index.db')
     
     def _initialize_files(self):
         """Initialize all data files with default structures"""
@@ -63,7 +96,6 @@ class DataManager:
             'bookmarks': {},
             'recent_files': [],
             'startup': [],
-            'folder_sizes': {},
         }
         
         for name, filepath in self.files.items():
@@ -100,7 +132,10 @@ class DataManager:
             return default if default is not None else []
     
     def _write_json(self, filepath: Path, data: Any, backup: bool = True) -> bool:
-        """Write JSON file with error handling and optional backup
+        """Write JSON file atomically with error handling and optional backup
+        
+        Data goes to a temp file in the same directory which then replaces the
+        target, so a crash mid-write never leaves a truncated file behind.
         
         Args:
             filepath: Path to JSON file
@@ -110,6 +145,7 @@ class DataManager:
         Returns:
             True if successful, False otherwise
         """
+        tmp_path = None
         try:
             # Create backup if requested and file exists
             if backup and filepath.exists():
@@ -121,28 +157,115 @@ class DataManager:
             # Ensure directory exists
             filepath.parent.mkdir(parents=True, exist_ok=True)
             
-            # Write data
-            with open(filepath, 'w', encoding='utf-8') as f:
+            # Write data to a temp file, then atomically swap it in
+            fd, tmp_path = tempfile.mkstemp(prefix=f".{filepath.name}.", suffix='.tmp',
+                                            dir=str(filepath.parent))
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, filepath)
+            tmp_path = None
             
-            # Verify write
-            if filepath.exists():
-                size = filepath.stat().st_size
-                logger.info(f"✅ Wrote {filepath.name}: {size} bytes")
-                return True
-            else:
-                logger.error(f"❌ File not created: {filepath}")
-                return False
+            size = filepath.stat().st_size
+            logger.info(f"✅ Wrote {filepath.name}: {size} bytes")
+            return True
                 
         except Exception as e:
             logger.error(f"❌ Error writing {filepath}: {e}", exc_info=True)
             return False
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+    
+    # ==================== IN-MEMORY STATE ====================
+    
+    def _signature(self, filepath: Path) -> Optional[Tuple[int, int]]:
+        """Return (mtime_ns, size) of a data file, or None if missing"""
+        try:
+            st = filepath.stat()
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+    
+    def _load(self, name: str, default: Any) -> Any:
+        """Return the cached collection, re-reading the file only if it changed on disk
+        
+        Pending write-behind changes always win over the file. Callers must not
+        mutate the returned object; getters hand out copies.
+        """
+        with self._state_lock:
+            if name in self._dirty:
+                return self._state[name]
+            sig = self._signature(self.files[name])
+            if name not in self._state or sig != self._state_sig.get(name):
+                self._state[name] = self._read_json(self.files[name], default)
+                self._state_sig[name] = sig
+            return self._state[name]
+    
+    def _save(self, name: str, data: Any) -> bool:
+        """Persist a collection: write-behind files are queued, others written now"""
+        if name in self.WRITE_BEHIND:
+            return self._store(name, data)
+        with self._state_lock:
+            if self._write_json(self.files[name], data):
+                self._state[name] = data
+                self._state_sig[name] = self._signature(self.files[name])
+                return True
+            # Unknown disk state; re-read on next access
+            self._state.pop(name, None)
+            return False
+    
+    def _store(self, name: str, data: Any) -> bool:
+        """Replace in-memory state for a write-behind file and schedule a flush"""
+        with self._state_lock:
+            self._state[name] = data
+            self._dirty.add(name)
+            # Coalesce: a pending timer will pick this change up too
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.FLUSH_DELAY, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        return True
+    
+    def flush(self) -> bool:
+        """Write all pending write-behind changes to disk
+        
+        Runs on the flush timer thread; also called at shutdown.
+        
+        Returns:
+            True if every pending file was written
+        """
+        with self._flush_lock:
+            with self._state_lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                # Snapshot so the UI thread can keep changing state meanwhile;
+                # names stay dirty (memory wins over disk) until written
+                pending = {name: self._state[name] for name in self._dirty}
+            
+            ok = True
+            for name, data in pending.items():
+                snapshot = list(data) if isinstance(data, list) else dict(data)
+                written = self._write_json(self.files[name], snapshot)
+                with self._state_lock:
+                    if not written:
+                        ok = False  # Stays dirty; retried on the next flush
+                    elif self._state.get(name) is data:
+                        self._dirty.discard(name)
+                        # Our own write must not look like an external change
+                        self._state_sig[name] = self._signature(self.files[name])
+            return ok
     
     # ==================== FAVORITES CRUD ====================
     
     def get_favorites(self) -> List[str]:
         """Get all favorites"""
-        favorites = self._read_json(self.files['favorites'], [])
+        favorites = self._load('favorites', [])
         # Validate - ensure all items are strings
         return [f for f in favorites if isinstance(f, str)]
     
@@ -163,7 +286,7 @@ class DataManager:
             return False
         
         favorites.append(path)
-        success = self._write_json(self.files['favorites'], favorites)
+        success = self._save('favorites', favorites)
         
         if success:
             logger.info(f"✅ Added favorite: {path}")
@@ -186,7 +309,7 @@ class DataManager:
             return False
         
         favorites.remove(path)
-        success = self._write_json(self.files['favorites'], favorites)
+        success = self._save('favorites', favorites)
         
         if success:
             logger.info(f"✅ Removed favorite: {path}")
@@ -195,7 +318,7 @@ class DataManager:
     def clear_favorites(self) -> bool:
         """Clear all favorites"""
         logger.info("Clearing all favorites")
-        return self._write_json(self.files['favorites'], [])
+        return self._save('favorites', [])
     
     def is_favorite(self, path: str) -> bool:
         """Check if path is in favorites"""
@@ -205,7 +328,7 @@ class DataManager:
     
     def get_settings(self) -> Dict[str, Any]:
         """Get all settings"""
-        return self._read_json(self.files['settings'], {})
+        return dict(self._load('settings', {}))
     
     def get_setting(self, key: str, default: Any = None) -> Any:
         """Get a specific setting
@@ -233,7 +356,7 @@ class DataManager:
         logger.info(f"Setting {key} = {value}")
         settings = self.get_settings()
         settings[key] = value
-        return self._write_json(self.files['settings'], settings)
+        return self._save('settings', settings)
     
     def update_settings(self, new_settings: Dict[str, Any]) -> bool:
         """Update multiple settings
@@ -247,12 +370,12 @@ class DataManager:
         logger.info(f"Updating {len(new_settings)} settings")
         settings = self.get_settings()
         settings.update(new_settings)
-        return self._write_json(self.files['settings'], settings)
+        return self._save('settings', settings)
     
     def clear_settings(self) -> bool:
         """Clear all settings"""
         logger.info("Clearing all settings")
-        return self._write_json(self.files['settings'], {})
+        return self._save('settings', {})
     
     # ==================== HISTORY CRUD ====================
     
@@ -265,7 +388,7 @@ class DataManager:
         Returns:
             List of history entries
         """
-        history = self._read_json(self.files['history'], [])
+        history = list(self._load('history', []))
         if limit:
             return history[-limit:]
         return history
@@ -292,18 +415,18 @@ class DataManager:
         if len(history) > 100:
             history = history[-100:]
         
-        return self._write_json(self.files['history'], history)
+        return self._store('history', history)
     
     def clear_history(self) -> bool:
         """Clear all history"""
         logger.info("Clearing history")
-        return self._write_json(self.files['history'], [])
+        return self._store('history', [])
     
     # ==================== BOOKMARKS CRUD ====================
     
     def get_bookmarks(self) -> Dict[str, str]:
         """Get all bookmarks (name -> path mapping)"""
-        return self._read_json(self.files['bookmarks'], {})
+        return dict(self._load('bookmarks', {}))
     
     def add_bookmark(self, name: str, path: str) -> bool:
         """Add a bookmark
@@ -318,7 +441,7 @@ class DataManager:
         logger.info(f"Adding bookmark: {name} -> {path}")
         bookmarks = self.get_bookmarks()
         bookmarks[name] = path
-        return self._write_json(self.files['bookmarks'], bookmarks)
+        return self._save('bookmarks', bookmarks)
     
     def remove_bookmark(self, name: str) -> bool:
         """Remove a bookmark
@@ -334,14 +457,14 @@ class DataManager:
         
         if name in bookmarks:
             del bookmarks[name]
-            return self._write_json(self.files['bookmarks'], bookmarks)
+            return self._save('bookmarks', bookmarks)
         
         return False
     
     def clear_bookmarks(self) -> bool:
         """Clear all bookmarks"""
         logger.info("Clearing all bookmarks")
-        return self._write_json(self.files['bookmarks'], {})
+        return self._save('bookmarks', {})
     
     # ==================== RECENT FILES CRUD ====================
     
@@ -354,7 +477,7 @@ class DataManager:
         Returns:
             List of recent file entries
         """
-        recent = self._read_json(self.files['recent_files'], [])
+        recent = list(self._load('recent_files', []))
         if limit:
             return recent[-limit:]
         return recent
@@ -384,12 +507,12 @@ class DataManager:
         if len(recent) > 50:
             recent = recent[-50:]
         
-        return self._write_json(self.files['recent_files'], recent)
+        return self._store('recent_files', recent)
     
     def clear_recent_files(self) -> bool:
         """Clear all recent files"""
         logger.info("Clearing recent files")
-        return self._write_json(self.files['recent_files'], [])
+        return self._store('recent_files', [])
     
     # ==================== UTILITY METHODS ====================
     
@@ -440,16 +563,16 @@ class DataManager:
                 # Merge data
                 current_favs = self.get_favorites()
                 current_favs.extend(imported.get('favorites', []))
-                self._write_json(self.files['favorites'], list(set(current_favs)))
+                self._save('favorites', list(set(current_favs)))
                 
                 current_settings = self.get_settings()
                 current_settings.update(imported.get('settings', {}))
-                self._write_json(self.files['settings'], current_settings)
+                self._save('settings', current_settings)
             else:
                 # Replace data
                 for key in ['favorites', 'settings', 'history', 'bookmarks', 'recent_files']:
                     if key in imported and key in self.files:
-                        self._write_json(self.files[key], imported[key])
+                        self._save(key, imported[key])
             
             logger.info(f"✅ Imported data from: {import_path}")
             return True
@@ -476,13 +599,20 @@ class DataManager:
                     'exists': False,
                 }
         
+        stats['folder_sizes'] = {
+            'file': str(self.folder_sizes_db),
+            'size_bytes': self.folder_sizes_db.stat().st_size if self.folder_sizes_db.exists() else 0,
+            'exists': self.folder_sizes_db.exists(),
+            'folders': self.folder_sizes.count(),
+        }
+        
         return stats
 
     # ==================== STARTUP (SIDE APPS) ====================
 
     def get_startup_apps(self) -> List[str]:
         """Return list of app/file/folder paths to run/open on app start."""
-        items = self._read_json(self.files['startup'], [])
+        items = self._load('startup', [])
         # ensure list of strings
         return [p for p in items if isinstance(p, str)]
 
@@ -492,7 +622,7 @@ class DataManager:
         if path in items:
             return False
         items.append(path)
-        return self._write_json(self.files['startup'], items)
+        return self._save('startup', items)
 
     def remove_startup_app(self, path: str) -> bool:
         """Remove a path from startup list if present."""
@@ -500,76 +630,72 @@ class DataManager:
         if path not in items:
             return False
         items = [p for p in items if p != path]
-        return self._write_json(self.files['startup'], items)
+        return self._save('startup', items)
 
     def clear_startup_apps(self) -> bool:
         """Clear the startup list."""
-        return self._write_json(self.files['startup'], [])
+        return self._save('startup', [])
 
     # ==================== FOLDER SIZE CACHE ====================
 
-    def _folder_sizes_all(self) -> Dict[str, Any]:
-        """Return the in-memory folder sizes cache, loading from disk once on first access."""
-        if not getattr(self, '_folder_sizes_loaded', False):
-            # Load once to avoid repeated disk reads during view painting
-            self._folder_sizes_cache = self._read_json(self.files['folder_sizes'], {}) or {}
-            self._folder_sizes_loaded = True
-        return self._folder_sizes_cache
+    def get_child_folder_sizes(self, path: str) -> Dict[str, Tuple[int, float, int]]:
+        """Return {child path: (size, mtime, partial)} for cached folders directly inside path.
 
-    def get_folder_size_cached(self, path: str) -> Optional[int]:
-        """Return cached folder size in bytes if present and still valid.
+        One indexed query and no file system access; callers validate the
+        recorded mtime against a listing they already have.
+        """
+        return self.folder_sizes.get_children(path)
 
-        We treat cache as valid if the on-disk mtime of the folder matches
-        what we stored. If mtime differs, the cache is considered stale.
+    def get_folder_size_node(self, path: str) -> Optional[DirNode]:
+        """Return the cached per-directory aggregate for path, or None.
+
+        Only folders written by store_folder_tree carry own-file sums and
+        child links; total-only records return None so they get rescanned.
         """
-        try:
-            data = self._folder_sizes_all()
-            rec = data.get(path)
-            if not isinstance(rec, dict):
-                return None
-            size = rec.get('size')
-            mtime_recorded = rec.get('mtime')
-            if size is None or mtime_recorded is None:
-                return None
-            # Validate against current mtime
-            from os.path import getmtime, exists
-            if not exists(path):
-                return None
-            mtime_now = getmtime(path)
-            if abs(float(mtime_now) - float(mtime_recorded)) > 0.001:
-                return None
-            return int(size)
-        except Exception:
-            return None
+        return self.folder_sizes.get_node(path)
+
+    def store_folder_tree(self, root: str, nodes: Dict[str, DirNode],
+                          removed: Optional[List[str]] = None) -> bool:
+        """Cache a scanned or revalidated tree in one batched transaction.
+
+        Each directory keeps its own-files sum and child links next to its
+        total. The change in the root's total is rolled up into every cached
+        ancestor, so parents stay correct without being rescanned.
 
-    def set_folder_size_cached(self, path: str, size: int) -> bool:
-        """Write folder size and current mtime to cache without re-reading from disk each time.
+        Args:
+            root: Root of the scanned tree
+            nodes: Mapping of directory path -> DirNode (root included)
+            removed: Directories that no longer exist; their cached subtrees are dropped
 
-        Optimizations:
-        - Uses in-memory cache to avoid frequent disk reads in hot paths (e.g., view painting).
-        - Skips disk write if the cached value is already up to date.
+        Returns:
+            True if successful
         """
-        try:
-            data = self._folder_sizes_all()
-            from os.path import getmtime, exists
-            mtime_now = getmtime(path) if exists(path) else 0.0
-            new_rec = {
-                'size': int(size),
-                'mtime': float(mtime_now),
-                'updated': datetime.now().isoformat(),
-            }
+        return self.folder_sizes.store_tree(root, nodes, removed)
 
-            # If unchanged, avoid disk write
-            old = data.get(path)
-            if (
-                isinstance(old, dict)
-                and int(old.get('size', -1)) == new_rec['size']
-                and float(old.get('mtime', -1.0)) == new_rec['mtime']
-            ):
-                return True
+    def invalidate_folder_sizes(self, paths: List[str]) -> bool:
+        """Mark cached folders as changed so their next revalidation relists them.
 
-            data[path] = new_rec
-            # Persist current in-memory cache
-            return self._write_json(self.files['folder_sizes'], data)
-        except Exception:
+        A watcher reports files modified in place without the folder's
+        mtime changing; the cached own-files sum must not be reused then.
+        """
+        return self.folder_sizes.mark_stale(paths)
+
+    def set_scan_exclusions(self, rules: ExclusionRules) -> bool:
+        """Record the exclusion rules scans use; returns True if they changed.
+
+        Cached folder sizes and indexed listings were computed under the
+        previous rules, so on a change every cached folder is marked stale
+        and every indexed folder is re-listed by the next crawl. The rules
+        are kept in settings.json so a restart does not invalidate anything.
+        """
+        if self.get_setting('scan_exclusions') == list(rules.patterns):
             return False
+        logger.info(f"Scan exclusions changed ({len(rules.patterns)} rules), invalidating cached scans")
+        self.folder_sizes.mark_stale()
+        self.file_index.forget_listings()
+        return self.set_setting('scan_exclusions', list(rules.patterns))
+
+    def clear_folder_sizes(self) -> bool:
+        """Clear the folder size cache"""
+        logger.info("Clearing folder size cache")
+        return self.folder_sizes.clear()
@@ -0,0 +1,178 @@
+"""
+Delete Engine for File Explorer
+Permanent removal of large folder trees, many folders at a time
+"""
+
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Delete threads; like the tree copy, the work is bound by per-file syscall latency
+DELETE_WORKERS = 16
+# Unlink relative to an open folder descriptor where the platform allows it
+_USE_DIR_FD = (os.unlink in os.supports_dir_fd and os.scandir in os.supports_fd
+               and hasattr(os, 'O_DIRECTORY'))
+_DIR_FLAGS = os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0) | getattr(os, 'O_NOFOLLOW', 0)
+
+
+class _Folder:
+    """A folder whose contents are being removed"""
+    __slots__ = ('path', 'parent', 'pending', 'failed')
+
+    def __init__(self, path: str, parent: Optional['_Folder']):
+        self.path = path
+        self.parent = parent
+        self.pending = 0     # Subfolders not removed yet
+        self.failed = False  # Something below could not be removed; keep this folder
+
+
+class DeleteEngine:
+    """Remove files and folder trees permanently
+
+    Every folder is a task on a thread pool: its files are unlinked
+    relative to an open descriptor of the folder (no path resolution per
+    file, and a folder swapped for a symlink is never followed), its
+    subfolders become new tasks, and the last subfolder to finish removes
+    its parent. Wide and deep trees are therefore cleared by many threads
+    at once.
+
+    progress(files) is called on the calling thread with the number of
+    entries removed since the last call and may raise to stop the delete;
+    folders that still hold entries are then left in place.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or DELETE_WORKERS
+
+    def delete(self, path: str,
+               progress: Optional[Callable[[int], None]] = None) -> List[Tuple[str, str]]:
+        """Permanently remove path (a file, a symlink or a whole tree)
+
+        Returns:
+            List of (path, error message) for entries that could not be removed
+        """
+        if os.path.islink(path) or not os.path.isdir(path):
+            os.unlink(path)
+            if progress is not None:
+                progress(1)
+            return []
+
+        errors: List[Tuple[str, str]] = []
+        results: "queue.Queue[Tuple[int, List[Tuple[str, str]]]]" = queue.Queue()
+        lock = threading.Lock()
+        stop = threading.Event()
+        done = threading.Event()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='TreeDelete') as pool:
+            def finish(folder: Optional[_Folder]) -> None:
+                """Remove emptied folders bottom-up; called with no lock held"""
+                while folder is not None:
+                    folder_errors = []
+                    if not folder.failed and not stop.is_set():
+                        try:
+                            os.rmdir(folder.path)
+                        except FileNotFoundError:
+                            pass
+                        except OSError as e:
+                            folder_errors.append((folder.path, str(e)))
+                            folder.failed = True
+                    if folder_errors:
+                        results.put((0, folder_errors))
+                    parent = folder.parent
+                    if parent is None:
+                        done.set()
+                        results.put((0, []))  # Wake the caller
+                        return
+                    with lock:
+                        if folder.failed:
+                            parent.failed = True
+                        parent.pending -= 1
+                        if parent.pending:
+                            return
+                    folder = parent
+
+            def clear(folder: _Folder) -> None:
+                removed, folder_errors, subfolders = 0, [], []
+                try:
+                    if not stop.is_set():
+                        removed = self._clear_files(folder.path, subfolders, folder_errors, stop)
+                except Exception as e:  # Never lose track of a folder, or the caller waits forever
+                    folder_errors.append((folder.path, str(e)))
+                if folder_errors or stop.is_set():
+                    folder.failed = True
+                results.put((removed, folder_errors))
+                children = [_Folder(os.path.join(folder.path, name), folder) for name in subfolders]
+                if not children:
+                    finish(folder)
+                    return
+                with lock:
+                    folder.pending = len(children)
+                for child in children:
+                    pool.submit(clear, child)
+
+            pool.submit(clear, _Folder(path, None))
+            try:
+                while not done.is_set() or not results.empty():
+                    removed, folder_errors = results.get()
+                    errors.extend(folder_errors)
+                    if removed and progress is not None:
+                        progress(removed)
+            finally:
+                stop.set()
+                if not done.is_set():
+                    done.wait()
+
+        logger.info(f"Deleted {path}: {len(errors)} error(s)")
+        return errors
+
+    @staticmethod
+    def _clear_files(path: str, subfolders: List[str], errors: List[Tuple[str, str]],
+                     stop: threading.Event) -> int:
+        """Unlink every non-folder entry of path; collect subfolder names"""
+        removed = 0
+        if _USE_DIR_FD:
+            fd = os.open(path, _DIR_FLAGS)
+            try:
+                with os.scandir(fd) as it:
+                    entries = list(it)
+                for entry in entries:
+                    if stop.is_set():
+                        break
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subfolders.append(entry.name)
+                            continue
+                        os.unlink(entry.name, dir_fd=fd)
+                        removed += 1
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        errors.append((os.path.join(path, entry.name), str(e)))
+            finally:
+                os.close(fd)
+            return removed
+
+        with os.scandir(path) as it:
+            entries = list(it)
+        for entry in entries:
+            if stop.is_set():
+                break
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not getattr(entry, 'is_junction', lambda: False)():
+                        subfolders.append(entry.name)
+                        continue
+                    os.rmdir(entry.path)  # Windows junction: remove the link only
+                else:
+                    os.unlink(entry.path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                errors.append((entry.path, str(e)))
+        return removed
@@ -0,0 +1,299 @@
+"""
+Directory Loader for File Explorer
+Resolves and lists directories off the UI thread, with cancellation and prefetch
+"""
+
+import logging
+import os
+import stat
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from path_probe import PathProbe, PathUnresponsive
+
+logger = logging.getLogger(__name__)
+
+
+class DirectoryCounts(NamedTuple):
+    """Status bar summary of one directory listing"""
+    files: int = 0
+    folders: int = 0
+    size: int = 0      # Total bytes of the files (not recursive)
+    hidden: int = 0    # Hidden entries (dot-files, or the hidden attribute on Windows)
+
+
+# Entry kinds stored in DirectoryListing.kinds
+KIND_FILE = 0
+KIND_DIR = 1
+
+
+class DirectoryListing:
+    """Columnar listing of (part of) one directory
+
+    Entries are kept in parallel compact arrays instead of one Python object
+    per entry, so listings of hundreds of thousands of entries stay small.
+    """
+
+    __slots__ = ('names', 'sizes', 'mtimes', 'kinds', 'hidden')
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.sizes = array('q')     # Bytes (0 for folders)
+        self.mtimes = array('d')    # Modification time (epoch seconds)
+        self.kinds = bytearray()    # KIND_FILE / KIND_DIR
+        self.hidden = bytearray()   # 1 if hidden
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def append(self, name: str, size: int, mtime: float, kind: int, hidden: bool) -> None:
+        self.names.append(name)
+        self.sizes.append(size)
+        self.mtimes.append(mtime)
+        self.kinds.append(kind)
+        self.hidden.append(1 if hidden else 0)
+
+    def extend(self, other: 'DirectoryListing', include_hidden: bool = True) -> None:
+        """Append all entries of other (optionally skipping hidden ones)"""
+        if include_hidden or not any(other.hidden):
+            self.names.extend(other.names)
+            self.sizes.extend(other.sizes)
+            self.mtimes.extend(other.mtimes)
+            self.kinds.extend(other.kinds)
+            self.hidden.extend(other.hidden)
+            return
+        for i, h in enumerate(other.hidden):
+            if not h:
+                self.append(other.names[i], other.sizes[i], other.mtimes[i], other.kinds[i], False)
+
+
+def is_hidden(name: str, st: Optional[os.stat_result]) -> bool:
+    """Return True for dot-files or entries with the Windows hidden attribute"""
+    if name.startswith('.'):
+        return True
+    attrs = getattr(st, 'st_file_attributes', 0) if st is not None else 0
+    return bool(attrs & getattr(stat, 'FILE_ATTRIBUTE_HIDDEN', 0))
+
+
+class DirectoryLoader(QObject):
+    """Background navigation pipeline
+
+    A navigation request is resolved (exists / is a folder) and then listed
+    on a worker thread. Results come back through queued signals tagged with
+    the caller's generation number so stale results can be ignored; starting
+    a new load cancels the previous one.
+
+    Listings are streamed in columnar chunks (see DirectoryListing) for the
+    directory model, together with running status-bar counts. With a
+    PathProbe, resolving stats the path with a deadline so a dead mount
+    fails the load instead of blocking the worker, and prefetch skips mounts
+    the probe knows are unresponsive. Prefetched
+    listings are kept in a small LRU keyed by directory mtime, so going
+    Back/Up into a prefetched folder shows its rows and counts immediately.
+    """
+
+    # generation, absolute path
+    resolved = pyqtSignal(int, str)
+    # generation, requested path, reason
+    failed = pyqtSignal(int, str, str)
+    # generation, path, DirectoryListing chunk, finished
+    listed = pyqtSignal(int, str, object, bool)
+    # generation, path, DirectoryCounts, finished
+    counted = pyqtSignal(int, str, object, bool)
+
+    CHUNK_SIZE = 2048          # Entries per streamed chunk
+    CACHE_SIZE = 64            # Listings kept in memory
+    CACHE_MAX_ENTRIES = 50000  # Larger listings are not cached (bounded memory)
+
+    def __init__(self, parent: Optional[QObject] = None, probe: Optional[PathProbe] = None):
+        super().__init__(parent)
+        self.probe = probe
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='DirLoader')
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='DirPrefetch')
+        self._lock = threading.Lock()
+        self._load_cancel: Optional[threading.Event] = None
+        self._prefetch_cancel: Optional[threading.Event] = None
+        # path -> (mtime_ns, counts, full listing)
+        self._listings: "OrderedDict[str, Tuple[int, DirectoryCounts, DirectoryListing]]" = OrderedDict()
+
+    # ==================== PUBLIC API ====================
+
+    def load(self, path: str, generation: int) -> None:
+        """Resolve and list path in the background, cancelling any running load"""
+        cancel = threading.Event()
+        with self._lock:
+            if self._load_cancel is not None:
+                self._load_cancel.set()
+            self._load_cancel = cancel
+        self._executor.submit(self._run_load, path, generation, cancel)
+
+    def prefetch(self, paths: Iterable[str]) -> None:
+        """List likely next directories in the background (replaces earlier prefetch work)"""
+        cancel = threading.Event()
+        with self._lock:
+            if self._prefetch_cancel is not None:
+                self._prefetch_cancel.set()
+            self._prefetch_cancel = cancel
+        self._prefetch_executor.submit(self._run_prefetch, list(paths), cancel)
+
+    def cancel(self) -> None:
+        """Cancel the running load and prefetch"""
+        with self._lock:
+            for ev in (self._load_cancel, self._prefetch_cancel):
+                if ev is not None:
+                    ev.set()
+
+    def shutdown(self) -> None:
+        """Cancel work and stop the worker threads"""
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._prefetch_executor.shutdown(wait=False, cancel_futures=True)
+
+    # ==================== WORKERS ====================
+
+    def _run_load(self, path: str, generation: int, cancel: threading.Event) -> None:
+        """Worker: resolve, then stream counts for the directory"""
+        try:
+            resolved = os.path.abspath(os.path.expanduser(path))
+            try:
+                st = self.probe.stat(resolved) if self.probe is not None else os.stat(resolved)
+            except PathUnresponsive:
+                self.failed.emit(generation, path, "Not responding")
+                return
+            except (OSError, ValueError):
+                self.failed.emit(generation, path, "Path does not exist")
+                return
+            if not stat.S_ISDIR(st.st_mode):
+                self.failed.emit(generation, path, "Not a folder")
+                return
+            if cancel.is_set():
+                return
+            self.resolved.emit(generation, resolved)
+
+            cached = self._cached_listing(resolved)
+            if cached is not None:
+                self.listed.emit(generation, resolved, cached[1], True)
+                self.counted.emit(generation, resolved, cached[0], True)
+                return
+
+            def report(chunk: DirectoryListing, partial: DirectoryCounts) -> None:
+                self.listed.emit(generation, resolved, chunk, False)
+                self.counted.emit(generation, resolved, partial, False)
+
+            try:
+                result = self._scan_entries(resolved, cancel, report)
+            except OSError as e:
+                # The view already switched to the folder: finish it empty, then say why
+                logger.debug(f"Cannot list {resolved}: {e}")
+                self.listed.emit(generation, resolved, DirectoryListing(), True)
+                self.counted.emit(generation, resolved, DirectoryCounts(0, 0, 0, 0), True)
+                self.failed.emit(generation, path, e.strerror or str(e))
+                return
+            if result is not None:
+                counts, tail = result
+                self.listed.emit(generation, resolved, tail, True)
+                self.counted.emit(generation, resolved, counts, True)
+        except Exception as e:
+            logger.error(f"Error loading {path}: {e}", exc_info=True)
+            self.failed.emit(generation, path, str(e))
+
+    def _run_prefetch(self, paths: list, cancel: threading.Event) -> None:
+        """Worker: list each path so its rows and counts are ready when visited"""
+        for path in paths:
+            if cancel.is_set():
+                return
+            if self.probe is not None and self.probe.is_unresponsive(path):
+                continue
+            try:
+                if self._cached_listing(path) is None:
+                    self._scan_entries(path, cancel, None)
+            except Exception as e:
+                logger.debug(f"Prefetch of {path} failed: {e}")
+
+    def _scan_entries(self, path: str, cancel: threading.Event,
+                      report) -> Optional[Tuple[DirectoryCounts, DirectoryListing]]:
+        """List path in a single os.scandir pass
+
+        Each entry is stat'ed once for size and mtime; its type comes from the
+        DirEntry. Every CHUNK_SIZE entries the chunk and running counts are
+        passed to report(chunk, counts).
+
+        Returns (final counts, last partial chunk), or None if cancelled.
+
+        Raises:
+            OSError: The folder could not be listed
+        """
+        files = folders = size = hidden = 0
+        chunk = DirectoryListing()
+        full: Optional[DirectoryListing] = DirectoryListing()
+        mtime_ns = os.stat(path).st_mtime_ns
+        with os.scandir(path) as it:
+            for entry in it:
+                st = None
+                try:
+                    is_dir = entry.is_dir()
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        st = entry.stat(follow_symlinks=False)  # Broken link
+                except OSError:
+                    continue
+                hide = is_hidden(entry.name, st)
+                if is_dir:
+                    folders += 1
+                    chunk.append(entry.name, 0, st.st_mtime, KIND_DIR, hide)
+                else:
+                    files += 1
+                    size += st.st_size
+                    chunk.append(entry.name, st.st_size, st.st_mtime, KIND_FILE, hide)
+                if hide:
+                    hidden += 1
+
+                if len(chunk) >= self.CHUNK_SIZE:
+                    if cancel.is_set():
+                        return None
+                    if full is not None:
+                        full.extend(chunk)
+                        if len(full) > self.CACHE_MAX_ENTRIES:
+                            full = None  # Too big to keep around
+                    if report is not None:
+                        report(chunk, DirectoryCounts(files, folders, size, hidden))
+                    chunk = DirectoryListing()
+
+        counts = DirectoryCounts(files, folders, size, hidden)
+        if full is not None:
+            full.extend(chunk)
+            if len(full) <= self.CACHE_MAX_ENTRIES:
+                self._remember_listing(path, mtime_ns, counts, full)
+        return counts, chunk
+
+    # ==================== LISTING CACHE ====================
+
+    def _cached_listing(self, path: str) -> Optional[Tuple[DirectoryCounts, DirectoryListing]]:
+        """Return (counts, listing) if cached and the directory is unchanged"""
+        with self._lock:
+            entry = self._listings.get(path)
+        if entry is None:
+            return None
+        try:
+            if os.stat(path).st_mtime_ns != entry[0]:
+                return None
+        except OSError:
+            return None
+        with self._lock:
+            if path in self._listings:
+                self._listings.move_to_end(path)
+        return entry[1], entry[2]
+
+    def _remember_listing(self, path: str, mtime_ns: int, counts: DirectoryCounts,
+                          listing: DirectoryListing) -> None:
+        with self._lock:
+            self._listings[path] = (mtime_ns, counts, listing)
+            self._listings.move_to_end(path)
+            while len(self._listings) > self.CACHE_SIZE:
+                self._listings.popitem(last=False)
@@ -0,0 +1,625 @@
+"""
+Directory Model for File Explorer
+Flat, lazily exposed item model over columnar directory listings
+"""
+
+import fnmatch
+import os
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from itertools import chain
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from PyQt6.QtCore import QAbstractItemModel, QDir, QFileInfo, QModelIndex, Qt
+from PyQt6.QtGui import QIcon
+from PyQt6.QtWidgets import QFileIconProvider
+
+from directory_loader import DirectoryCounts, DirectoryListing, KIND_DIR
+from folder_size_engine import FolderSize
+from scan_exclusions import ExclusionRules
+
+
+class DirectoryModel(QAbstractItemModel):
+    """Item model for the contents of a single folder
+
+    Replaces QFileSystemModel for the file list. Rows live in a
+    DirectoryListing (parallel arrays of names, sizes, mtimes and kinds)
+    that the DirectoryLoader fills in chunks from its worker thread, so
+    the model never touches the file system itself.
+
+    Rows are exposed to views FETCH_BATCH at a time through
+    canFetchMore/fetchMore: opening a folder with 500k entries inserts
+    the first batch only, and further rows appear as the view scrolls.
+
+    A name filter (set_name_filter) is applied in the model itself while
+    building the visible rows, rather than per row in a proxy; a filter
+    that only narrows the previous one re-checks just the rows that
+    matched it.
+
+    Changes reported by a folder watcher are applied in place
+    (apply_changes): modified rows repaint, new rows are inserted and
+    removed rows are taken out, without resetting the model.
+
+    Sorting (sort) orders every visible row, not just the exposed ones,
+    so a proxy must not sort on top of it. While a sorted listing streams
+    in, each chunk is merged into the exposed rows only; the rows behind
+    them are sorted once more rows are exposed.
+
+    Whether each folder is left out of folder sizes by the scan exclusion
+    rules (set_exclusion_rules) is worked out once, when the entry is
+    listed or the rules change, so painting never matches patterns.
+
+    The root folder is the invalid QModelIndex; every entry is a top-level
+    row. Method names mirror QFileSystemModel (filePath, isDir, size,
+    setRootPath, setFilter) so callers did not need to change.
+    """
+
+    COLUMNS = ("Name", "Size", "Type", "Date Modified")
+    FETCH_BATCH = 1000                         # Rows exposed per fetchMore
+    _SIZE_ROLES = [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._root = ""
+        self._listing = DirectoryListing()
+        self._visible = array('l')   # Listing indices that pass the hidden filter, in row order
+        self._exposed = 0            # Leading _visible rows inserted into the model
+        self._sort_column = -1       # -1 = listing order (_visible ascending)
+        self._sort_order = Qt.SortOrder.AscendingOrder
+        self._tail_sorted = True     # False while rows behind the exposed ones await sorting
+        self._size_keys = array('q') # Size sort key per listing entry (-1 = folder size unknown)
+        self._size_partial = bytearray()  # mount_policy completeness of each folder size key
+        self._rules = ExclusionRules()
+        self._root_excluded = False  # The root folder lies in an excluded tree
+        self._excluded = bytearray() # 1 per folder entry the rules exclude
+        self._dir_entries: Dict[str, int] = {}  # Folder name -> listing index
+        self._show_hidden = False
+        self._name_filter = ""       # Casefolded filter text ('' = no filter)
+        self._name_match: Optional[Callable[[str], bool]] = None
+        self._folded: List[str] = [] # Casefolded names, kept only while a filter is set
+        self._positions: Optional[Dict[str, int]] = None  # Name -> listing index, built on first change
+        self._icons = QFileIconProvider()
+        self._icon_cache: Dict[str, QIcon] = {}
+
+    # ==================== LOADING ====================
+
+    def setRootPath(self, path: str) -> QModelIndex:
+        """Clear the model for a new folder; rows arrive via append_listing"""
+        self.beginResetModel()
+        self._root = path
+        self._listing = DirectoryListing()
+        self._visible = array('l')
+        self._exposed = 0
+        self._tail_sorted = True
+        self._size_keys = array('q')
+        self._size_partial = bytearray()
+        self._root_excluded = self._rules.excludes_tree(path) if path else False
+        self._excluded = bytearray()
+        self._dir_entries = {}
+        self._folded = []
+        self._positions = None
+        self.endResetModel()
+        return QModelIndex()
+
+    def rootPath(self) -> str:
+        return self._root
+
+    def append_listing(self, chunk: DirectoryListing) -> None:
+        """Add a chunk streamed by the loader
+
+        The chunk is copied, so cached listings can be replayed safely.
+        Rows are only inserted while fewer than FETCH_BATCH are exposed.
+        """
+        if not len(chunk):
+            return
+        start = len(self._listing)
+        self._listing.extend(chunk)
+        match = self._name_match
+        if match is not None:
+            self._folded.extend(name.casefold() for name in chunk.names)
+        if self._positions is not None:
+            self._positions.update((name, start + i) for i, name in enumerate(chunk.names))
+        new = array('l')
+        for i in range(len(chunk)):
+            if (self._show_hidden or not chunk.hidden[i]) and (match is None or match(self._folded[start + i])):
+                new.append(start + i)
+            if chunk.kinds[i] == KIND_DIR:
+                self._dir_entries[chunk.names[i]] = start + i
+                self._size_keys.append(-1)
+            else:
+                self._size_keys.append(chunk.sizes[i])
+        self._size_partial.extend(bytes(len(chunk)))
+        self._excluded.extend(self._excluded_flags(chunk.names, chunk.kinds))
+        if self._sort_column < 0:
+            self._visible.extend(new)
+        elif len(new):
+            self._merge_sorted(new)
+        if self._exposed < self.FETCH_BATCH:
+            self._expose(self.FETCH_BATCH - self._exposed)
+
+    def setFilter(self, filters: QDir.Filter) -> None:
+        """Only QDir.Filter.Hidden is honoured: show or hide hidden entries"""
+        show = bool(filters & QDir.Filter.Hidden)
+        if show == self._show_hidden:
+            return
+        self.beginResetModel()
+        self._show_hidden = show
+        self._visible = self._in_sort_order(self._filtered(self._unfiltered()))
+        self._exposed = min(len(self._visible), max(self._exposed, self.FETCH_BATCH))
+        self.endResetModel()
+
+    def set_name_filter(self, text: str) -> None:
+        """Show only entries whose name contains text, case-insensitively
+
+        Text with *, ? or [ is matched as a wildcard against the whole
+        name instead. When the new text extends the previous plain text,
+        only the rows that matched before are checked again.
+        """
+        text = text.casefold()
+        if text == self._name_filter:
+            return
+        narrowing = (bool(self._name_filter) and self._name_filter in text
+                     and self._is_plain(self._name_filter) and self._is_plain(text))
+        self.beginResetModel()
+        self._name_filter = text
+        if not text:
+            self._name_match = None
+            self._folded = []
+        else:
+            if self._is_plain(text):
+                self._name_match = lambda name: text in name
+            else:
+                self._name_match = lambda name: fnmatch.fnmatchcase(name, text)
+            if len(self._folded) < len(self._listing):
+                self._folded = [name.casefold() for name in self._listing.names]
+        self._visible = self._in_sort_order(self._filtered(self._visible if narrowing else self._unfiltered()))
+        self._exposed = min(len(self._visible), self.FETCH_BATCH)
+        self.endResetModel()
+
+    def _unfiltered(self) -> array:
+        """Listing indices that pass the hidden filter"""
+        if self._show_hidden:
+            return array('l', range(len(self._listing)))
+        return array('l', (i for i, h in enumerate(self._listing.hidden) if not h))
+
+    def _filtered(self, candidates: array) -> array:
+        """The candidates whose names pass the name filter"""
+        match = self._name_match
+        if match is None:
+            return candidates
+        folded = self._folded
+        if self._is_plain(self._name_filter):
+            text = self._name_filter  # Inline substring test: no call per name
+            return array('l', [i for i in candidates if text in folded[i]])
+        return array('l', [i for i in candidates if match(folded[i])])
+
+    @staticmethod
+    def _is_plain(text: str) -> bool:
+        return not any(c in text for c in '*?[')
+
+    # ==================== SORTING ====================
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder) -> None:
+        """Order all visible rows by column; -1 restores listing order
+
+        Persistent indexes (selection, current row) follow their entries;
+        entries that move behind the exposed rows lose theirs.
+        """
+        self._sort_column = column if 0 <= column < len(self.COLUMNS) else -1
+        self._sort_order = order
+        if self._sort_column < 0:
+            self._relayout(array('l', sorted(self._visible)))
+        else:
+            self._relayout(self._sorted(self._visible))
+        self._tail_sorted = True
+
+    def _sort_key(self) -> Callable[[int], object]:
+        """Sort key of listing entry i for the current sort column"""
+        listing = self._listing
+        column = self._sort_column
+        if column == 1:
+            return self._size_keys.__getitem__
+        if column == 3:
+            return listing.mtimes.__getitem__
+        if column == 2:
+            return lambda i: "" if listing.kinds[i] == KIND_DIR else self._type_name(listing.names[i]).casefold()
+        # Folders first, then case-insensitive name
+        return lambda i: (listing.kinds[i] != KIND_DIR, listing.names[i].casefold())
+
+    def _sorted(self, entries: Iterable[int]) -> array:
+        return array('l', sorted(entries, key=self._sort_key(),
+                                 reverse=self._sort_order == Qt.SortOrder.DescendingOrder))
+
+    def _in_sort_order(self, entries: array) -> array:
+        """entries (in listing order) rearranged for the current sort"""
+        self._tail_sorted = True
+        return entries if self._sort_column < 0 else self._sorted(entries)
+
+    def _resort(self) -> None:
+        """Restore the sort after sort keys of existing entries changed"""
+        if self._sort_column >= 0:
+            self._relayout(self._sorted(self._visible))
+            self._tail_sorted = True
+
+    def _merge_sorted(self, new: array) -> None:
+        """Add new entries to a sorted model without sorting every row again
+
+        The exposed rows are re-picked from themselves and the new entries;
+        the rest queue behind them and are sorted when next exposed.
+        """
+        exposed = self._exposed
+        head = self._sorted(chain(self._visible[:exposed], new))
+        tail = self._visible[exposed:]
+        self._relayout(head + tail)
+        self._tail_sorted = not len(tail)
+
+    def _relayout(self, visible: array) -> None:
+        """Replace the row order; persistent indexes move with their entries"""
+        exposed = self._exposed
+        if visible[:exposed] == self._visible[:exposed]:
+            self._visible = visible
+            return
+        hint = QAbstractItemModel.LayoutChangeHint.VerticalSortHint
+        self.layoutAboutToBeChanged.emit([], hint)
+        old = self.persistentIndexList()
+        entries = [self._visible[index.row()] for index in old]
+        self._visible = visible
+        rows = {i: row for row, i in enumerate(visible[:exposed])}
+        self.changePersistentIndexList(
+            old, [self.createIndex(rows[i], index.column()) if i in rows else QModelIndex()
+                  for i, index in zip(entries, old)])
+        self.layoutChanged.emit([], hint)
+
+    def apply_folder_sizes(self, sizes: Dict[str, Tuple[int, float, int]]) -> None:
+        """Fill folder size sort keys from cached {path: (size, mtime, partial)} records
+
+        A record is used only if its mtime matches the one in the listing,
+        so this never needs to stat anything.
+        """
+        mtimes = self._listing.mtimes
+        changed = False
+        for path, (size, mtime, partial) in sizes.items():
+            if os.path.dirname(path) != self._root:
+                continue
+            i = self._dir_entries.get(os.path.basename(path))
+            if i is not None and abs(mtimes[i] - mtime) <= 0.001 and \
+                    (self._size_keys[i], self._size_partial[i]) != (size, partial):
+                self._size_keys[i] = size
+                self._size_partial[i] = partial
+                changed = True
+        if changed and self._sort_column == 1:
+            self._resort()
+        if changed and self._exposed:
+            self.dataChanged.emit(self.index(0, 1), self.index(self._exposed - 1, 1), self._SIZE_ROLES)
+
+    def update_folder_sizes(self, sizes: Dict[str, Optional[FolderSize]]) -> None:
+        """Store computed folder totals and signal only the affected Size cells
+
+        Consecutive rows are merged into one dataChanged range each.
+        """
+        entries = []
+        for path, size in sizes.items():
+            if os.path.dirname(path) != self._root:
+                continue
+            i = self._dir_entries.get(os.path.basename(path))
+            if i is None:
+                continue
+            self._size_keys[i] = -1 if size is None else size.total
+            self._size_partial[i] = 0 if size is None else size.partial
+            entries.append(i)
+        if entries and self._sort_column == 1:
+            self._resort()
+        self._rows_changed(self._rows_of(entries), 1, 1, self._SIZE_ROLES)
+
+    def _rows_changed(self, rows: List[int], first_column: int, last_column: int,
+                      roles: Optional[List[int]] = None) -> None:
+        """Emit dataChanged once per run of consecutive rows"""
+        rows.sort()
+        start = prev = None
+        for row in rows + [None]:
+            if start is not None and (row is None or row != prev + 1):
+                self.dataChanged.emit(self.index(start, first_column), self.index(prev, last_column),
+                                      roles or [])
+                start = None
+            if row is not None and start is None:
+                start = row
+            prev = row
+
+    def _rows_of(self, entries: Iterable[int]) -> List[int]:
+        """Exposed rows showing the given listing entries"""
+        visible, exposed = self._visible, self._exposed
+        if self._sort_column >= 0:
+            rows = {i: row for row, i in enumerate(visible[:exposed])}
+            return [rows[i] for i in entries if i in rows]
+        found = []
+        for i in entries:
+            row = bisect_left(visible, i, 0, exposed)  # _visible is ascending
+            if row < exposed and visible[row] == i:
+                found.append(row)
+        return found
+
+    def size_key(self, index: QModelIndex) -> int:
+        """Bytes for files, cached total for folders, -1 if a folder's size is unknown"""
+        if not index.isValid():
+            return -1
+        return self._size_keys[self._visible[index.row()]]
+
+    def is_excluded(self, index: QModelIndex) -> bool:
+        """True if the folder at index lies in a tree the exclusion rules leave out"""
+        if not index.isValid():
+            return self._root_excluded
+        return self._root_excluded or bool(self._excluded[self._visible[index.row()]])
+
+    def set_exclusion_rules(self, rules: ExclusionRules) -> None:
+        """Use new scan exclusion rules and repaint the Size cells of exposed rows"""
+        if rules == self._rules:
+            return
+        self._rules = rules
+        self._root_excluded = rules.excludes_tree(self._root) if self._root else False
+        self._excluded = self._excluded_flags(self._listing.names, self._listing.kinds)
+        if self._exposed:
+            self.dataChanged.emit(self.index(0, 1), self.index(self._exposed - 1, 1), self._SIZE_ROLES)
+
+    def _excluded_flags(self, names: List[str], kinds: bytearray) -> bytearray:
+        """One byte per entry: 1 for folders the rules exclude"""
+        rules = self._rules
+        if not rules:
+            return bytearray(len(names))
+        root = self._root
+        return bytearray(kind == KIND_DIR and rules.excludes(os.path.join(root, name), True, name)
+                         for name, kind in zip(names, kinds))
+
+    def size_partial(self, index: QModelIndex) -> int:
+        """How complete a folder's size key is (mount_policy.EXACT / LOWER_BOUND / ESTIMATE)"""
+        if not index.isValid():
+            return 0
+        return self._size_partial[self._visible[index.row()]]
+
+    # ==================== LIVE UPDATES ====================
+
+    def apply_changes(self, upserts: DirectoryListing, removed: Iterable[str]) -> None:
+        """Apply entries reported as added or modified (upserts) and removed (by name)
+
+        Known names are updated in place and only their rows repaint; new
+        names are appended (and inserted as rows if every row was already
+        exposed); removed names are taken out with beginRemoveRows, so views
+        keep their scroll position and selection.
+        """
+        positions = self._name_positions()
+        listing = self._listing
+        gone = {name for name in removed if name in positions}
+        added = DirectoryListing()
+        changed: List[int] = []
+        for j, name in enumerate(upserts.names):
+            i = positions.get(name)
+            if i is None or name in gone:
+                added.append(name, upserts.sizes[j], upserts.mtimes[j], upserts.kinds[j], upserts.hidden[j])
+            elif listing.hidden[i] != upserts.hidden[j]:
+                # Visibility changes: re-add the entry rather than re-filter
+                gone.add(name)
+                added.append(name, upserts.sizes[j], upserts.mtimes[j], upserts.kinds[j], upserts.hidden[j])
+            else:
+                changed.append(i)
+                listing.sizes[i] = upserts.sizes[j]
+                listing.mtimes[i] = upserts.mtimes[j]
+                if upserts.kinds[j] == KIND_DIR:
+                    if listing.kinds[i] != KIND_DIR:
+                        self._size_keys[i] = -1
+                        self._excluded[i] = self._excluded_flags([name], upserts.kinds[j:j + 1])[0]
+                    self._dir_entries[name] = i
+                else:
+                    self._dir_entries.pop(name, None)
+                    self._size_keys[i] = upserts.sizes[j]
+                    self._size_partial[i] = 0
+                    self._excluded[i] = 0
+                listing.kinds[i] = upserts.kinds[j]
+
+        if changed:
+            self._resort()
+        self._rows_changed(self._rows_of(changed), 0, len(self.COLUMNS) - 1)
+        if gone:
+            self._remove_entries({positions[name] for name in gone})
+        if len(added):
+            all_exposed = self._exposed == len(self._visible)
+            self.append_listing(added)
+            if all_exposed:
+                self._expose(len(self._visible) - self._exposed)
+
+    def counts(self) -> DirectoryCounts:
+        """Status bar counts of the current listing"""
+        listing = self._listing
+        folders = listing.kinds.count(KIND_DIR)
+        return DirectoryCounts(len(listing) - folders, folders, sum(listing.sizes), listing.hidden.count(1))
+
+    def _name_positions(self) -> Dict[str, int]:
+        if self._positions is None:
+            self._positions = {name: i for i, name in enumerate(self._listing.names)}
+        return self._positions
+
+    def _remove_entries(self, dead: Set[int]) -> None:
+        """Drop listing entries: remove their rows, then compact the listing arrays"""
+        visible = self._visible
+        doomed = [row for row, i in enumerate(visible) if i in dead]
+        # Exposed rows go through begin/endRemoveRows, one call per run, last run first
+        runs: List[List[int]] = []
+        for row in doomed:
+            if row >= self._exposed:
+                break
+            if runs and runs[-1][1] == row - 1:
+                runs[-1][1] = row
+            else:
+                runs.append([row, row])
+        for first, last in reversed(runs):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del visible[first:last + 1]
+            self._exposed -= last - first + 1
+            self.endRemoveRows()
+        if any(i in dead for i in visible):
+            self._visible = visible = array('l', [i for i in visible if i not in dead])
+
+        old = self._listing
+        keep = [i for i in range(len(old)) if i not in dead]
+        remap = array('l', [-1]) * len(old)
+        for new_i, i in enumerate(keep):
+            remap[i] = new_i
+        listing = DirectoryListing()
+        listing.names = [old.names[i] for i in keep]
+        listing.sizes = array('q', [old.sizes[i] for i in keep])
+        listing.mtimes = array('d', [old.mtimes[i] for i in keep])
+        listing.kinds = bytearray(old.kinds[i] for i in keep)
+        listing.hidden = bytearray(old.hidden[i] for i in keep)
+        self._listing = listing
+        self._size_keys = array('q', [self._size_keys[i] for i in keep])
+        self._size_partial = bytearray(self._size_partial[i] for i in keep)
+        self._excluded = bytearray(self._excluded[i] for i in keep)
+        if self._folded:
+            self._folded = [self._folded[i] for i in keep]
+        self._dir_entries = {name: remap[i] for name, i in self._dir_entries.items() if i not in dead}
+        self._visible = array('l', [remap[i] for i in visible])
+        self._positions = None
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and self._exposed < len(self._visible)
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        if not parent.isValid():
+            self._expose(self.FETCH_BATCH)
+
+    def _expose(self, count: int) -> None:
+        count = min(count, len(self._visible) - self._exposed)
+        if count <= 0:
+            return
+        if not self._tail_sorted:
+            self._visible[self._exposed:] = self._sorted(self._visible[self._exposed:])
+            self._tail_sorted = True
+        self.beginInsertRows(QModelIndex(), self._exposed, self._exposed + count - 1)
+        self._exposed += count
+        self.endInsertRows()
+
+    # ==================== QAbstractItemModel ====================
+
+    def index(self, row, column: int = 0, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        """Return the index for (row, column), or for a path like QFileSystemModel.index(path)"""
+        if isinstance(row, str):
+            return self._index_for_path(row, column)
+        if parent.isValid() or not (0 <= row < self._exposed) or not (0 <= column < len(self.COLUMNS)):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index: QModelIndex = QModelIndex()) -> QModelIndex:
+        return QModelIndex()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._exposed
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return len(self.COLUMNS)
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid()
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def headerData(self, section: int, orientation: Qt.Orientation,
+                   role: int = Qt.ItemDataRole.DisplayRole):
+        if (orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole
+                and 0 <= section < len(self.COLUMNS)):
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        i = self._visible[index.row()]
+        listing = self._listing
+        column = index.column()
+        is_dir = listing.kinds[i] == KIND_DIR
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return listing.names[i]
+            if column == 1:
+                return "" if is_dir else self._format_size(listing.sizes[i])
+            if column == 2:
+                return "Folder" if is_dir else self._type_name(listing.names[i])
+            if column == 3:
+                return datetime.fromtimestamp(listing.mtimes[i]).strftime('%Y-%m-%d %H:%M')
+        elif role == Qt.ItemDataRole.DecorationRole and column == 0:
+            return self._icon_for(i, is_dir)
+        return None
+
+    # ==================== QFileSystemModel-style accessors ====================
+
+    def filePath(self, index: QModelIndex) -> str:
+        if not index.isValid():
+            return self._root
+        return os.path.join(self._root, self._listing.names[self._visible[index.row()]])
+
+    def fileName(self, index: QModelIndex) -> str:
+        if not index.isValid():
+            return os.path.basename(self._root)
+        return self._listing.names[self._visible[index.row()]]
+
+    def isDir(self, index: QModelIndex) -> bool:
+        if not index.isValid():
+            return True
+        return self._listing.kinds[self._visible[index.row()]] == KIND_DIR
+
+    def size(self, index: QModelIndex) -> int:
+        if not index.isValid():
+            return 0
+        return self._listing.sizes[self._visible[index.row()]]
+
+    def names(self) -> List[str]:
+        """Names of every entry listed so far, hidden ones included"""
+        return self._listing.names
+
+    # ==================== HELPERS ====================
+
+    def _index_for_path(self, path: str, column: int) -> QModelIndex:
+        """Map the root path to the invalid index and exposed children to their row"""
+        if os.path.normpath(path) == os.path.normpath(self._root):
+            return QModelIndex()
+        if os.path.dirname(os.path.normpath(path)) != os.path.normpath(self._root):
+            return QModelIndex()
+        name = os.path.basename(os.path.normpath(path))
+        names = self._listing.names
+        for row in range(self._exposed):
+            if names[self._visible[row]] == name:
+                return self.createIndex(row, column)
+        return QModelIndex()
+
+    def _icon_for(self, i: int, is_dir: bool) -> QIcon:
+        """Icons are cached per extension; resolving one per row is slow"""
+        if is_dir:
+            key = "/"
+        else:
+            key = os.path.splitext(self._listing.names[i])[1].lower()
+        icon = self._icon_cache.get(key)
+        if icon is None:
+            if is_dir:
+                icon = self._icons.icon(QFileIconProvider.IconType.Folder)
+            else:
+                icon = self._icons.icon(QFileInfo(os.path.join(self._root, self._listing.names[i])))
+            self._icon_cache[key] = icon
+        return icon
+
+    @staticmethod
+    def _type_name(name: str) -> str:
+        ext = os.path.splitext(name)[1]
+        return f"{ext[1:]} File" if ext else "File"
+
+    @staticmethod
+    def _format_size(size: int) -> str:
+        if size < 1024:
+            return f"{size} bytes"
+        value = float(size)
+        for unit in ('KB', 'MB', 'GB', 'TB'):
+            value /= 1024
+            if value < 1024 or unit == 'TB':
+                break
+        return f"{value:.1f} {unit}"
@@ -4,24 +4,41 @@ import subprocess
 import platform
 import json
 import logging
+import re
+import stat
+import threading
 from datetime import datetime
 from typing import Callable
 from pathlib import Path
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, 
                             QTreeView, QListView, QLineEdit, QPushButton, 
                             QSplitter, QLabel, QMessageBox, QInputDialog,
-                            QMenu, QToolBar, QStatusBar,
+                            QMenu, QToolBar, QStatusBar, QProgressBar,
                             QAbstractItemView, QHeaderView, QScrollArea)
 from PyQt6.QtCore import (Qt, QDir, QModelIndex, QTimer, pyqtSignal, 
                          QSortFilterProxyModel, QThread, pyqtSlot, QSize)
 from PyQt6.QtGui import (QAction, QKeySequence, QFont, QPixmap, QPalette, 
-                        QBrush, QColor, QIcon, QFileSystemModel, QGuiApplication)
+                        QBrush, QColor, QIcon, QGuiApplication)
 from PyQt6.QtWidgets import QGraphicsBlurEffect, QGraphicsDropShadowEffect
 from send2trash import send2trash
 from file_operations import FileOperations
 from theme import ThemeManager
 from settings_dialog import SettingsDialog
 from data_manager import DataManager
+from directory_loader import DirectoryLoader, DirectoryCounts, DirectoryListing, KIND_DIR
+from directory_model import DirectoryModel
+from transfer_manager import TransferManager, TransferStatus
+from conflict_resolver import KEEP_BOTH, OVERWRITE, SKIP, KEEP_NEWER
+from file_index import parse_query
+from file_indexer import FileIndexer
+from search_results import SearchResultsDialog
+from content_search import ContentSearch, compile_pattern
+from folder_watcher import FolderWatcher
+from folder_size_scheduler import FolderSizeScheduler, PRIORITY_VISIBLE, PRIORITY_BACKGROUND
+from folder_size_engine import ExcludedSize, FolderSize, excluded_size, revalidate_folder_sizes
+from mount_policy import EXACT, ESTIMATE, MountPolicies
+from scan_exclusions import DEFAULT_EXCLUSIONS, ExclusionRules
+from path_probe import PathProbe, PathUnresponsive
 
 # Setup logging - save to log directory
 log_dir = Path(__file__).parent.parent / 'log'
@@ -39,11 +56,61 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class LiquidGlassFileExplorer(QMainWindow):
+    # Most visited child folders to prefetch after each navigation
+    PREFETCH_CHILDREN = 3
+    # Window for coalescing background folder size results (ms)
+    SIZE_BATCH_MS = 50
+    # Quiet time after the last keystroke before the name filter is applied (ms)
+    FILTER_DEBOUNCE_MS = 150
+    # Most filename index hits listed per search
+    INDEX_SEARCH_LIMIT = 5000
+    # Most matching lines listed per search in files
+    CONTENT_SEARCH_LIMIT = 5000
+
+    # path, FolderSize; emitted from scheduler worker threads (queued to the UI thread)
+    folder_size_ready = pyqtSignal(str, object)
+    # folder, ExcludedSize (None if cancelled); emitted from a worker thread
+    excluded_size_ready = pyqtSignal(str, object)
+
     def __init__(self):
         super().__init__()
         self.file_ops = FileOperations()
         self.theme_manager = ThemeManager()
         self.data_manager = DataManager()  # New data manager
+        # Bounded worker pool for background folder sizing
+        self.size_scheduler = FolderSizeScheduler(self._compute_folder_size, self._on_folder_size_result)
+        # How sizing treats network, FUSE and pseudo file systems mounted inside a folder
+        self.mount_policies = MountPolicies()
+        # Stat calls with deadlines; mounts that stop answering fail fast afterwards
+        self.probe = PathProbe(self)
+        # Background resolve/list pipeline for navigation
+        self.dir_loader = DirectoryLoader(self, self.probe)
+        # Live updates of the open folder (auto_refresh / refresh_interval settings)
+        self.watcher = FolderWatcher(self)
+        self._listing_complete = False
+        self._watch_backlog = []        # Changes reported while the folder was still being listed
+        # Background queue for paste (copy/move) jobs; cross-device moves are journaled
+        self.transfers = TransferManager(self.file_ops, self.data_manager.data_dir / 'moves', self)
+        # Persistent filename index, crawled and searched in the background
+        self.indexer = FileIndexer(self.data_manager.file_index, self)
+        self._index_search = None       # (search id, root, query, final) shown in the results window
+        # Parallel search inside files (grep), streamed into the results window
+        self.content_search = ContentSearch(self)
+        self._content_search_id = None  # Search id shown in the results window
+        self.search_dialog = None
+        self._nav_generation = 0
+        self._closing = False
+        # Folder size results waiting for the next batched view update
+        self._pending_sizes: dict[str, FolderSize] = {}
+        self._size_batch_timer = QTimer(self)
+        self._size_batch_timer.setSingleShot(True)
+        self._size_batch_timer.setInterval(self.SIZE_BATCH_MS)
+        self._size_batch_timer.timeout.connect(self._flush_size_results)
+        # Name filter runs once typing pauses, not on every keystroke
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(self.FILTER_DEBOUNCE_MS)
+        self._filter_timer.timeout.connect(self.filter_files)
         
         self.current_path = str(Path.home())
         self.clipboard_path = None
@@ -73,8 +140,12 @@ class LiquidGlassFileExplorer(QMainWindow):
             'show_sidebar': True,
             'sidebar_width': 250,
             'show_toolbar': True,
-            'toolbar_style': 'text_beside_icon'
+            'toolbar_style': 'text_beside_icon',
+            'index_roots': [],
+            # Kept by the data manager: cached sizes and the index depend on them
+            'scan_exclusions': self.data_manager.get_setting('scan_exclusions', list(DEFAULT_EXCLUSIONS)),
         }
+        self.set_scan_exclusions(self.settings['scan_exclusions'])
         
         self.init_ui()
         self.apply_current_theme()
@@ -83,6 +154,10 @@ class LiquidGlassFileExplorer(QMainWindow):
 
         # Defer side-apps auto-run until UI is ready
         QTimer.singleShot(500, self.run_side_apps_on_startup)
+        # Offer to finish moves that were interrupted last time
+        QTimer.singleShot(800, self.check_interrupted_moves)
+        # Bring the filename index of the configured roots up to date
+        QTimer.singleShot(3000, lambda: self.indexer.crawl(self.settings.get('index_roots', [])))
 
     def init_ui(self):
         """Initialize the user interface"""
@@ -422,7 +497,8 @@ class LiquidGlassFileExplorer(QMainWindow):
         self.search_bar = QLineEdit()
         self.search_bar.setPlaceholderText("Search files...")
         self.search_bar.setMaximumWidth(250)
-        self.search_bar.setToolTip("Search for files in the current folder")
+        self.search_bar.setToolTip("Filter the current folder; press Enter to search all subfolders\n"
+                                   "(text, *.glob or re:regex); Ctrl+Shift+F searches inside files")
 
         layout.addWidget(self.back_btn)
         layout.addWidget(self.forward_btn)
@@ -483,6 +559,17 @@ class LiquidGlassFileExplorer(QMainWindow):
         delete_action.triggered.connect(self.delete_selected)
         toolbar.addAction(delete_action)
         
+        # Shortcut only, kept off the toolbar so it is not clicked by accident
+        purge_action = QAction("Delete Permanently", self)
+        purge_action.setShortcut(QKeySequence("Shift+Delete"))
+        purge_action.triggered.connect(self.delete_selected_permanently)
+        self.addAction(purge_action)
+        
+        content_search_action = QAction("Search in Files", self)
+        content_search_action.setShortcut(QKeySequence("Ctrl+Shift+F"))
+        content_search_action.triggered.connect(lambda: self.search_contents())
+        self.addAction(content_search_action)
+        
         toolbar.addSeparator()
         
         # Add to favorites button
@@ -530,17 +617,40 @@ class LiquidGlassFileExplorer(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("Ready")
 
+        # Transfer progress (shown while paste jobs run)
+        self.transfer_label = QLabel()
+        self.transfer_progress = QProgressBar()
+        self.transfer_progress.setRange(0, 1000)
+        self.transfer_progress.setMaximumWidth(160)
+        self.transfer_progress.setTextVisible(False)
+        self.transfer_pause_btn = QPushButton("⏸")
+        self.transfer_pause_btn.setToolTip("Pause transfers")
+        self.transfer_pause_btn.setFixedWidth(32)
+        self.transfer_cancel_btn = QPushButton("✖")
+        self.transfer_cancel_btn.setToolTip("Cancel all transfers")
+        self.transfer_cancel_btn.setFixedWidth(32)
+        for widget in (self.transfer_label, self.transfer_progress,
+                       self.transfer_pause_btn, self.transfer_cancel_btn):
+            self.status_bar.addPermanentWidget(widget)
+            widget.hide()
+
     def setup_file_model(self):
-        """Setup the file system model"""
-        self.file_model = QFileSystemModel()
-        self.file_model.setRootPath("")
+        """Setup the file system model
+        
+        DirectoryModel is filled by the directory loader's background listing
+        and exposes rows lazily, so huge folders open without blocking.
+        """
+        self.file_model = DirectoryModel(self)
+        self.file_model.set_exclusion_rules(self.scan_rules)
         
         # Create proxy model for filtering and column overrides
         class DirectoryInfoProxyModel(QSortFilterProxyModel):
             def __init__(self, explorer, *args, **kwargs):
                 super().__init__(*args, **kwargs)
                 self.explorer = explorer
-                self._size_pending: set[str] = set()
+                # Folders of the current listing already handed to the size scheduler,
+                # so repaints do not submit them again (cleared on reset and on results)
+                self.size_requested: set[str] = set()
 
             def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
                 # Mirror source
@@ -573,21 +683,39 @@ class LiquidGlassFileExplorer(QMainWindow):
                                 return f"Exact size: {size_bytes:,} bytes (\n{self.explorer.human_size(size_bytes)})"
                         except Exception:
                             return super().data(index, role)
-                    # For folders: use cache or schedule compute
-                    path = self.explorer.file_model.filePath(source_index)
-                    cached = self.explorer.data_manager.get_folder_size_cached(path)
-                    if cached is not None:
+                    # Excluded folders are not sized unless asked for (Size Excluded Items);
+                    # the model flags them when they are listed or the rules change
+                    if self.explorer.file_model.is_excluded(source_index):
+                        if role == Qt.ItemDataRole.DisplayRole:
+                            return "Excluded"
+                        return "Left out of folder sizes by a scan exclusion rule\n(Size Excluded Items measures it)"
+                    # For folders: use the model's cached total or schedule compute
+                    cached = self.explorer.file_model.size_key(source_index)
+                    if cached >= 0:
+                        partial = self.explorer.file_model.size_partial(source_index)
                         if role == Qt.ItemDataRole.DisplayRole:
-                            return self.explorer.format_size_for_display(int(cached))
+                            text = self.explorer.format_size_for_display(int(cached))
+                            if partial == EXACT:
+                                return text
+                            return ("≈ " if partial == ESTIMATE else "≥ ") + text
                         else:
                             human = self.explorer.human_size(int(cached))
                             band = self.explorer._size_band_label(int(cached))
                             band_str = f"\nBand: {band}" if band else ""
-                            return f"Exact size: {int(cached):,} bytes (\n{human}){band_str}"
-                    # Schedule compute once; show ellipsis meanwhile
-                    if path not in self._size_pending:
-                        self._size_pending.add(path)
-                        self.explorer.request_folder_size(path, lambda: self.invalidate())
+                            if partial == EXACT:
+                                return f"Exact size: {int(cached):,} bytes (\n{human}){band_str}"
+                            if partial == ESTIMATE:
+                                return (f"Estimated size: {int(cached):,} bytes (\n{human}){band_str}\n"
+                                        f"A mounted file system inside was sampled, not fully scanned")
+                            return (f"At least {int(cached):,} bytes (\n{human}){band_str}\n"
+                                    f"A mounted file system inside was skipped or ran out of scan time")
+                    # Schedule compute (scheduler dedupes in-flight paths); show ellipsis meanwhile.
+                    # The result arrives through folder_size_ready and repaints just this cell.
+                    # Not excluded (checked above), so skip request_folder_size's own check.
+                    path = self.explorer.file_model.filePath(source_index)
+                    if path not in self.size_requested:
+                        self.size_requested.add(path)
+                        self.explorer.size_scheduler.submit(path, None, PRIORITY_VISIBLE)
                     if role == Qt.ItemDataRole.DisplayRole:
                         return "…"
                     else:
@@ -596,36 +724,16 @@ class LiquidGlassFileExplorer(QMainWindow):
                 # Default
                 return super().data(index, role)
 
-            def lessThan(self, left: QModelIndex, right: QModelIndex) -> bool:
-                # Sort numerically for Size column
-                if left.column() == 1 and right.column() == 1:
-                    l_src = self.mapToSource(left)
-                    r_src = self.mapToSource(right)
-                    # Directories use cached size if available; otherwise treat as -1
-                    def size_for(idx: QModelIndex) -> int:
-                        if self.explorer.file_model.isDir(idx):
-                            p = self.explorer.file_model.filePath(idx)
-                            s = self.explorer.data_manager.get_folder_size_cached(p)
-                            return -1 if s is None else int(s)
-                        try:
-                            return int(self.explorer.file_model.size(idx))
-                        except Exception:
-                            return -1
-                    return size_for(l_src) < size_for(r_src)
-                return super().lessThan(left, right)
+            def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder) -> None:
+                # DirectoryModel sorts all of its rows (folders by their cached size keys);
+                # sorting here would only order the rows fetched so far, so the proxy
+                # keeps the source order.
+                self.explorer.file_model.sort(column, order)
 
         self.proxy_model = DirectoryInfoProxyModel(self)
         self.proxy_model.setSourceModel(self.file_model)
-        self.proxy_model.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
-        # Ensure we filter on the name column and try recursive filtering (Qt >= 5.10)
-        try:
-            self.proxy_model.setFilterKeyColumn(0)
-        except Exception:
-            pass
-        try:
-            self.proxy_model.setRecursiveFilteringEnabled(True)
-        except Exception:
-            pass
+        self.file_model.modelReset.connect(self.proxy_model.size_requested.clear)
+        # Name filtering happens in DirectoryModel (see filter_files)
         
         self.file_list.setModel(self.proxy_model)
 
@@ -636,10 +744,31 @@ class LiquidGlassFileExplorer(QMainWindow):
         self.up_btn.clicked.connect(self.go_up)
         self.refresh_btn.clicked.connect(self.refresh_current)
         self.address_bar.returnPressed.connect(self.navigate_from_address_bar)
-        self.search_bar.textChanged.connect(self.filter_files)
+        self.search_bar.textChanged.connect(self._filter_timer.start)
+        self.search_bar.returnPressed.connect(self.search_index)
         self.file_list.doubleClicked.connect(self.open_item)
         self.file_list.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.file_list.customContextMenuRequested.connect(self.show_context_menu)
+        self.dir_loader.resolved.connect(self._on_path_resolved)
+        self.dir_loader.failed.connect(self._on_path_failed)
+        self.dir_loader.listed.connect(self._on_directory_listed)
+        self.folder_size_ready.connect(self._queue_size_result)
+        self.excluded_size_ready.connect(self._on_excluded_size)
+        self.transfers.progress.connect(self._on_transfer_progress)
+        self.transfers.finished.connect(self._on_transfer_finished)
+        self.transfer_pause_btn.clicked.connect(self.toggle_transfer_pause)
+        self.transfer_cancel_btn.clicked.connect(lambda: self.transfers.cancel())
+        self.dir_loader.counted.connect(self._on_directory_counted)
+        self.indexer.search_finished.connect(self._on_index_search_finished)
+        self.indexer.crawl_progress.connect(self._on_index_crawl_progress)
+        self.indexer.crawl_finished.connect(self._on_index_crawl_finished)
+        self.watcher.changed.connect(self._on_folder_changed)
+        self.watcher.lost.connect(self._on_folder_lost)
+        self.probe.unresponsive.connect(self._on_mount_unresponsive)
+        self.probe.recovered.connect(self._on_mount_recovered)
+        self.content_search.found.connect(self._on_content_found)
+        self.content_search.progress.connect(self._on_content_progress)
+        self.content_search.finished.connect(self._on_content_finished)
 
     def apply_current_theme(self):
         """Apply the current theme from theme manager"""
@@ -778,6 +907,18 @@ class LiquidGlassFileExplorer(QMainWindow):
         # Apply alternating rows
         self.file_list.setAlternatingRowColors(new_settings.get('alternating_rows', True))
         
+        # New exclusion rules: cached sizes were marked stale, so reload the sizes shown
+        if self.set_scan_exclusions(self.settings.get('scan_exclusions', [])):
+            self.file_model.set_exclusion_rules(self.scan_rules)
+            self.refresh_current()
+        
+        # Index any newly configured search roots
+        self.indexer.crawl(new_settings.get('index_roots', []))
+        
+        # Start or stop watching the open folder
+        self.watcher.set_poll_interval(self.settings.get('refresh_interval', 5))
+        self.watcher.watch(self.current_path if self.settings.get('auto_refresh', True) else None)
+        
         self.status_bar.showMessage("✅ Settings applied successfully", 3000)
     
     def apply_font(self, size, family='Segoe UI'):
@@ -816,21 +957,143 @@ class LiquidGlassFileExplorer(QMainWindow):
 
     # Navigation methods
     def navigate_to_path(self, path):
-        """Navigate to a specific path"""
-        if os.path.exists(path):
-            self.current_path = os.path.abspath(path)
-            self.address_bar.setText(self.current_path)
-            
-            root_index = self.file_model.setRootPath(self.current_path)
-            proxy_root = self.proxy_model.mapFromSource(root_index)
-            self.file_list.setRootIndex(proxy_root)
-            
-            self.status_bar.showMessage(f"📁 {self.current_path}")
-            self.update_file_count()
-            
-            # Add to navigation history
-            self.data_manager.add_history(self.current_path)
-            logger.debug(f"Navigated to: {self.current_path}")
+        """Navigate to a specific path
+        
+        Resolving and listing happen on the directory loader's worker thread;
+        _on_path_resolved finishes the switch once the path is known to be a
+        folder. A newer navigation supersedes any that is still in flight.
+        """
+        if not path:
+            return
+        self._nav_generation += 1
+        if self.probe.is_unresponsive(os.path.abspath(os.path.expanduser(path))):
+            self._on_path_failed(self._nav_generation, path, "Not responding")
+            return
+        self.address_bar.setText(path)
+        self.status_bar.showMessage(f"⏳ Opening {path}…")
+        self.dir_loader.load(path, self._nav_generation)
+
+    def _on_path_resolved(self, generation: int, path: str) -> None:
+        """Switch the view to a folder the loader has confirmed exists"""
+        if generation != self._nav_generation:
+            return  # Superseded by a newer navigation
+        self.current_path = path
+        self.address_bar.setText(self.current_path)
+        # Drop folder size work for the directory we are leaving
+        self.size_scheduler.cancel(keep_under=self.current_path)
+        
+        root_index = self.file_model.setRootPath(self.current_path)
+        proxy_root = self.proxy_model.mapFromSource(root_index)
+        self.file_list.setRootIndex(proxy_root)
+        
+        # Watch from now on; changes are held back until the listing is complete
+        self._listing_complete = False
+        self._watch_backlog = []
+        if self.settings.get('auto_refresh', True):
+            self.watcher.watch(self.current_path)
+        
+        self.status_bar.showMessage(f"📁 {self.current_path}")
+
+        # Revalidate cached child sizes in the background; changes deep in
+        # a subtree do not touch the child's own mtime
+        if self.data_manager.get_folder_size_node(self.current_path) is not None:
+            self.request_folder_size(self.current_path, PRIORITY_BACKGROUND)
+        
+        # Add to navigation history
+        self.data_manager.add_history(self.current_path)
+        logger.debug(f"Navigated to: {self.current_path}")
+
+        self.prefetch_neighbours()
+
+    def _on_path_failed(self, generation: int, path: str, reason: str) -> None:
+        """Report a navigation that could not be completed"""
+        if generation != self._nav_generation:
+            return
+        logger.warning(f"Cannot navigate to {path}: {reason}")
+        self.address_bar.setText(self.current_path)
+        self.status_bar.showMessage(f"⚠️ {reason}: {path}", 3000)
+
+    def _on_directory_listed(self, generation: int, path: str, chunk: DirectoryListing,
+                             finished: bool) -> None:
+        """Append rows streamed by the directory loader to the model"""
+        if generation != self._nav_generation or path != self.current_path:
+            return
+        self.file_model.append_listing(chunk)
+        if finished:
+            self.refresh_size_keys()
+            self._listing_complete = True
+            backlog, self._watch_backlog = self._watch_backlog, []
+            for upserts, removed in backlog:
+                self._apply_folder_changes(upserts, removed)
+
+    def _on_folder_changed(self, folder: str, upserts: DirectoryListing, removed) -> None:
+        """Apply changes the folder watcher saw in the open folder"""
+        if folder != self.current_path:
+            return
+        if not self._listing_complete:
+            self._watch_backlog.append((upserts, removed))
+            return
+        self._apply_folder_changes(upserts, removed)
+
+    def _apply_folder_changes(self, upserts: DirectoryListing, removed) -> None:
+        """Update rows, counts and cached folder sizes without reloading the folder"""
+        self.file_model.apply_changes(upserts, removed)
+        self.update_file_count(self.file_model.counts())
+        
+        # The folder's own files (and any reported subfolders) changed: their cached
+        # sums must be relisted, and the new totals roll up to cached ancestors
+        stale = [self.current_path]
+        stale.extend(os.path.join(self.current_path, name)
+                     for name, kind in zip(upserts.names, upserts.kinds) if kind == KIND_DIR)
+        self.data_manager.invalidate_folder_sizes(stale)
+        if self.data_manager.get_folder_size_node(self.current_path) is not None:
+            self.request_folder_size(self.current_path, PRIORITY_BACKGROUND)
+
+    def _on_folder_lost(self, folder: str) -> None:
+        """The open folder vanished or changed too much to patch: load it again"""
+        if folder == self.current_path and not self._closing:
+            logger.debug(f"Reloading {folder} after watcher reported it lost")
+            self.navigate_to_path(folder)
+
+    def _on_mount_unresponsive(self, mount: str) -> None:
+        """A stat into mount timed out; calls into it fail fast for a while"""
+        self.status_bar.showMessage(f"⚠️ {mount} is not responding", 5000)
+
+    def _on_mount_recovered(self, mount: str) -> None:
+        """Stats into mount that had timed out came back: show its favorites normally again"""
+        if not self._closing:
+            self.update_favorites_list()
+
+    def refresh_size_keys(self) -> None:
+        """Load cached child folder sizes into the model's Size sort keys"""
+        self.file_model.apply_folder_sizes(self.data_manager.get_child_folder_sizes(self.current_path))
+
+    def _on_directory_counted(self, generation: int, path: str, counts: DirectoryCounts,
+                              finished: bool) -> None:
+        """Show (partial) counts streamed by the directory loader"""
+        if generation != self._nav_generation or path != self.current_path:
+            return
+        self.update_file_count(counts, partial=not finished)
+
+    def prefetch_neighbours(self) -> None:
+        """Warm the parent and the most visited child folders so Back/Up feel instant
+        
+        The directory loader lists them in the background and keeps their
+        rows and counts cached.
+        """
+        candidates = []
+        parent = os.path.dirname(self.current_path)
+        if parent and parent != self.current_path:
+            candidates.append(parent)
+
+        # Children of this folder that were visited most often
+        visits: dict[str, int] = {}
+        for entry in self.data_manager.get_history():
+            p = entry.get('path') if isinstance(entry, dict) else None
+            if p and os.path.dirname(p) == self.current_path:
+                visits[p] = visits.get(p, 0) + 1
+        candidates.extend(sorted(visits, key=visits.get, reverse=True)[:self.PREFETCH_CHILDREN])
+        self.dir_loader.prefetch(candidates)
 
     def navigate_from_address_bar(self):
         """Navigate using the address bar"""
@@ -857,20 +1120,141 @@ class LiquidGlassFileExplorer(QMainWindow):
         self.navigate_to_path(self.current_path)
 
     def filter_files(self):
-        """Filter files based on search text"""
-        text = self.search_bar.text()
-        if text:
-            self.proxy_model.setFilterWildcard(f"*{text}*")
+        """Filter the current folder's entries by the search text
+        
+        Called FILTER_DEBOUNCE_MS after typing pauses. Only the current
+        folder is filtered; Enter searches subfolders (search_index).
+        """
+        self._filter_timer.stop()
+        self.file_model.set_name_filter(self.search_bar.text())
+
+    def search_index(self):
+        """Search names in the current folder and all its subfolders
+        
+        Answers come from the persistent filename index, so they appear at
+        once; the folder is re-crawled in the background meanwhile and the
+        search is repeated when that finishes.
+        """
+        text = self.search_bar.text().strip()
+        if not text:
+            return
+        try:
+            query = parse_query(text)
+        except re.error as e:
+            self.status_bar.showMessage(f"❌ Invalid regular expression: {e}", 5000)
+            return
+        
+        self._stop_search()
+        self._show_search_dialog(f"'{text}' in {self.current_path}")
+        
+        root = self.current_path
+        search_id = self.indexer.search(root, query, self.INDEX_SEARCH_LIMIT)
+        self._index_search = (search_id, root, query, False)
+        self.indexer.crawl([root])
+
+    def _on_index_search_finished(self, search_id: int, root: str, results) -> None:
+        if self._index_search is None or search_id != self._index_search[0] or self.search_dialog is None:
+            return
+        final = self._index_search[3]
+        self.search_dialog.set_results(results)
+        more = "+" if len(results) >= self.INDEX_SEARCH_LIMIT else ""
+        if final:
+            self._index_search = None
+            self.search_dialog.set_status(f"{len(results):,}{more} match(es) in {root}")
         else:
-            self.proxy_model.setFilterWildcard("")
+            self.search_dialog.set_status(f"{len(results):,}{more} match(es) in the index · updating…",
+                                          running=True)
+
+    def _on_index_crawl_progress(self, root: str, folders: int) -> None:
+        if self._index_search is not None and self.search_dialog is not None and \
+                self._same_tree(root, self._index_search[1]):
+            self.search_dialog.set_status(
+                f"{self.search_dialog.count():,} match(es) · indexing {root}: {folders:,} folders checked…",
+                running=True)
+
+    def _on_index_crawl_finished(self, root: str, entries: int) -> None:
+        """Repeat the shown search once its folder has been re-indexed"""
+        if self._index_search is None:
+            return
+        _, search_root, query, _ = self._index_search
+        if self._same_tree(root, search_root):
+            search_id = self.indexer.search(search_root, query, self.INDEX_SEARCH_LIMIT)
+            self._index_search = (search_id, search_root, query, True)
 
-        # Re-assert the current root in the view to avoid jumping to drives
+    def search_contents(self, root: str = None):
+        """Search inside the files of a folder and all its subfolders
+        
+        Uses the search bar text (asks for it when empty): plain text, or
+        re:regex. Files are searched on a process pool and matching lines
+        stream into the results window until the search ends or is stopped.
+        """
+        root = root or self.current_path
+        text = self.search_bar.text().strip()
+        if not text:
+            text, ok = QInputDialog.getText(self, "Search in Files", f"Text to find in {root}:")
+            text = text.strip()
+            if not ok or not text:
+                return
         try:
-            source_root = self.file_model.index(self.current_path)
-            proxy_root = self.proxy_model.mapFromSource(source_root)
-            self.file_list.setRootIndex(proxy_root)
-        except Exception:
-            pass
+            pattern = compile_pattern(text)
+        except re.error as e:
+            self.status_bar.showMessage(f"❌ Invalid regular expression: {e}", 5000)
+            return
+        
+        self._stop_search()
+        self._show_search_dialog(f"'{text}' inside files in {root}", content=True)
+        self._content_search_id = self.content_search.start(root, pattern, self.scan_rules,
+                                                            self.CONTENT_SEARCH_LIMIT)
+
+    def _on_content_found(self, search_id: int, matches) -> None:
+        if search_id == self._content_search_id and self.search_dialog is not None:
+            self.search_dialog.add_matches(matches)
+
+    def _on_content_progress(self, search_id: int, files: int) -> None:
+        if search_id == self._content_search_id and self.search_dialog is not None:
+            self.search_dialog.set_status(
+                f"{self.search_dialog.count():,} match(es) · {files:,} files searched…", running=True)
+
+    def _on_content_finished(self, search_id: int, files: int, matches: int, cancelled: bool) -> None:
+        if search_id != self._content_search_id or self.search_dialog is None:
+            return
+        self._content_search_id = None
+        more = "+" if matches >= self.CONTENT_SEARCH_LIMIT else ""
+        self.search_dialog.set_status(f"{matches:,}{more} match(es) in {files:,} files")
+
+    def _show_search_dialog(self, title: str, content: bool = False):
+        """Open (or reuse) the results window, cleared for a new search"""
+        if self.search_dialog is None:
+            self.search_dialog = SearchResultsDialog(self)
+            self.search_dialog.open_requested.connect(self.reveal_path)
+            self.search_dialog.stop_requested.connect(self._stop_search)
+        self.search_dialog.start(title, content)
+        self.search_dialog.show()
+        self.search_dialog.raise_()
+
+    def _stop_search(self):
+        """Stop the name or content search shown in the results window"""
+        if self._content_search_id is None and self._index_search is None:
+            return
+        if self._content_search_id is not None:
+            self.content_search.cancel()
+        self._content_search_id = None
+        self._index_search = None
+        if self.search_dialog is not None:
+            self.search_dialog.set_status(f"{self.search_dialog.count():,} match(es) · stopped")
+
+    @staticmethod
+    def _same_tree(a: str, b: str) -> bool:
+        """True if one path is inside (or equal to) the other"""
+        try:
+            return os.path.commonpath([a, b]) in (a, b)
+        except ValueError:
+            return False
+
+    def reveal_path(self, path: str):
+        """Open a folder, or the folder containing a file"""
+        # An unresponsive path is navigated to as is; the loader reports it
+        self.navigate_to_path(path if self.probe.isdir(path) is not False else os.path.dirname(path))
 
     def open_item(self, index):
         """Open file or folder on double click"""
@@ -925,27 +1309,152 @@ class LiquidGlassFileExplorer(QMainWindow):
             self.status_bar.showMessage(f"✂️ Cut {len(paths)} item(s)")
 
     def paste_items(self):
-        """Paste items from clipboard"""
+        """Paste items from clipboard
+        
+        The copy or move runs as a background transfer job; further pastes
+        queue behind it and progress is shown in the status bar. If names
+        already exist here, one choice is asked for the whole batch.
+        """
         if not self.clipboard_path:
             return
-            
-        success_count = 0
-        for source_path in self.clipboard_path:
-            dest_path = os.path.join(self.current_path, os.path.basename(source_path))
-            
-            if self.clipboard_operation == 'copy':
-                if self.file_ops.copy_item(source_path, dest_path):
-                    success_count += 1
-            elif self.clipboard_operation == 'cut':
-                if self.file_ops.move_item(source_path, dest_path):
-                    success_count += 1
+        
+        operation = 'move' if self.clipboard_operation == 'cut' else 'copy'
+        count = len(self.clipboard_path)
+        policy = self.ask_conflict_policy(self.clipboard_path)
+        if policy is None:
+            return
+        self.transfers.submit(operation, list(self.clipboard_path), self.current_path, policy)
         
         if self.clipboard_operation == 'cut':
             self.clipboard_path = None
             self.clipboard_operation = None
-            
+        
+        self.status_bar.showMessage(f"📌 Pasting {count} item(s)…", 3000)
+
+    def ask_conflict_policy(self, sources):
+        """Return the conflict policy for pasting sources here, or None if cancelled
+        
+        Collisions are counted against the names already listed by the
+        model, so this does not touch the file system.
+        """
+        existing = set(self.file_model.names()) if self.file_model.rootPath() == self.current_path else set()
+        conflicts = sum(1 for source in sources
+                        if os.path.basename(source.rstrip('/\\')) in existing
+                        and os.path.dirname(os.path.abspath(source)) != os.path.abspath(self.current_path))
+        if not conflicts:
+            return KEEP_BOTH
+        
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Icon.Question)
+        box.setWindowTitle("Items already exist")
+        box.setText(f"{conflicts:,} of {len(sources):,} item(s) already exist in this folder.")
+        box.setInformativeText("What should happen to all of them?")
+        choices = [
+            (box.addButton("Keep Both", QMessageBox.ButtonRole.AcceptRole), KEEP_BOTH),
+            (box.addButton("Replace", QMessageBox.ButtonRole.DestructiveRole), OVERWRITE),
+            (box.addButton("Skip", QMessageBox.ButtonRole.ActionRole), SKIP),
+            (box.addButton("Keep Newer", QMessageBox.ButtonRole.ActionRole), KEEP_NEWER),
+        ]
+        box.addButton(QMessageBox.StandardButton.Cancel)
+        box.exec()
+        clicked = box.clickedButton()
+        return next((policy for button, policy in choices if button is clicked), None)
+
+    def toggle_transfer_pause(self):
+        """Pause or resume the running transfer"""
+        if self.transfers.is_paused():
+            self.transfers.resume()
+            self.transfer_pause_btn.setText("⏸")
+            self.transfer_pause_btn.setToolTip("Pause transfers")
+        else:
+            self.transfers.pause()
+            self.transfer_pause_btn.setText("▶")
+            self.transfer_pause_btn.setToolTip("Resume transfers")
+
+    def _on_transfer_progress(self, status: TransferStatus) -> None:
+        """Show progress, speed and ETA of the running transfer"""
+        verb = {'copy': "Copying", 'move': "Moving", 'rollback': "Rolling back",
+                'trash': "Moving to trash", 'delete': "Deleting"}.get(status.operation, "Moving")
+        deleting = status.operation in ('trash', 'delete')
+        rate = status.files_per_sec if deleting else status.bytes_per_sec
+        noun = "items" if status.operation == 'trash' else "files"
+        text = f"{verb} {status.files_done:,}/{status.files_total:,} {noun}"
+        if not deleting:
+            text += f" · {self.human_size(status.bytes_done)} of {self.human_size(status.bytes_total)}"
+        if status.state == 'paused':
+            text += " · paused"
+        elif rate > 0:
+            if not deleting:
+                text += f" · {self.human_size(int(status.bytes_per_sec))}/s"
+            text += f" · {status.files_per_sec:.0f} {noun}/s"
+            if status.eta is not None:
+                minutes, seconds = divmod(int(status.eta), 60)
+                text += f" · ETA {minutes}:{seconds:02d}"
+        if status.errors:
+            text += f" · ⚠️ {len(status.errors)}"
+        if status.queued:
+            text += f" (+{status.queued} queued)"
+        self.transfer_label.setText(text)
+        self.transfer_label.setToolTip(status.current)
+        if deleting and status.files_total:
+            self.transfer_progress.setValue(int(1000 * min(status.files_done, status.files_total) / status.files_total))
+        elif not deleting and status.bytes_total:
+            self.transfer_progress.setValue(int(1000 * status.bytes_done / status.bytes_total))
+        else:
+            self.transfer_progress.setValue(0)
+        for widget in (self.transfer_label, self.transfer_progress,
+                       self.transfer_pause_btn, self.transfer_cancel_btn):
+            widget.show()
+
+    def _on_transfer_finished(self, status: TransferStatus) -> None:
+        """Report a finished transfer job and refresh the view"""
+        if not self.transfers.has_active_jobs():
+            for widget in (self.transfer_label, self.transfer_progress,
+                           self.transfer_pause_btn, self.transfer_cancel_btn):
+                widget.hide()
+            self.transfer_pause_btn.setText("⏸")
+            if self.transfers.is_paused():
+                self.transfers.resume()
+        
         self.refresh_current()
-        self.status_bar.showMessage(f"📌 Pasted {success_count} item(s)")
+        icon = {'done': '📌', 'cancelled': '⛔'}.get(status.state, '⚠️')
+        if status.operation == 'trash':
+            summary = f"{status.files_done:,} item(s)"
+        else:
+            summary = f"{status.files_done:,} file(s), {self.human_size(status.bytes_done)}"
+        if status.skipped:
+            summary += f", {status.skipped:,} skipped"
+        self.status_bar.showMessage(
+            f"{icon} {status.operation.capitalize()} {status.state}: {summary}", 5000)
+        
+        if status.errors:
+            shown = "\n".join(f"{path}: {msg}" for path, msg in status.errors[:10])
+            more = f"\n… and {len(status.errors) - 10} more" if len(status.errors) > 10 else ""
+            QMessageBox.warning(self, "Transfer problems",
+                                f"{len(status.errors)} item(s) could not be transferred:\n\n{shown}{more}")
+        
+        if status.operation in ('move', 'rollback') and status.state != 'done':
+            self.check_interrupted_moves()
+
+    def check_interrupted_moves(self):
+        """Offer to resume or roll back cross-device moves that did not finish"""
+        if self._closing:
+            return
+        for journal in self.transfers.pending_moves():
+            box = QMessageBox(self)
+            box.setIcon(QMessageBox.Icon.Warning)
+            box.setWindowTitle("Interrupted move")
+            box.setText(f"Moving '{journal.source}' to '{journal.target}' did not finish.")
+            box.setInformativeText("Resume the move, or roll back and return the files that "
+                                   "were already moved to their original folder?")
+            resume_btn = box.addButton("Resume", QMessageBox.ButtonRole.AcceptRole)
+            rollback_btn = box.addButton("Roll Back", QMessageBox.ButtonRole.DestructiveRole)
+            box.addButton("Later", QMessageBox.ButtonRole.RejectRole)
+            box.exec()
+            if box.clickedButton() is resume_btn:
+                self.transfers.submit_recovery(journal, 'resume')
+            elif box.clickedButton() is rollback_btn:
+                self.transfers.submit_recovery(journal, 'rollback')
 
     # --------- Folder sizes (async compute and formatting) ---------
     def human_size(self, size: int) -> str:
@@ -1005,28 +1514,85 @@ class LiquidGlassFileExplorer(QMainWindow):
         except Exception:
             return self.human_size(size)
 
-    def request_folder_size(self, path: str, on_done: Callable | None = None) -> None:
-        """Compute folder size in a background thread, cache it, then refresh view."""
-        import threading
+    def request_folder_size(self, path: str, priority: int = PRIORITY_VISIBLE) -> None:
+        """Queue folder size computation on the worker pool; the result is cached and
+        delivered to the view through folder_size_ready. Excluded folders are not sized."""
+        if self.scan_rules.excludes_tree(path):
+            return
+        self.size_scheduler.submit(path, None, priority)
+
+    def _on_folder_size_result(self, path: str, size: FolderSize) -> None:
+        """Scheduler hook (worker thread): hand the result to the UI thread"""
+        self.folder_size_ready.emit(path, size)
+
+    def _queue_size_result(self, path: str, size: FolderSize) -> None:
+        """Collect results and update the view once per SIZE_BATCH_MS window"""
+        self._pending_sizes[path] = size
+        if not self._size_batch_timer.isActive():
+            self._size_batch_timer.start()
+
+    def _flush_size_results(self) -> None:
+        """Apply batched folder sizes as targeted dataChanged ranges on the Size column"""
+        sizes, self._pending_sizes = self._pending_sizes, {}
+        self.proxy_model.size_requested.difference_update(sizes)
+        if self.current_path in sizes:
+            # The current folder was revalidated: child totals may have changed too
+            self.refresh_size_keys()
+        self.file_model.update_folder_sizes(sizes)
+
+    def _compute_folder_size(self, path: str, is_cancelled: Callable[[], bool]) -> FolderSize | None:
+        """Size a folder and all its descendants (runs on a scheduler worker thread).
+
+        Folders already in the cache are revalidated incrementally: only
+        directories whose mtime changed are relisted, unknown subtrees get one
+        scandir pass. Mounted file systems are handled by their mount policy;
+        the result says whether it is exact, a lower bound or an estimate.
+        Whatever the scan exclusion rules match is left out.
+        Returns None if the job was cancelled so no partial total is cached.
+        """
+        result = revalidate_folder_sizes(path, self.data_manager.get_folder_size_node, is_cancelled,
+                                         self.mount_policies, self.scan_rules)
+        if result is None:
+            return None
+        nodes, removed = result
+        self.data_manager.store_folder_tree(path, nodes, removed)
+        node = nodes.get(path)
+        return FolderSize(node.total, node.partial) if node is not None else FolderSize(0)
+
+    def set_scan_exclusions(self, patterns) -> bool:
+        """Use new exclusion rules for folder sizes, search in files and indexing
+
+        Returns True if the rules changed (cached sizes were marked stale).
+        """
+        rules = ExclusionRules(patterns)
+        self.scan_rules = rules
+        self.indexer.set_rules(rules)
+        return self.data_manager.set_scan_exclusions(rules)
 
-        def _worker():
-            total = 0
-            try:
-                for root, dirs, files in os.walk(path):
-                    for f in files:
-                        fp = os.path.join(root, f)
-                        try:
-                            total += os.path.getsize(fp)
-                        except Exception:
-                            pass
-            except Exception:
-                pass
-            # Save to cache
-            self.data_manager.set_folder_size_cached(path, total)
-            # Refresh view back on UI thread
-            QTimer.singleShot(0, lambda: (on_done and on_done()))
+    def size_excluded(self, root: str = None):
+        """Measure what the scan exclusion rules leave out of a folder's size
+        
+        The folder is walked again and every excluded subtree is sized in
+        full on a background thread; the total is shown in the status bar.
+        """
+        root = root or self.current_path
+        rules = self.scan_rules
+
+        def run():
+            result = excluded_size(root, rules, lambda: self._closing, self.mount_policies)
+            self.excluded_size_ready.emit(root, result)
 
-        threading.Thread(target=_worker, daemon=True).start()
+        self.status_bar.showMessage(f"⏳ Sizing excluded items in {root}…")
+        threading.Thread(target=run, name='ExcludedSize', daemon=True).start()
+
+    def _on_excluded_size(self, root: str, result: ExcludedSize) -> None:
+        if result is None or self._closing:
+            return
+        text = self.human_size(result.total)
+        if result.partial != EXACT:
+            text = ("≈ " if result.partial == ESTIMATE else "≥ ") + text
+        logger.info(f"Excluded in {root}: {result.total:,} bytes in {result.items:,} item(s)")
+        self.status_bar.showMessage(f"🚫 Excluded in {root}: {text} in {result.items:,} item(s)", 10000)
 
     def rename_selected(self):
         """Rename selected item"""
@@ -1044,7 +1610,11 @@ class LiquidGlassFileExplorer(QMainWindow):
                     QMessageBox.warning(self, "Error", f"Could not rename '{old_name}'")
 
     def delete_selected(self):
-        """Delete selected items"""
+        """Move selected items to the trash
+        
+        All items go to one background job that trashes them in batches,
+        with progress in the status bar.
+        """
         paths = self.get_selected_paths()
         if not paths:
             return
@@ -1060,13 +1630,30 @@ class LiquidGlassFileExplorer(QMainWindow):
             if reply != QMessageBox.StandardButton.Yes:
                 return
         
-        success_count = 0
-        for path in paths:
-            if self.file_ops.delete_item(path):
-                success_count += 1
+        self.transfers.submit_trash(paths)
+        self.status_bar.showMessage(f"🗑️ Deleting {len(paths)} item(s)…", 3000)
+
+    def delete_selected_permanently(self):
+        """Delete selected items for good, in the background
         
-        self.refresh_current()
-        self.status_bar.showMessage(f"🗑️ Deleted {success_count} item(s)")
+        Always asks first, since nothing goes to the trash. Progress and
+        cancel use the transfer bar in the status bar.
+        """
+        paths = self.get_selected_paths()
+        if not paths:
+            return
+        
+        reply = QMessageBox.warning(
+            self, "Delete Permanently",
+            f"Permanently delete {len(paths)} item(s)? This cannot be undone.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        
+        self.transfers.submit_delete(paths)
+        self.status_bar.showMessage(f"❌ Deleting {len(paths)} item(s)…", 3000)
 
     def show_context_menu(self, position):
         """Show context menu"""
@@ -1086,7 +1673,7 @@ class LiquidGlassFileExplorer(QMainWindow):
             open_action.triggered.connect(lambda: self.open_item(index))
             
             # Add "Run" option for executables
-            if self.file_ops.is_executable(selected_path):
+            if self.file_ops.is_executable(selected_path, self.file_model.isDir(source_index)):
                 run_action = menu.addAction("▶️ Run")
                 run_action.triggered.connect(lambda checked=False, p=selected_path: self.run_file(p))
                 logger.info(f"Added 'Run' action for executable: {selected_path}")
@@ -1105,6 +1692,16 @@ class LiquidGlassFileExplorer(QMainWindow):
             delete_action = menu.addAction("🗑️ Delete")
             delete_action.triggered.connect(self.delete_selected)
             
+            purge_action = menu.addAction("❌ Delete Permanently")
+            purge_action.triggered.connect(self.delete_selected_permanently)
+            
+            if self.file_model.isDir(source_index):
+                grep_action = menu.addAction("🔎 Search in Files…")
+                grep_action.triggered.connect(lambda checked=False, p=selected_path: self.search_contents(p))
+                if self.scan_rules:
+                    excluded_action = menu.addAction("🚫 Size Excluded Items")
+                    excluded_action.triggered.connect(lambda checked=False, p=selected_path: self.size_excluded(p))
+            
             menu.addSeparator()
             
             # Add to favorites option - use lambda to pass the path
@@ -1150,6 +1747,13 @@ class LiquidGlassFileExplorer(QMainWindow):
         new_folder_action = menu.addAction("📁 New Folder")
         new_folder_action.triggered.connect(self.create_new_folder)
         
+        grep_here_action = menu.addAction("🔎 Search in Files Here…")
+        grep_here_action.triggered.connect(lambda: self.search_contents())
+        
+        if self.scan_rules:
+            excluded_here_action = menu.addAction("🚫 Size Excluded Items Here")
+            excluded_here_action.triggered.connect(lambda: self.size_excluded())
+        
         menu.addSeparator()
         cmd_action = menu.addAction("💻 Open in CMD")
         cmd_action.triggered.connect(self.open_in_cmd)
@@ -1160,15 +1764,16 @@ class LiquidGlassFileExplorer(QMainWindow):
         logger.info("Showing context menu")
         menu.exec(self.file_list.mapToGlobal(position))
 
-    def update_file_count(self):
-        """Update file count in status bar"""
-        try:
-            items = os.listdir(self.current_path)
-            files = sum(1 for item in items if os.path.isfile(os.path.join(self.current_path, item)))
-            folders = sum(1 for item in items if os.path.isdir(os.path.join(self.current_path, item)))
-            self.status_bar.showMessage(f"📁 {self.current_path} | 📄 {files} files | 📁 {folders} folders")
-        except:
-            pass
+    def update_file_count(self, counts: DirectoryCounts, partial: bool = False):
+        """Update file count in status bar (counts come from the directory loader's scandir pass)"""
+        more = "+" if partial else ""
+        message = (
+            f"📁 {self.current_path} | 📄 {counts.files}{more} files | "
+            f"📁 {counts.folders}{more} folders | 💾 {self.human_size(counts.size)}{more}"
+        )
+        if counts.hidden:
+            message += f" | 👻 {counts.hidden}{more} hidden"
+        self.status_bar.showMessage(message)
     
     def load_favorites(self):
         """Load favorites from data manager"""
@@ -1212,7 +1817,11 @@ class LiquidGlassFileExplorer(QMainWindow):
         logger.info(f"Normalized path: {path}")
         
         # Check if path exists
-        if not os.path.exists(path):
+        exists = self.probe.exists(path)
+        if exists is None:
+            self.status_bar.showMessage(f"⚠️ Not responding: {path}", 3000)
+            return
+        if not exists:
             logger.warning(f"Path does not exist: {path}")
             self.status_bar.showMessage(f"⚠️ Path does not exist: {os.path.basename(path)}", 3000)
             return
@@ -1258,19 +1867,25 @@ class LiquidGlassFileExplorer(QMainWindow):
         """Open a favorite - navigate if folder, execute/open if file"""
         logger.info(f"=== open_favorite called for: {path} ===")
         
-        if not os.path.exists(path):
+        try:
+            st = self.probe.stat(path)
+        except PathUnresponsive:
+            logger.warning(f"Favorite path is not responding: {path}")
+            self.status_bar.showMessage(f"⚠️ Not responding: {path}", 3000)
+            return
+        except (OSError, ValueError):
             logger.warning(f"Favorite path no longer exists: {path}")
             QMessageBox.warning(self, "Path Not Found", 
                               f"This path no longer exists:\n{path}\n\nWould you like to remove it from favorites?")
             return
         
-        if os.path.isdir(path):
+        if stat.S_ISDIR(st.st_mode):
             # Navigate to folder
             logger.info(f"Navigating to folder: {path}")
             self.navigate_to_path(path)
         else:
             # It's a file - check if executable
-            if self.file_ops.is_executable(path):
+            if self.file_ops.is_executable(path, False):
                 # Ask for confirmation before running
                 reply = QMessageBox.question(
                     self,
@@ -1370,9 +1985,22 @@ class LiquidGlassFileExplorer(QMainWindow):
         else:
             # Add each favorite as a widget
             for fav_path in sorted_favorites:
-                if os.path.exists(fav_path):
+                # A favorite on a mount that stopped answering is kept and marked, not removed
+                try:
+                    st = self.probe.stat(fav_path)
+                    responding = True
+                except PathUnresponsive:
+                    st = None
+                    responding = False
+                except (OSError, ValueError):
+                    st = None
+                    responding = True
+                if st is not None or not responding:
                     # Get proper icon using file_ops icon system
-                    icon = self.file_ops.get_file_icon(fav_path)
+                    if responding:
+                        icon = self.file_ops.get_file_icon(fav_path, stat.S_ISDIR(st.st_mode))
+                    else:
+                        icon = "⚠️"
                     
                     # Create horizontal layout for button and remove button
                     fav_widget = QWidget()
@@ -1383,7 +2011,7 @@ class LiquidGlassFileExplorer(QMainWindow):
                     
                     # Main favorite button
                     btn = QPushButton(f"{icon} {os.path.basename(fav_path)}")
-                    btn.setToolTip(fav_path)
+                    btn.setToolTip(fav_path if responding else f"{fav_path}\n(not responding)")
                     btn.setStyleSheet("""
                         QPushButton {
                             text-align: left;
@@ -1638,5 +2266,28 @@ class LiquidGlassFileExplorer(QMainWindow):
         except Exception as e:
             logger.error(f"Error running side apps on startup: {e}", exc_info=True)
 
+    def closeEvent(self, event):
+        """Stop background workers and flush pending data before the window closes"""
+        if self.transfers.has_active_jobs():
+            reply = QMessageBox.question(
+                self, "Transfers running",
+                "Copy or move operations are still running. Cancel them and close?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            if reply != QMessageBox.StandardButton.Yes:
+                event.ignore()
+                return
+        self._closing = True
+        try:
+            self.transfers.shutdown()
+            self.dir_loader.shutdown()
+            self.indexer.shutdown()
+            self.watcher.shutdown()
+            self.content_search.shutdown()
+            self.size_scheduler.shutdown()
+        except Exception as e:
+            logger.error(f"Error stopping background workers: {e}", exc_info=True)
+        self.data_manager.flush()
+        super().closeEvent(event)
+
 # Alias for easier import
 FileExplorer = LiquidGlassFileExplorer
\ No newline at end of file
@@ -0,0 +1,408 @@
+"""
+File Index for File Explorer
+SQLite-backed filename index with trigram full-text search
+"""
+
+import fnmatch
+import logging
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from scan_exclusions import ExclusionRules
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id     INTEGER PRIMARY KEY,
+    parent TEXT NOT NULL,
+    name   TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    size   INTEGER NOT NULL,
+    mtime  REAL NOT NULL,
+    UNIQUE (parent, name)
+);
+CREATE TABLE IF NOT EXISTS listed_dirs (
+    path   TEXT PRIMARY KEY,
+    mtime  REAL NOT NULL
+);
+"""
+
+# Needs SQLite with FTS5 and the trigram tokenizer (3.34+)
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entry_names USING fts5(
+    name, content='entries', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entry_names (rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entry_names (entry_names, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+"""
+
+# Trigram lookups need at least this many literal characters
+MIN_TRIGRAM = 3
+
+
+class IndexEntry(NamedTuple):
+    """One indexed file or folder"""
+    path: str
+    is_dir: bool
+    size: int
+    mtime: float
+
+
+class IndexQuery(NamedTuple):
+    """A parsed search: a literal for the trigram index and an optional exact matcher"""
+    literal: str                                  # Substring every match contains ('' = none known)
+    matches: Optional[Callable[[str], bool]]      # None: the literal match is exact
+
+
+def parse_query(text: str) -> IndexQuery:
+    """Turn search bar text into an IndexQuery
+
+    - "re:<pattern>" is a regular expression (searched, case-insensitive)
+    - text with *, ? or [ is a glob matched against the whole name
+    - anything else is a case-insensitive substring
+
+    Raises:
+        re.error: For an invalid regular expression
+    """
+    if text.startswith('re:'):
+        regex = re.compile(text[3:], re.IGNORECASE)
+        return IndexQuery(_regex_literal(text[3:]), lambda name: regex.search(name) is not None)
+    if any(c in text for c in '*?['):
+        pattern = text.casefold()
+        literal = max(re.split(r'\[[^\]]*\]?|[*?]', text), key=len)
+        return IndexQuery(literal, lambda name: fnmatch.fnmatchcase(name.casefold(), pattern))
+    if len(text) < MIN_TRIGRAM:
+        needle = text.casefold()
+        return IndexQuery('', lambda name: needle in name.casefold())
+    return IndexQuery(text, None)
+
+
+def _regex_literal(pattern: str) -> str:
+    """Longest run of plain characters that every match of pattern must contain
+
+    Conservative: returns '' for alternations and optional groups, and
+    ignores escapes and character classes.
+    """
+    if '|' in pattern or re.search(r'\)[?*{]', pattern):
+        return ''
+    runs, run, i = [], '', 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            runs.append(run)
+            run, i = '', i + 2
+            continue
+        if c == '[':
+            runs.append(run)
+            run = ''
+            end = pattern.find(']', i + 2)  # A ']' right after '[' is literal
+            i = len(pattern) if end < 0 else end + 1
+            continue
+        if (c.isalnum() or c in '_- ') and not (i + 1 < len(pattern) and pattern[i + 1] in '?*{'):
+            run += c
+        else:
+            runs.append(run)
+            run = ''
+        i += 1
+    runs.append(run)
+    return max(runs, key=len)
+
+
+class FileIndex:
+    """Persistent index of file and folder names below the indexed roots
+
+    - One row per entry (parent folder, name, type, size, mtime); a UNIQUE
+      (parent, name) index serves folder listings and subtree range scans.
+    - Names are mirrored into an FTS5 table with the trigram tokenizer, so
+      substring lookups over millions of names are index hits rather than
+      scans. Glob and regex queries use their longest literal the same way
+      and check candidates exactly. Where SQLite lacks FTS5 or the trigram
+      tokenizer, literals are matched with LIKE scans over the subtree
+      instead (slower, same results).
+    - listed_dirs keeps each folder's mtime when it was last listed, so a
+      re-crawl only re-lists folders whose contents changed.
+    - Each thread gets its own connection; writes are serialized with a lock.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+        self.fts = False  # Names are mirrored into the trigram index
+        try:
+            conn = self._conn()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Cannot open file index {db_path}: {e}")
+            return
+        self.fts = self._create_fts(conn)
+
+    @staticmethod
+    def _create_fts(conn: sqlite3.Connection) -> bool:
+        """Create the trigram name index; False (and no sync triggers) if SQLite cannot"""
+        try:
+            synced = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'entries_ai'").fetchone()
+            conn.executescript(_FTS_SCHEMA)
+            if synced is None:
+                # New, or entries were written while the triggers were missing
+                conn.execute("INSERT INTO entry_names (entry_names) VALUES ('rebuild')")
+            conn.commit()
+            return True
+        except sqlite3.Error as e:
+            logger.warning(f"Trigram index unavailable ({e}); index search scans names instead")
+            try:
+                # Triggers left from a build with FTS5 would make every insert fail
+                conn.executescript("DROP TRIGGER IF EXISTS entries_ai; DROP TRIGGER IF EXISTS entries_ad;")
+            except sqlite3.Error:
+                pass
+            return False
+
+    def _conn(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _scope(root: str) -> Tuple[str, str, str]:
+        """(root, lower, upper) bounds of every parent path inside root"""
+        root = root.rstrip('/\\') or os.sep
+        prefix = root if root.endswith(os.sep) else root + os.sep
+        return root, prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+    # ==================== QUERIES ====================
+
+    def search(self, root: str, query: IndexQuery, limit: int = 1000,
+               cancel: Optional[threading.Event] = None) -> List[IndexEntry]:
+        """Return up to limit entries below root whose name matches query"""
+        scope = self._scope(root)
+        where = "(e.parent = ? OR (e.parent >= ? AND e.parent < ?))"
+        matches = query.matches
+        if matches is None and not self.fts:
+            needle = query.literal.casefold()  # The literal is the whole query: check it here
+            matches = lambda name: needle in name.casefold()
+        try:
+            conn = self._conn()
+            if len(query.literal) >= MIN_TRIGRAM and self.fts:
+                phrase = '"' + query.literal.replace('"', '""') + '"'
+                rows = conn.execute(
+                    "SELECT e.parent, e.name, e.is_dir, e.size, e.mtime "
+                    "FROM entry_names JOIN entries e ON e.id = entry_names.rowid "
+                    f"WHERE entry_names MATCH ? AND {where}",
+                    (phrase,) + scope,
+                )
+            elif query.literal.isascii() and query.literal:
+                # No trigram index: filter the subtree's rows with LIKE (ASCII case-insensitive)
+                like = '%' + re.sub(r'([%_\\])', r'\\\1', query.literal) + '%'
+                rows = conn.execute(
+                    "SELECT e.parent, e.name, e.is_dir, e.size, e.mtime FROM entries e "
+                    f"WHERE e.name LIKE ? ESCAPE '\\' AND {where}",
+                    (like,) + scope,
+                )
+            else:
+                # No usable literal: walk the subtree's rows in index order
+                rows = conn.execute(
+                    f"SELECT e.parent, e.name, e.is_dir, e.size, e.mtime FROM entries e WHERE {where}",
+                    scope,
+                )
+            results = []
+            for n, (parent, name, is_dir, size, mtime) in enumerate(rows):
+                if cancel is not None and n % 4096 == 0 and cancel.is_set():
+                    break
+                if matches is not None and not matches(name):
+                    continue
+                results.append(IndexEntry(os.path.join(parent, name), bool(is_dir), int(size), float(mtime)))
+                if len(results) >= limit:
+                    break
+            return results
+        except sqlite3.Error as e:
+            logger.error(f"Index search under {root} failed: {e}")
+            return []
+
+    def count(self, root: Optional[str] = None) -> int:
+        """Number of indexed entries (below root, if given)"""
+        try:
+            if root is None:
+                return int(self._conn().execute("SELECT COUNT(*) FROM entries").fetchone()[0])
+            return int(self._conn().execute(
+                "SELECT COUNT(*) FROM entries WHERE parent = ? OR (parent >= ? AND parent < ?)",
+                self._scope(root),
+            ).fetchone()[0])
+        except sqlite3.Error:
+            return 0
+
+    def listed_dirs(self, root: str) -> Dict[str, float]:
+        """{folder: mtime when listed} for root and every indexed folder below it"""
+        root, lower, upper = self._scope(root)
+        try:
+            return dict(self._conn().execute(
+                "SELECT path, mtime FROM listed_dirs WHERE path = ? OR (path >= ? AND path < ?)",
+                (root, lower, upper),
+            ))
+        except sqlite3.Error as e:
+            logger.error(f"Index lookup under {root} failed: {e}")
+            return {}
+
+    def child_dirs(self, root: str) -> Dict[str, List[str]]:
+        """{folder: [subfolder names]} for root and every indexed folder below it"""
+        children: Dict[str, List[str]] = {}
+        try:
+            for parent, name in self._conn().execute(
+                "SELECT parent, name FROM entries "
+                "WHERE is_dir = 1 AND (parent = ? OR (parent >= ? AND parent < ?))",
+                self._scope(root),
+            ):
+                children.setdefault(parent, []).append(name)
+        except sqlite3.Error as e:
+            logger.error(f"Index lookup under {root} failed: {e}")
+        return children
+
+    def listing(self, folder: str) -> Dict[str, Tuple[bool, int, float]]:
+        """{name: (is_dir, size, mtime)} of the indexed entries of one folder"""
+        try:
+            return {
+                name: (bool(is_dir), int(size), float(mtime))
+                for name, is_dir, size, mtime in self._conn().execute(
+                    "SELECT name, is_dir, size, mtime FROM entries WHERE parent = ?", (folder,)
+                )
+            }
+        except sqlite3.Error as e:
+            logger.error(f"Index lookup of {folder} failed: {e}")
+            return {}
+
+    # ==================== WRITES ====================
+
+    def apply(self, changes: List['FolderChange']) -> bool:
+        """Write a batch of re-listed folders in one transaction"""
+        with self._write_lock:
+            conn = self._conn()
+            try:
+                with conn:
+                    for change in changes:
+                        if change.removed:
+                            conn.executemany(
+                                "DELETE FROM entries WHERE parent = ? AND name = ?",
+                                [(change.folder, name) for name in change.removed],
+                            )
+                        for name in change.removed_dirs:
+                            self._delete_subtree(conn, os.path.join(change.folder, name))
+                        if change.upserts:
+                            conn.executemany(
+                                "INSERT INTO entries (parent, name, is_dir, size, mtime) VALUES (?, ?, ?, ?, ?) "
+                                "ON CONFLICT(parent, name) DO UPDATE SET is_dir = excluded.is_dir, "
+                                "size = excluded.size, mtime = excluded.mtime",
+                                [(change.folder,) + row for row in change.upserts],
+                            )
+                        conn.execute(
+                            "INSERT INTO listed_dirs (path, mtime) VALUES (?, ?) "
+                            "ON CONFLICT(path) DO UPDATE SET mtime = excluded.mtime",
+                            (change.folder, change.mtime),
+                        )
+                return True
+            except sqlite3.Error as e:
+                logger.error(f"Error writing file index: {e}", exc_info=True)
+                return False
+
+    def remove_tree(self, path: str) -> bool:
+        """Forget a folder and everything below it (it no longer exists)"""
+        with self._write_lock:
+            try:
+                with self._conn() as conn:
+                    conn.execute("DELETE FROM entries WHERE parent = ? AND name = ?",
+                                 (os.path.dirname(path), os.path.basename(path)))
+                    self._delete_subtree(conn, path)
+                return True
+            except sqlite3.Error as e:
+                logger.error(f"Error removing {path} from the file index: {e}")
+                return False
+
+    def forget_listings(self) -> bool:
+        """Make the next crawl re-list every folder (entries stay searchable until then)"""
+        with self._write_lock:
+            try:
+                with self._conn() as conn:
+                    conn.execute("DELETE FROM listed_dirs")
+                return True
+            except sqlite3.Error as e:
+                logger.error(f"Error resetting the file index listings: {e}")
+                return False
+
+    def clear(self) -> bool:
+        """Remove every indexed entry"""
+        with self._write_lock:
+            try:
+                with self._conn() as conn:
+                    conn.execute("DELETE FROM entries")
+                    conn.execute("DELETE FROM listed_dirs")
+                return True
+            except sqlite3.Error as e:
+                logger.error(f"Error clearing the file index: {e}")
+                return False
+
+    def _delete_subtree(self, conn: sqlite3.Connection, path: str) -> None:
+        """Delete everything below a folder using range scans on the parent index"""
+        root, lower, upper = self._scope(path)
+        conn.execute("DELETE FROM entries WHERE parent = ? OR (parent >= ? AND parent < ?)",
+                     (root, lower, upper))
+        conn.execute("DELETE FROM listed_dirs WHERE path = ? OR (path >= ? AND path < ?)",
+                     (root, lower, upper))
+
+
+class FolderChange(NamedTuple):
+    """Differences found when re-listing one folder"""
+    folder: str
+    mtime: float                                   # Folder mtime at listing time
+    upserts: List[Tuple[str, int, int, float]]     # (name, is_dir, size, mtime) new or changed
+    removed: List[str]                             # Names that disappeared
+    removed_dirs: Set[str]                         # ...of which folders (subtrees to drop)
+
+
+def diff_folder(folder: str, mtime: float,
+                entries: Iterator[os.DirEntry],
+                known: Dict[str, Tuple[bool, int, float]],
+                rules: Optional[ExclusionRules] = None) -> Tuple[FolderChange, List[str]]:
+    """Compare a fresh listing with the indexed one
+
+    Entries matched by rules are treated as absent, so indexed ones are
+    dropped together with their subtrees.
+
+    Returns:
+        (FolderChange, paths of the folder's subfolders, symlinks excluded)
+    """
+    upserts, subdirs, seen = [], [], set()
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if rules and rules.excludes(entry.path, is_dir, entry.name):
+                continue
+            st = entry.stat(follow_symlinks=False)
+        except OSError:
+            continue
+        seen.add(entry.name)
+        if is_dir:
+            subdirs.append(entry.path)
+        row = (is_dir, 0 if is_dir else st.st_size, st.st_mtime)
+        if known.get(entry.name) != row:
+            upserts.append((entry.name, int(is_dir), row[1], row[2]))
+    removed = [name for name in known if name not in seen]
+    removed_dirs = {name for name in removed if known[name][0]}
+    # A folder replaced by a file (or back) keeps its row but loses its subtree
+    removed_dirs.update(name for name, is_dir, _, _ in upserts
+                        if name in known and known[name][0] and not is_dir)
+    return FolderChange(folder, mtime, upserts, removed, removed_dirs), subdirs
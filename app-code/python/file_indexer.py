@@ -0,0 +1,184 @@
+"""
+File Indexer for File Explorer
+Background crawler that keeps the filename index up to date, and index searches
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from file_index import FileIndex, FolderChange, IndexQuery, diff_folder
+from scan_exclusions import ExclusionRules
+
+logger = logging.getLogger(__name__)
+
+
+class FileIndexer(QObject):
+    """Crawl roots into a FileIndex and answer searches off the UI thread
+
+    A crawl walks the tree from the folders already in the index: a folder
+    whose mtime still equals the one recorded when it was last listed is
+    not listed again (its subfolders are taken from the index), so a
+    re-crawl of an unchanged tree costs one stat per folder. Changed
+    folders are listed, diffed against their indexed rows and written in
+    batches of WRITE_BATCH folders. Symlinked folders, other devices and
+    whatever the exclusion rules match are not entered.
+
+    Crawls run one at a time on a worker thread; searches run on their own
+    thread so they are answered while a crawl is in progress. Results come
+    back through queued signals.
+    """
+
+    # root, folders visited so far
+    crawl_progress = pyqtSignal(str, int)
+    # root, entries indexed below it
+    crawl_finished = pyqtSignal(str, int)
+    # search id, root, List[IndexEntry]
+    search_finished = pyqtSignal(int, str, object)
+
+    WRITE_BATCH = 500        # Re-listed folders per transaction
+    PROGRESS_INTERVAL = 0.5  # Seconds between crawl_progress signals
+
+    def __init__(self, index: FileIndex, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.index = index
+        self.rules = ExclusionRules()
+        self._crawl_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='FileIndexer')
+        self._search_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='IndexSearch')
+        self._lock = threading.Lock()
+        self._queued: set = set()   # Roots waiting to be crawled
+        self._stop = threading.Event()
+        self._search_cancel: Optional[threading.Event] = None
+        self._next_search = 1
+
+    # ==================== PUBLIC API ====================
+
+    def crawl(self, roots: Iterable[str]) -> None:
+        """Queue (re-)indexing of roots; roots already waiting are not queued twice"""
+        for root in roots:
+            root = os.path.abspath(root)
+            with self._lock:
+                if root in self._queued:
+                    continue
+                self._queued.add(root)
+            self._crawl_executor.submit(self._run_crawl, root)
+
+    def set_rules(self, rules: ExclusionRules) -> None:
+        """Exclude what rules match from later crawls
+
+        Folders already indexed are only re-listed when they change; call
+        FileIndex.forget_listings when the rules change to re-list them all.
+        """
+        self.rules = rules
+
+    def search(self, root: str, query: IndexQuery, limit: int = 1000) -> int:
+        """Search the index below root; returns the id passed to search_finished
+
+        Starting a search cancels the previous one.
+        """
+        cancel = threading.Event()
+        with self._lock:
+            if self._search_cancel is not None:
+                self._search_cancel.set()
+            self._search_cancel = cancel
+            search_id = self._next_search
+            self._next_search += 1
+        self._search_executor.submit(self._run_search, search_id, os.path.abspath(root), query, limit, cancel)
+        return search_id
+
+    def shutdown(self) -> None:
+        """Stop crawling and searching"""
+        self._stop.set()
+        with self._lock:
+            if self._search_cancel is not None:
+                self._search_cancel.set()
+        self._crawl_executor.shutdown(wait=False, cancel_futures=True)
+        self._search_executor.shutdown(wait=False, cancel_futures=True)
+
+    # ==================== WORKERS ====================
+
+    def _run_search(self, search_id: int, root: str, query: IndexQuery, limit: int,
+                    cancel: threading.Event) -> None:
+        if cancel.is_set():
+            return
+        t0 = time.perf_counter()
+        results = self.index.search(root, query, limit, cancel)
+        if cancel.is_set():
+            return
+        logger.debug(f"Index search {search_id} under {root}: {len(results)} result(s) "
+                     f"in {(time.perf_counter() - t0) * 1000:.0f} ms")
+        self.search_finished.emit(search_id, root, results)
+
+    def _run_crawl(self, root: str) -> None:
+        with self._lock:
+            self._queued.discard(root)
+        try:
+            t0 = time.perf_counter()
+            listed, visited = self._crawl(root)
+            if self._stop.is_set():
+                return
+            total = self.index.count(root)
+            logger.info(f"Indexed {root}: {total:,} entries, {listed:,}/{visited:,} folders re-listed "
+                        f"in {time.perf_counter() - t0:.1f}s")
+            self.crawl_finished.emit(root, total)
+        except Exception as e:
+            logger.error(f"Indexing {root} failed: {e}", exc_info=True)
+
+    def _crawl(self, root: str):
+        """Walk root, re-listing changed folders; returns (folders listed, folders visited)"""
+        listed_mtimes = self.index.listed_dirs(root)
+        known_children = self.index.child_dirs(root)
+        try:
+            root_dev = os.stat(root).st_dev
+        except OSError:
+            self.index.remove_tree(root)
+            return 0, 0
+
+        pending: List[FolderChange] = []
+        stack = [root]
+        listed = visited = 0
+        last_progress = time.monotonic()
+        while stack:
+            if self._stop.is_set():
+                return listed, visited
+            folder = stack.pop()
+            visited += 1
+            try:
+                st = os.stat(folder, follow_symlinks=False)
+            except OSError:
+                self.index.remove_tree(folder)
+                continue
+            if st.st_dev != root_dev:
+                continue
+
+            if listed_mtimes.get(folder) == st.st_mtime:
+                # Unchanged listing: trust the indexed subfolders
+                stack.extend(os.path.join(folder, name) for name in known_children.get(folder, ()))
+            else:
+                try:
+                    with os.scandir(folder) as it:
+                        change, subdirs = diff_folder(folder, st.st_mtime, it, self.index.listing(folder),
+                                                      self.rules)
+                except OSError as e:
+                    logger.debug(f"Cannot index {folder}: {e}")
+                    continue
+                listed += 1
+                stack.extend(subdirs)
+                pending.append(change)
+                if len(pending) >= self.WRITE_BATCH:
+                    self.index.apply(pending)
+                    pending = []
+
+            now = time.monotonic()
+            if now - last_progress >= self.PROGRESS_INTERVAL:
+                last_progress = now
+                self.crawl_progress.emit(root, visited)
+
+        if pending:
+            self.index.apply(pending)
+        return listed, visited
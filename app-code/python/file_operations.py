@@ -1,16 +1,59 @@
+import errno
 import os
+import queue
 import shutil
+import stat
 import subprocess
 import platform
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from send2trash import send2trash
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Callable, List, Optional, Tuple
+from folder_size_engine import folder_size
+from mount_policy import MountPolicies
+from move_engine import MoveEngine
+from delete_engine import DeleteEngine
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Bytes per read/write in the userspace copy loop
+COPY_CHUNK_SIZE = 1024 * 1024
+# Bytes per copy_file_range/sendfile call (also the progress/cancel granularity)
+KERNEL_CHUNK_SIZE = 8 * 1024 * 1024
+# Files up to this size are copied on the tree-copy thread pool
+SMALL_FILE_LIMIT = 1024 * 1024
+# Tree-copy threads; the work is I/O latency bound, so this does not track CPU count
+TREE_COPY_WORKERS = 16
+# ioctl that shares a file's extents with another file (btrfs, xfs, ...)
+FICLONE = 0x40049409
+# Errors meaning "this copy method is not supported here", so try the next one
+_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+                errno.ENOTTY, errno.EBADF, errno.EPERM, errno.ENOTSUP}
+
+
+def _special_file_error(path: str, mode: int) -> shutil.SpecialFileError:
+    """Error for a non-regular file (reading a FIFO or device would block or never end)"""
+    if stat.S_ISFIFO(mode):
+        kind = "a named pipe"
+    elif stat.S_ISSOCK(mode):
+        kind = "a socket"
+    elif stat.S_ISCHR(mode) or stat.S_ISBLK(mode):
+        kind = "a device node"
+    else:
+        kind = "not a regular file"
+    return shutil.SpecialFileError(f"`{path}` is {kind}")
 
 class FileOperations:
     """Handle all file system operations"""
     
     def __init__(self):
         self.system = platform.system()
+        # Keeps get_file_size from crawling into network and pseudo file systems
+        self.mount_policies = MountPolicies()
     
     def open_file(self, path):
         """Open file with default application"""
@@ -38,26 +81,13 @@ class FileOperations:
     def copy_item(self, source, destination):
         """Copy file or folder"""
         try:
+            destination = self.copy_destination(destination)
             if os.path.isfile(source):
-                # Handle file name conflicts
-                if os.path.exists(destination):
-                    base, ext = os.path.splitext(destination)
-                    counter = 1
-                    while os.path.exists(f"{base} - Copy{f' ({counter})' if counter > 1 else ''}{ext}"):
-                        counter += 1
-                    destination = f"{base} - Copy{f' ({counter})' if counter > 1 else ''}{ext}"
-                
-                shutil.copy2(source, destination)
+                self.copy_file(source, destination)
             elif os.path.isdir(source):
-                # Handle folder name conflicts
-                if os.path.exists(destination):
-                    counter = 1
-                    base_dest = destination
-                    while os.path.exists(f"{base_dest} - Copy{f' ({counter})' if counter > 1 else ''}"):
-                        counter += 1
-                    destination = f"{base_dest} - Copy{f' ({counter})' if counter > 1 else ''}"
-                
-                shutil.copytree(source, destination)
+                errors = self.copy_tree(source, destination)
+                if errors:
+                    raise shutil.Error(errors)
             return True
         except Exception as e:
             print(f"Error copying item: {e}")
@@ -66,20 +96,341 @@ class FileOperations:
     def move_item(self, source, destination):
         """Move file or folder"""
         try:
-            # Handle name conflicts
-            if os.path.exists(destination):
-                base, ext = os.path.splitext(destination)
-                counter = 1
-                while os.path.exists(f"{base} ({counter}){ext}"):
-                    counter += 1
-                destination = f"{base} ({counter}){ext}"
-            
-            shutil.move(source, destination)
+            destination = self.move_destination(destination)
+            MoveEngine(self).move(source, destination)
             return True
         except Exception as e:
             print(f"Error moving item: {e}")
             return False
     
+    def copy_destination(self, destination):
+        """Return destination, or 'name - Copy (n)' if it already exists"""
+        if not os.path.exists(destination):
+            return destination
+        if os.path.isdir(destination):
+            base, ext = destination, ''
+        else:
+            base, ext = os.path.splitext(destination)
+        counter = 1
+        while os.path.exists(f"{base} - Copy{f' ({counter})' if counter > 1 else ''}{ext}"):
+            counter += 1
+        return f"{base} - Copy{f' ({counter})' if counter > 1 else ''}{ext}"
+    
+    def move_destination(self, destination):
+        """Return destination, or 'name (n)' if it already exists"""
+        if not os.path.exists(destination):
+            return destination
+        base, ext = os.path.splitext(destination)
+        counter = 1
+        while os.path.exists(f"{base} ({counter}){ext}"):
+            counter += 1
+        return f"{base} ({counter}){ext}"
+    
+    def copy_file(self, source, destination, progress: Optional[Callable[[int], None]] = None):
+        """Copy one file's data and metadata, reporting each written chunk
+        
+        The fastest method the platform offers is used: a reflink clone
+        (FICLONE) where the file system supports it, otherwise in-kernel
+        copy_file_range or sendfile, otherwise a read/write loop. Sparse
+        files keep their holes, other destinations are preallocated.
+        
+        progress(nbytes) is called after every chunk and may raise to abort;
+        the partial destination is removed in that case. An existing
+        destination is left alone if the source cannot be opened.
+        
+        Raises:
+            shutil.SpecialFileError: source is a FIFO, socket or device node
+        """
+        binary = getattr(os, 'O_BINARY', 0)
+        created = False  # Only a destination this call opened (and truncated) is removed on failure
+        try:
+            # O_NONBLOCK: opening a FIFO must not wait for a writer
+            src = os.open(source, os.O_RDONLY | binary | getattr(os, 'O_NONBLOCK', 0))
+            try:
+                st = os.fstat(src)
+                if not stat.S_ISREG(st.st_mode):
+                    raise _special_file_error(source, st.st_mode)
+                if fcntl is not None:
+                    fcntl.fcntl(src, fcntl.F_SETFL, fcntl.fcntl(src, fcntl.F_GETFL) & ~os.O_NONBLOCK)
+                dst = os.open(destination, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | binary, 0o666)
+                created = True
+                try:
+                    if st.st_size and self._clone_file(src, dst):
+                        if progress is not None:
+                            progress(st.st_size)
+                    else:
+                        self._copy_data(src, dst, st, progress)
+                finally:
+                    os.close(dst)
+            finally:
+                os.close(src)
+            shutil.copystat(source, destination)
+            return destination
+        except BaseException:
+            if created:
+                try:
+                    os.remove(destination)
+                except OSError:
+                    pass
+            raise
+    
+    def copy_tree(self, source, destination,
+                  progress: Optional[Callable[[int], None]] = None,
+                  on_file: Optional[Callable[[str], None]] = None,
+                  max_workers: Optional[int] = None) -> List[Tuple[str, str]]:
+        """Copy a folder tree, many small files at a time
+        
+        Copying lots of tiny files is bound by per-file latency (open, stat,
+        copystat), so after creating the whole folder skeleton, files up to
+        SMALL_FILE_LIMIT are copied on a thread pool while larger files are
+        streamed one at a time on the calling thread. Folder metadata is
+        applied last, children before parents.
+        
+        progress(nbytes) and on_file(source_path) are always called on the
+        calling thread and may raise to abort; per-file OSErrors are collected.
+        
+        Returns:
+            List of (path, error message) for entries that could not be copied
+        """
+        errors: List[Tuple[str, str]] = []
+        dirs, small, large = self._plan_tree(source, destination, errors)
+        for src_dir, dst_dir in dirs:
+            try:
+                os.makedirs(dst_dir, exist_ok=True)
+            except OSError as e:
+                errors.append((src_dir, str(e)))
+        
+        workers = max_workers or TREE_COPY_WORKERS
+        window = workers * 4  # Bounded queue, so pausing the caller soon idles the pool
+        results: "queue.Queue[Tuple[str, int, Optional[Exception]]]" = queue.Queue()
+        stop = threading.Event()
+        pending = iter(small)
+        inflight = 0
+        
+        def copy_small(src, dst, size):
+            if stop.is_set():
+                results.put((src, 0, None))
+                return
+            try:
+                self.copy_file(src, dst)
+                results.put((src, size, None))
+            except Exception as e:
+                results.put((src, 0, e))
+        
+        def report(block: bool) -> None:
+            nonlocal inflight
+            while inflight:
+                try:
+                    src, nbytes, err = results.get(block=block)
+                except queue.Empty:
+                    return
+                inflight -= 1
+                if err is not None:
+                    errors.append((src, str(err)))
+                else:
+                    if progress is not None and nbytes:
+                        progress(nbytes)
+                    if on_file is not None:
+                        on_file(src)
+                if block:
+                    return
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='TreeCopy') as pool:
+            def top_up() -> bool:
+                nonlocal inflight
+                while inflight < window:
+                    item = next(pending, None)
+                    if item is None:
+                        return False
+                    pool.submit(copy_small, *item)
+                    inflight += 1
+                return True
+            
+            def on_chunk(nbytes: int) -> None:
+                if progress is not None:
+                    progress(nbytes)
+                report(block=False)
+                top_up()
+            
+            try:
+                more = top_up()
+                for src, dst in large:
+                    try:
+                        self.copy_file(src, dst, on_chunk)
+                    except OSError as e:
+                        errors.append((src, str(e)))
+                        continue
+                    if on_file is not None:
+                        on_file(src)
+                while inflight or more:
+                    more = top_up()
+                    report(block=True)
+            finally:
+                stop.set()
+        
+        for src_dir, dst_dir in reversed(dirs):
+            try:
+                shutil.copystat(src_dir, dst_dir)
+            except OSError:
+                pass
+        return errors
+    
+    def _plan_tree(self, source, destination, errors: List[Tuple[str, str]]):
+        """List a tree once: (folders pre-order, small files, large files)
+        
+        FIFOs, sockets and device nodes are not copied; each is recorded in errors.
+        """
+        dirs = []
+        small = []
+        large = []
+        stack = [(source, destination)]
+        while stack:
+            src_dir, dst_dir = stack.pop()
+            dirs.append((src_dir, dst_dir))
+            try:
+                with os.scandir(src_dir) as it:
+                    for entry in it:
+                        dst = os.path.join(dst_dir, entry.name)
+                        try:
+                            if entry.is_dir():
+                                stack.append((entry.path, dst))
+                                continue
+                            st = entry.stat()
+                            if not stat.S_ISREG(st.st_mode):
+                                raise _special_file_error(entry.path, st.st_mode)
+                            size = st.st_size
+                        except OSError as e:
+                            errors.append((entry.path, str(e)))
+                            continue
+                        if size <= SMALL_FILE_LIMIT:
+                            small.append((entry.path, dst, size))
+                        else:
+                            large.append((entry.path, dst))
+            except OSError as e:
+                errors.append((src_dir, str(e)))
+        return dirs, small, large
+    
+    def _clone_file(self, src: int, dst: int) -> bool:
+        """Share the source's extents with dst (copy-on-write); False if unsupported"""
+        if fcntl is None or self.system != "Linux":
+            return False
+        try:
+            fcntl.ioctl(dst, FICLONE, src)
+            return True
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED:
+                raise
+            return False
+    
+    def _copy_data(self, src: int, dst: int, st: os.stat_result,
+                   progress: Optional[Callable[[int], None]]) -> None:
+        """Copy file contents between descriptors, keeping holes of sparse files"""
+        size = st.st_size
+        if size == 0:
+            # Pseudo files (procfs, ...) report 0 bytes but may still have data
+            self._copy_range_userspace(src, dst, 0, None, progress)
+            return
+        
+        blocks = getattr(st, 'st_blocks', None)
+        sparse = hasattr(os, 'SEEK_DATA') and blocks is not None and blocks * 512 < size
+        ranges = self._data_ranges(src, size) if sparse else [(0, size)]
+        large = size > SMALL_FILE_LIMIT  # Hints only pay off for big files
+        if large and not sparse and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(dst, 0, size)  # Fewer fragments, early ENOSPC
+            except OSError:
+                pass
+        if large and hasattr(os, 'posix_fadvise'):
+            try:
+                os.posix_fadvise(src, 0, 0, os.POSIX_FADV_SEQUENTIAL)  # Aggressive readahead
+            except OSError:
+                pass
+        
+        method = 'copy_file_range' if hasattr(os, 'copy_file_range') else \
+                 'sendfile' if hasattr(os, 'sendfile') and self.system == "Linux" else 'userspace'
+        copied = 0
+        for start, end in ranges:
+            method, copied = self._copy_range(src, dst, start, end, progress, method)
+        if sparse:
+            os.ftruncate(dst, size)  # Recreate a trailing hole
+        elif copied < size:
+            os.ftruncate(dst, copied)  # Source shrank; drop the preallocated tail
+    
+    def _data_ranges(self, src: int, size: int) -> List[Tuple[int, int]]:
+        """Return the (start, end) byte ranges of src that hold data (SEEK_DATA/SEEK_HOLE)"""
+        ranges = []
+        offset = 0
+        try:
+            while offset < size:
+                try:
+                    start = os.lseek(src, offset, os.SEEK_DATA)
+                except OSError as e:
+                    if e.errno == errno.ENXIO:  # Only a hole is left
+                        break
+                    raise
+                end = min(os.lseek(src, start, os.SEEK_HOLE), size)
+                ranges.append((start, end))
+                offset = end
+        except OSError:
+            return [(0, size)]  # File system without hole reporting
+        return ranges
+    
+    def _copy_range(self, src: int, dst: int, start: int, end: int,
+                    progress: Optional[Callable[[int], None]], method: str) -> Tuple[str, int]:
+        """Copy bytes [start, end) to the same offsets
+        
+        Returns the method that worked and the offset reached.
+        
+        Falls back from copy_file_range to sendfile to read/write when the
+        kernel or file system refuses a method before any byte was copied.
+        """
+        offset = start
+        while offset < end:
+            count = min(KERNEL_CHUNK_SIZE, end - offset)
+            try:
+                if method == 'copy_file_range':
+                    n = os.copy_file_range(src, dst, count, offset, offset)
+                elif method == 'sendfile':
+                    os.lseek(dst, offset, os.SEEK_SET)
+                    n = os.sendfile(dst, src, offset, count)
+                else:
+                    return 'userspace', self._copy_range_userspace(src, dst, offset, end, progress)
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED or offset != start:
+                    raise
+                method = 'sendfile' if method == 'copy_file_range' and hasattr(os, 'sendfile') \
+                    and self.system == "Linux" else 'userspace'
+                continue
+            if n == 0:
+                if offset == start:
+                    # Some file systems report success without copying
+                    return 'userspace', self._copy_range_userspace(src, dst, offset, end, progress)
+                break  # Source shrank
+            offset += n
+            if progress is not None:
+                progress(n)
+        return method, offset
+    
+    def _copy_range_userspace(self, src: int, dst: int, start: int, end: Optional[int],
+                              progress: Optional[Callable[[int], None]]) -> int:
+        """Plain read/write copy of [start, end) (to EOF if end is None); returns the end offset"""
+        os.lseek(src, start, os.SEEK_SET)
+        os.lseek(dst, start, os.SEEK_SET)
+        offset = start
+        while end is None or offset < end:
+            count = COPY_CHUNK_SIZE if end is None else min(COPY_CHUNK_SIZE, end - offset)
+            buf = os.read(src, count)
+            if not buf:
+                break
+            view = memoryview(buf)
+            while view:
+                written = os.write(dst, view)
+                view = view[written:]
+            offset += len(buf)
+            if progress is not None:
+                progress(len(buf))
+        return offset
+    
     def rename_item(self, old_path, new_path):
         """Rename file or folder"""
         try:
@@ -98,30 +449,29 @@ class FileOperations:
             print(f"Error deleting item: {e}")
             # Fallback to permanent deletion
             try:
-                if os.path.isfile(path):
-                    os.remove(path)
-                elif os.path.isdir(path):
-                    shutil.rmtree(path)
+                errors = self.delete_permanently(path)
+                if errors:
+                    raise shutil.Error(errors)
                 return True
             except Exception as e2:
                 print(f"Error with permanent deletion: {e2}")
                 return False
     
+    def delete_permanently(self, path, progress: Optional[Callable[[int], None]] = None) -> List[Tuple[str, str]]:
+        """Remove a file or folder tree for good (parallel, see DeleteEngine)
+        
+        Returns:
+            List of (path, error message) for entries that could not be removed
+        """
+        return DeleteEngine().delete(path, progress)
+    
     def get_file_size(self, path):
         """Get file size in bytes"""
         try:
             if os.path.isfile(path):
                 return os.path.getsize(path)
             elif os.path.isdir(path):
-                total_size = 0
-                for dirpath, dirnames, filenames in os.walk(path):
-                    for filename in filenames:
-                        filepath = os.path.join(dirpath, filename)
-                        try:
-                            total_size += os.path.getsize(filepath)
-                        except:
-                            pass
-                return total_size
+                return folder_size(path, mounts=self.mount_policies) or 0
         except:
             return 0
     
@@ -137,9 +487,9 @@ class FileOperations:
         s = round(size_bytes / p, 2)
         return f"{s} {size_names[i]}"
     
-    def get_file_icon(self, path):
-        """Get appropriate icon for file type"""
-        if os.path.isdir(path):
+    def get_file_icon(self, path, is_dir=None):
+        """Get appropriate icon for file type (is_dir skips the stat when already known)"""
+        if is_dir if is_dir is not None else os.path.isdir(path):
             return "📁"
         
         ext = os.path.splitext(path)[1].lower()
@@ -199,9 +549,12 @@ class FileOperations:
         
         return icon_map.get(ext, '📄')
     
-    def is_executable(self, path):
-        """Check if a file is executable (exe, bat, cmd, ps1, py, lnk)"""
-        if os.path.isdir(path):
+    def is_executable(self, path, is_dir=None):
+        """Check if a file is executable (exe, bat, cmd, ps1, py, lnk)
+
+        is_dir skips the stat when the caller already knows (e.g. from the model).
+        """
+        if is_dir if is_dir is not None else os.path.isdir(path):
             return False
         
         ext = os.path.splitext(path)[1].lower()
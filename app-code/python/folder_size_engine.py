@@ -0,0 +1,314 @@
+"""
+Folder Size Engine for File Explorer
+Sizes a whole directory tree in a single os.scandir pass and
+incrementally revalidates previously cached trees
+"""
+
+import logging
+import os
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from mount_policy import CROSS, EXACT, LOWER_BOUND, MountPolicies
+from scan_exclusions import ExclusionRules
+
+logger = logging.getLogger(__name__)
+
+
+class DirNode:
+    """Size information for one directory of a scanned tree"""
+
+    __slots__ = ('own', 'total', 'mtime', 'children', 'partial', 'dev')
+
+    def __init__(self, mtime: float = 0.0, own: int = 0, total: int = 0,
+                 children: Optional[List[str]] = None, partial: int = EXACT, dev: int = 0):
+        self.own = own        # Bytes of files directly inside this directory
+        self.total = total    # Bytes of the whole subtree
+        self.mtime = mtime    # Directory mtime at scan time
+        self.children: List[str] = children if children is not None else []  # Child directory paths
+        self.partial = partial  # EXACT, or how the subtree total falls short (mount_policy)
+        self.dev = dev        # st_dev seen while scanning (0 = not known)
+
+
+class FolderSize(NamedTuple):
+    """A folder total as delivered to the view"""
+    total: int
+    partial: int = EXACT   # mount_policy.EXACT / LOWER_BOUND / ESTIMATE
+
+
+class ExcludedSize(NamedTuple):
+    """What exclusion rules left out of a folder total"""
+    total: int             # Bytes of excluded files and folders
+    items: int             # Excluded files and folders (their contents not counted)
+    partial: int = EXACT
+
+
+def scan_folder_sizes(root: str, is_cancelled: Optional[Callable[[], bool]] = None,
+                      mounts: Optional[MountPolicies] = None,
+                      rules: Optional[ExclusionRules] = None,
+                      parent_dev: Optional[int] = None) -> Optional[Dict[str, DirNode]]:
+    """Scan a directory tree once and return a size node for every directory
+
+    Each directory is listed exactly once with os.scandir and file sizes come
+    from the DirEntry stat results, so sizing a folder also sizes all of its
+    descendants for free. Symlinked directories are not followed.
+
+    With mounts, a directory whose st_dev differs from its parent's starts
+    another file system: if that file system's policy is not CROSS, the
+    directory is measured as a single node under the policy (skipped,
+    time-boxed or sampled) and marked partial. root's own file system is
+    always scanned in full. (DirEntry.stat leaves st_dev 0 on Windows, so
+    there folders below root are never treated as other file systems.)
+
+    Files and folders matched by rules are left out; excluded folders are
+    never listed (see excluded_size for what they hold). root itself is
+    not checked against the rules.
+
+    Args:
+        root: Directory to scan
+        is_cancelled: Optional callable polled between directories
+        mounts: Per-file-system policies; None scans everything
+        rules: Exclusion rules; None excludes nothing
+        parent_dev: st_dev of root's parent, when root is part of a larger
+            scan; None treats root as the start of the scan
+
+    Returns:
+        Mapping of directory path -> DirNode (root included), or None if cancelled
+    """
+    try:
+        st = os.stat(root)
+    except OSError:
+        return {root: DirNode()}
+
+    nodes: Dict[str, DirNode] = {root: DirNode(st.st_mtime, dev=st.st_dev)}
+    order: List[str] = []  # Pre-order; reversed it is a valid bottom-up order
+    stack = [(root, st.st_dev if parent_dev is None else parent_dev)]
+
+    while stack:
+        if is_cancelled is not None and is_cancelled():
+            return None
+        path, above = stack.pop()
+        order.append(path)
+        node = nodes[path]
+        if _enters_mount(mounts, path, node.dev, above):
+            leaf = _measure_mount(path, node.mtime, node.dev, mounts, is_cancelled, rules)
+            if leaf is None:
+                return None
+            nodes[path] = leaf
+            continue
+        _scan_own_entries(path, node, nodes, rules)
+        stack.extend((child, node.dev) for child in node.children)
+
+    _roll_up(nodes, order)
+    return nodes
+
+
+def revalidate_folder_sizes(root: str, lookup: Callable[[str], Optional[DirNode]],
+                            is_cancelled: Optional[Callable[[], bool]] = None,
+                            mounts: Optional[MountPolicies] = None,
+                            rules: Optional[ExclusionRules] = None
+                            ) -> Optional[Tuple[Dict[str, DirNode], List[str]]]:
+    """Bring a previously cached tree up to date with minimal work
+
+    Walks the cached directory links and stats each directory once. Only
+    directories whose mtime changed are listed again (their own files and
+    child links); directories that were never cached are fully scanned.
+    File sizes of unchanged directories are taken from the cache.
+    Directories that start a file system whose policy is not CROSS are
+    always measured again under that policy (see scan_folder_sizes). Cached
+    child links that rules now exclude are dropped like removed folders.
+
+    Args:
+        root: Directory to revalidate
+        lookup: Returns the cached DirNode for a path, or None if unknown
+        is_cancelled: Optional callable polled between directories
+        mounts: Per-file-system policies; None scans everything
+        rules: Exclusion rules; None excludes nothing
+
+    Returns:
+        (nodes, removed) where nodes maps every directory of the tree to its
+        current DirNode and removed lists cached directories that no longer
+        exist or are excluded; None if cancelled
+    """
+    nodes: Dict[str, DirNode] = {}
+    removed: List[str] = []
+    order: List[str] = []
+    rescanned = 0
+    stack: List[Tuple[str, Optional[int]]] = [(root, None)]
+
+    while stack:
+        if is_cancelled is not None and is_cancelled():
+            return None
+        path, above = stack.pop()
+        cached = lookup(path)
+        if cached is None:
+            # Unknown subtree: one full scan covers it
+            sub = scan_folder_sizes(path, is_cancelled, mounts, rules, above)
+            if sub is None:
+                return None
+            nodes.update(sub)
+            continue
+
+        try:
+            st = os.stat(path)
+        except OSError:
+            removed.append(path)
+            if path == root:
+                return nodes, removed
+            continue
+        mtime = st.st_mtime
+
+        order.append(path)
+        if _enters_mount(mounts, path, st.st_dev, st.st_dev if above is None else above):
+            leaf = _measure_mount(path, mtime, st.st_dev, mounts, is_cancelled, rules)
+            if leaf is None:
+                return None
+            nodes[path] = leaf
+            removed.extend(cached.children)  # Links from before the policy applied
+            continue
+        if abs(mtime - cached.mtime) <= 0.001:
+            children = list(cached.children)
+            if rules:
+                children = [c for c in cached.children if not rules.excludes(c, True)]
+                if len(children) != len(cached.children):
+                    kept = set(children)
+                    removed.extend(c for c in cached.children if c not in kept)
+            # A childless node's partial is its own (a measured mount); _roll_up
+            # recomputes the others from their children
+            partial = cached.partial if not cached.children else EXACT
+            node = DirNode(cached.mtime, own=cached.own, children=children, partial=partial)
+        else:
+            # Entries were added, removed or renamed here: relist this directory only
+            node = DirNode(mtime)
+            _scan_own_entries(path, node, None, rules)
+            rescanned += 1
+            kept = set(node.children)
+            removed.extend(c for c in cached.children if c not in kept)
+        nodes[path] = node
+        stack.extend((child, st.st_dev) for child in node.children)
+
+    # Drop links to children that vanished between the stat and the scan
+    for path in order:
+        node = nodes[path]
+        node.children = [c for c in node.children if c in nodes]
+    _roll_up(nodes, order)
+    logger.debug(f"Revalidated {root}: {len(order)} cached dirs, {rescanned} rescanned")
+    return nodes, removed
+
+
+def _scan_own_entries(path: str, node: DirNode, nodes: Optional[Dict[str, DirNode]],
+                      rules: Optional[ExclusionRules] = None) -> None:
+    """List one directory: sum its files into node.own and record child directories
+
+    If nodes is given, a fresh DirNode is registered there for each child
+    directory. Entries matched by rules are skipped.
+    """
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if rules and rules.excludes(entry.path, is_dir, entry.name):
+                        continue
+                    if is_dir:
+                        node.children.append(entry.path)
+                        if nodes is not None:
+                            st = entry.stat(follow_symlinks=False)
+                            nodes[entry.path] = DirNode(st.st_mtime, dev=st.st_dev)
+                    else:
+                        node.own += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    pass
+    except OSError as e:
+        logger.debug(f"Cannot scan {path}: {e}")
+
+
+def _enters_mount(mounts: Optional[MountPolicies], path: str, dev: int, parent_dev: int) -> bool:
+    """True if path starts a file system (by st_dev) whose policy is not CROSS"""
+    return (mounts is not None and bool(dev) and dev != parent_dev
+            and mounts.policy_for(path, dev) != CROSS)
+
+
+def _measure_mount(path: str, mtime: float, dev: int, mounts: MountPolicies,
+                   is_cancelled: Optional[Callable[[], bool]],
+                   rules: Optional[ExclusionRules] = None) -> Optional[DirNode]:
+    """Size a directory under its file system's policy as one childless node; None if cancelled"""
+    measured = mounts.measure(path, dev, is_cancelled, rules)
+    if measured is None:
+        return None
+    size, partial = measured
+    return DirNode(mtime, own=size, total=size, partial=partial, dev=dev)
+
+
+def _roll_up(nodes: Dict[str, DirNode], order: List[str]) -> None:
+    """Compute subtree totals and completeness; order must list parents before their children"""
+    for path in reversed(order):
+        node = nodes[path]
+        children = [nodes[c] for c in node.children if c in nodes]
+        node.total = node.own + sum(child.total for child in children)
+        node.partial = max([node.partial] + [child.partial for child in children])
+
+
+def folder_size(root: str, is_cancelled: Optional[Callable[[], bool]] = None,
+                mounts: Optional[MountPolicies] = None,
+                rules: Optional[ExclusionRules] = None) -> Optional[int]:
+    """Return the total size in bytes of a directory tree, or None if cancelled"""
+    nodes = scan_folder_sizes(root, is_cancelled, mounts, rules)
+    if nodes is None:
+        return None
+    return nodes[root].total
+
+
+def excluded_size(root: str, rules: ExclusionRules,
+                  is_cancelled: Optional[Callable[[], bool]] = None,
+                  mounts: Optional[MountPolicies] = None) -> Optional[ExcludedSize]:
+    """Size what rules leave out of root's total; None if cancelled
+
+    Walks the included part of the tree again (nothing is cached) and
+    sizes every excluded folder in full, so this is meant to run on demand
+    rather than with every folder size. If root itself lies in an excluded
+    tree, all of it counts as excluded. Folders that start a file system
+    whose policy is not CROSS are not searched for exclusions (lower bound).
+    """
+    if rules.excludes_tree(root):
+        total = folder_size(root, is_cancelled, mounts)
+        return None if total is None else ExcludedSize(total, 1)
+
+    total = items = 0
+    partial = EXACT
+    try:
+        root_dev = os.stat(root).st_dev
+    except OSError:
+        root_dev = 0
+    stack = [(root, root_dev, root_dev)]
+    while stack:
+        if is_cancelled is not None and is_cancelled():
+            return None
+        path, dev, above = stack.pop()
+        if _enters_mount(mounts, path, dev, above):
+            partial = max(partial, LOWER_BOUND)
+            continue
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError as e:
+            logger.debug(f"Cannot scan {path}: {e}")
+            continue
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if not rules.excludes(entry.path, is_dir, entry.name):
+                    if is_dir:
+                        stack.append((entry.path, entry.stat(follow_symlinks=False).st_dev or dev, dev))
+                    continue
+                if is_dir:
+                    nodes = scan_folder_sizes(entry.path, is_cancelled, mounts, None, dev)
+                    if nodes is None:
+                        return None
+                    total += nodes[entry.path].total
+                    partial = max(partial, nodes[entry.path].partial)
+                else:
+                    total += entry.stat(follow_symlinks=False).st_size
+                items += 1
+            except OSError:
+                pass
+    return ExcludedSize(total, items, partial)
@@ -0,0 +1,202 @@
+"""
+Folder Size Scheduler for File Explorer
+Runs folder size computations on a fixed pool of worker threads
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lower values run first
+PRIORITY_VISIBLE = 0
+PRIORITY_BACKGROUND = 10
+
+
+class _SizeJob:
+    """A single queued or running folder size request"""
+
+    __slots__ = ('path', 'priority', 'callbacks', 'cancelled', 'running')
+
+    def __init__(self, path: str, priority: int):
+        self.path = path
+        self.priority = priority
+        self.callbacks: List[Callable[[], None]] = []
+        self.cancelled = False
+        self.running = False
+
+
+class FolderSizeScheduler:
+    """Schedule folder size computations on a bounded worker pool
+
+    - A fixed number of worker threads is started lazily on first use.
+    - Requests are kept in a priority queue; within the same priority the
+      most recent request runs first, so rows the user is looking at right
+      now win over rows that were scrolled past.
+    - A path that is already queued or running is never queued twice; later
+      requests just attach their callback, and a queued job is re-queued
+      only when a request raises its priority.
+    - Pending work can be cancelled, e.g. when the user navigates away.
+    """
+
+    def __init__(self, compute: Callable[[str, Callable[[], bool]], Optional[Any]],
+                 on_result: Optional[Callable[[str, Any], None]] = None,
+                 max_workers: Optional[int] = None):
+        """Initialize the scheduler
+
+        Args:
+            compute: Function (path, is_cancelled) -> size (bytes, or a result
+                     such as FolderSize), or None if the computation was abandoned
+            on_result: Called on the worker thread with (path, size) for every
+                       completed computation, before the request callbacks
+            max_workers: Pool size. If None, uses a small number based on CPU count
+        """
+        if max_workers is None:
+            # Folder sizing is disk bound; more threads only add seek contention
+            max_workers = max(2, min(4, (os.cpu_count() or 2)))
+        self.max_workers = max_workers
+        self._compute = compute
+        self._on_result = on_result
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._heap: List[Tuple[int, int, _SizeJob]] = []
+        self._jobs: Dict[str, _SizeJob] = {}
+        self._counter = itertools.count()
+        self._workers: List[threading.Thread] = []
+        self._shutdown = False
+
+    # ==================== PUBLIC API ====================
+
+    def submit(self, path: str, callback: Optional[Callable[[], None]] = None,
+               priority: int = PRIORITY_VISIBLE) -> bool:
+        """Queue a folder for sizing
+
+        Args:
+            path: Folder path
+            callback: Called on the worker thread once the size is known
+            priority: Lower runs first (see PRIORITY_* constants)
+
+        Returns:
+            True if a new job was queued, False if the path was already pending
+        """
+        with self._lock:
+            if self._shutdown:
+                return False
+            self._ensure_workers()
+
+            job = self._jobs.get(path)
+            if job is not None and not job.cancelled:
+                if callback is not None:
+                    job.callbacks.append(callback)
+                # Re-push a queued job only when its priority improves; the stale
+                # heap entry is skipped when popped
+                if not job.running and priority < job.priority:
+                    job.priority = priority
+                    heapq.heappush(self._heap, (priority, -next(self._counter), job))
+                return False
+
+            job = _SizeJob(path, priority)
+            if callback is not None:
+                job.callbacks.append(callback)
+            self._jobs[path] = job
+            heapq.heappush(self._heap, (priority, -next(self._counter), job))
+            self._wakeup.notify()
+            return True
+
+    def cancel(self, keep_under: Optional[str] = None) -> int:
+        """Cancel pending and running jobs
+
+        Args:
+            keep_under: If given, jobs for this folder and its direct children
+                        are kept; everything else is cancelled
+
+        Returns:
+            Number of jobs cancelled
+        """
+        keep_root = os.path.normcase(os.path.abspath(keep_under)) if keep_under else None
+        cancelled = 0
+        with self._lock:
+            for path, job in list(self._jobs.items()):
+                if keep_root is not None:
+                    norm = os.path.normcase(os.path.abspath(path))
+                    if norm == keep_root or os.path.dirname(norm) == keep_root:
+                        continue
+                job.cancelled = True
+                job.callbacks.clear()
+                del self._jobs[path]
+                cancelled += 1
+            # Drop cancelled entries from the queue right away
+            self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+            heapq.heapify(self._heap)
+        if cancelled:
+            logger.debug(f"Cancelled {cancelled} folder size job(s)")
+        return cancelled
+
+    def shutdown(self) -> None:
+        """Cancel everything and stop the worker threads"""
+        self.cancel()
+        with self._lock:
+            self._shutdown = True
+            self._wakeup.notify_all()
+
+    # ==================== WORKERS ====================
+
+    def _ensure_workers(self) -> None:
+        """Start worker threads up to the pool size (lock must be held)"""
+        while len(self._workers) < self.max_workers:
+            t = threading.Thread(
+                target=self._worker_loop,
+                name=f"FolderSize-{len(self._workers)}",
+                daemon=True,
+            )
+            self._workers.append(t)
+            t.start()
+
+    def _next_job(self) -> Optional[_SizeJob]:
+        """Block until a runnable job is available; None on shutdown"""
+        with self._lock:
+            while True:
+                if self._shutdown:
+                    return None
+                while self._heap:
+                    priority, _, job = heapq.heappop(self._heap)
+                    # Skip stale heap entries (cancelled, superseded or already taken)
+                    if job.cancelled or job.running or priority != job.priority:
+                        continue
+                    job.running = True
+                    return job
+                self._wakeup.wait()
+
+    def _worker_loop(self) -> None:
+        """Worker thread body"""
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+
+            size: Optional[Any] = None
+            try:
+                size = self._compute(job.path, lambda j=job: j.cancelled)
+            except Exception as e:
+                logger.error(f"Folder size computation failed for {job.path}: {e}", exc_info=True)
+
+            with self._lock:
+                if self._jobs.get(job.path) is job:
+                    del self._jobs[job.path]
+                callbacks = [] if job.cancelled else list(job.callbacks)
+
+            if job.cancelled or size is None:
+                continue
+
+            try:
+                if self._on_result is not None:
+                    self._on_result(job.path, size)
+                for cb in callbacks:
+                    cb()
+            except Exception as e:
+                logger.error(f"Folder size callback failed for {job.path}: {e}", exc_info=True)
@@ -0,0 +1,272 @@
+"""
+Folder Size Store for File Explorer
+SQLite-backed cache of computed folder sizes
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from folder_size_engine import DirNode
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS folder_sizes (
+    path    TEXT PRIMARY KEY,
+    parent  TEXT NOT NULL,
+    size    INTEGER NOT NULL,
+    own     INTEGER,
+    mtime   REAL NOT NULL,
+    updated TEXT NOT NULL,
+    partial INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_folder_sizes_parent ON folder_sizes(parent);
+"""
+
+
+class FolderSizeStore:
+    """Persist folder sizes in an embedded SQLite database (WAL mode)
+
+    - Lookups hit the primary key index; child links use an index on parent.
+    - Trees are written with one batched upsert per transaction.
+    - Each thread gets its own connection so UI-thread reads never wait on
+      a worker's write transaction; writes are serialized with a lock.
+    """
+
+    def __init__(self, db_path: Path, legacy_json: Optional[Path] = None):
+        """Open (or create) the store
+
+        Args:
+            db_path: SQLite database file
+            legacy_json: Old folder_sizes.json to migrate once, if present
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(folder_sizes)")}
+        if 'partial' not in columns:
+            # Databases from before mount policies: every stored total was exact
+            conn.execute("ALTER TABLE folder_sizes ADD COLUMN partial INTEGER NOT NULL DEFAULT 0")
+        conn.commit()
+
+        if legacy_json is not None and legacy_json.exists():
+            self._migrate_json(legacy_json)
+
+    def _conn(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ==================== READS ====================
+
+    def get_node(self, path: str) -> Optional[DirNode]:
+        """Return the per-directory aggregate for path, or None if not tracked"""
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT size, own, mtime, partial FROM folder_sizes WHERE path = ?", (path,)
+            ).fetchone()
+            if row is None or row[1] is None:
+                return None
+            children = [r[0] for r in conn.execute(
+                "SELECT path FROM folder_sizes WHERE parent = ? AND own IS NOT NULL", (path,)
+            )]
+            return DirNode(float(row[2]), own=int(row[1]), total=int(row[0]), children=children,
+                           partial=int(row[3]))
+        except sqlite3.Error as e:
+            logger.error(f"Folder size lookup failed for {path}: {e}")
+            return None
+
+    def get_children(self, parent: str) -> Dict[str, Tuple[int, float, int]]:
+        """Return {path: (size, mtime, partial)} for every cached folder directly inside parent"""
+        try:
+            return {
+                row[0]: (int(row[1]), float(row[2]), int(row[3]))
+                for row in self._conn().execute(
+                    "SELECT path, size, mtime, partial FROM folder_sizes WHERE parent = ?", (parent,)
+                )
+            }
+        except sqlite3.Error as e:
+            logger.error(f"Folder size lookup failed for children of {parent}: {e}")
+            return {}
+
+    def count(self) -> int:
+        """Number of cached folders"""
+        try:
+            return int(self._conn().execute("SELECT COUNT(*) FROM folder_sizes").fetchone()[0])
+        except sqlite3.Error:
+            return 0
+
+    # ==================== WRITES ====================
+
+    def store_tree(self, root: str, nodes: Dict[str, DirNode],
+                   removed: Optional[List[str]] = None) -> bool:
+        """Write a scanned tree in one transaction and roll the root's delta up
+
+        A partial root total (see mount_policy) marks its cached ancestors
+        partial too, until they are revalidated themselves.
+
+        Args:
+            root: Root of the scanned tree
+            nodes: Mapping of directory path -> DirNode (root included)
+            removed: Directories that no longer exist; their subtrees are deleted
+
+        Returns:
+            True if successful
+        """
+        now = datetime.now().isoformat()
+        rows = [
+            (path, os.path.dirname(path), int(node.total), int(node.own), float(node.mtime), now,
+             int(node.partial))
+            for path, node in nodes.items()
+        ]
+        with self._write_lock:
+            conn = self._conn()
+            try:
+                old = conn.execute(
+                    "SELECT size FROM folder_sizes WHERE path = ?", (root,)
+                ).fetchone()
+                with conn:
+                    for path in removed or []:
+                        self._delete_subtree(conn, path)
+                    self._executemany_upsert(conn, rows)
+
+                    # Roll the root's delta up to cached ancestors
+                    if old is not None:
+                        root_node = nodes.get(root)
+                        delta = (int(root_node.total) if root_node is not None else 0) - int(old[0])
+                        partial = int(root_node.partial) if root_node is not None else 0
+                        if delta or partial:
+                            ancestors = []
+                            parent, child = os.path.dirname(root), root
+                            while parent != child:
+                                ancestors.append((delta, partial, now, parent))
+                                parent, child = os.path.dirname(parent), parent
+                            conn.executemany(
+                                "UPDATE folder_sizes SET size = size + ?, partial = MAX(partial, ?), "
+                                "updated = ? WHERE path = ?",
+                                ancestors,
+                            )
+                logger.debug(f"Stored {len(rows)} folder sizes under {root}")
+                return True
+            except sqlite3.Error as e:
+                logger.error(f"Error storing folder sizes for {root}: {e}", exc_info=True)
+                return False
+
+    def mark_stale(self, paths: Optional[List[str]] = None) -> bool:
+        """Force the next revalidation to relist these folders (None: every folder)
+
+        Used when files were changed in place: the folder's mtime did not
+        move, so its cached own-files sum would otherwise be trusted. Every
+        folder is marked when the exclusion rules change.
+        """
+        with self._write_lock:
+            try:
+                with self._conn() as conn:
+                    if paths is None:
+                        conn.execute("UPDATE folder_sizes SET mtime = -1")
+                    else:
+                        conn.executemany("UPDATE folder_sizes SET mtime = -1 WHERE path = ?",
+                                         [(path,) for path in paths])
+                return True
+            except sqlite3.Error as e:
+                logger.error(f"Error marking folder sizes stale: {e}")
+                return False
+
+    def clear(self) -> bool:
+        """Remove every cached folder size"""
+        with self._write_lock:
+            try:
+                with self._conn() as conn:
+                    conn.execute("DELETE FROM folder_sizes")
+                return True
+            except sqlite3.Error as e:
+                logger.error(f"Error clearing folder sizes: {e}")
+                return False
+
+    def _upsert(self, rows: List[tuple]) -> bool:
+        """Insert or replace rows in one transaction"""
+        with self._write_lock:
+            try:
+                with self._conn() as conn:
+                    self._executemany_upsert(conn, rows)
+                return True
+            except sqlite3.Error as e:
+                logger.error(f"Error writing folder sizes: {e}")
+                return False
+
+    @staticmethod
+    def _executemany_upsert(conn: sqlite3.Connection, rows: List[tuple]) -> None:
+        conn.executemany(
+            "INSERT INTO folder_sizes (path, parent, size, own, mtime, updated, partial) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET parent = excluded.parent, size = excluded.size, "
+            "own = excluded.own, mtime = excluded.mtime, updated = excluded.updated, "
+            "partial = excluded.partial "
+            "WHERE size != excluded.size OR own IS NOT excluded.own OR mtime != excluded.mtime "
+            "OR partial != excluded.partial",
+            rows,
+        )
+
+    @staticmethod
+    def _delete_subtree(conn: sqlite3.Connection, path: str) -> None:
+        """Delete a folder and everything below it using a primary-key range scan"""
+        prefix = path.rstrip('/\\') + os.sep
+        upper = prefix[:-1] + chr(ord(os.sep) + 1)
+        conn.execute(
+            "DELETE FROM folder_sizes WHERE path = ? OR (path >= ? AND path < ?)",
+            (path, prefix, upper),
+        )
+
+    # ==================== MIGRATION ====================
+
+    def _migrate_json(self, legacy_json: Path) -> None:
+        """Import the old folder_sizes.json once, then move it aside"""
+        try:
+            with open(legacy_json, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Could not read legacy folder size cache {legacy_json}: {e}")
+            data = {}
+
+        rows = []
+        if isinstance(data, dict):
+            for path, rec in data.items():
+                if not isinstance(rec, dict) or rec.get('size') is None or rec.get('mtime') is None:
+                    continue
+                try:
+                    own = rec.get('own')
+                    rows.append((
+                        path,
+                        os.path.dirname(path),
+                        int(rec['size']),
+                        int(own) if own is not None and 'children' in rec else None,
+                        float(rec['mtime']),
+                        str(rec.get('updated') or datetime.now().isoformat()),
+                        0,
+                    ))
+                except (TypeError, ValueError):
+                    continue
+
+        if rows and not self._upsert(rows):
+            return  # Keep the JSON so the migration is retried next start
+
+        try:
+            legacy_json.replace(legacy_json.with_suffix('.json.migrated'))
+        except OSError as e:
+            logger.warning(f"Could not move aside {legacy_json}: {e}")
+        logger.info(f"✅ Migrated {len(rows)} folder sizes from {legacy_json.name} to {self.db_path.name}")
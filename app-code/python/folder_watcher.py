@@ -0,0 +1,331 @@
+"""
+Folder Watcher for File Explorer
+Reports changes to the open folder (inotify on Linux, mtime polling elsewhere)
+"""
+
+import ctypes
+import errno
+import logging
+import os
+import select
+import stat
+import struct
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from directory_loader import DirectoryListing, KIND_DIR, KIND_FILE, is_hidden
+from mount_policy import fs_type
+
+logger = logging.getLogger(__name__)
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_UNMOUNT = 0x00002000
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+               IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+_EVENT_HEADER = struct.Struct('iIII')   # wd, mask, cookie, len
+
+# Mounts whose remote changes inotify never sees; they are polled instead
+POLLED_FS_TYPES = {'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', '9p', 'afs', 'ceph',
+                   'glusterfs', 'davfs', 'fuse', 'fuseblk', 'sshfs', 'vboxsf'}
+
+
+def _load_inotify():
+    """Return libc with the inotify calls, or None where they are unavailable"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    except (OSError, AttributeError) as e:
+        logger.info(f"inotify unavailable, folders will be polled: {e}")
+        return None
+
+
+def _stat_entry(folder: str, name: str) -> Optional[Tuple[int, float, int, bool]]:
+    """(size, mtime, kind, hidden) of folder/name as the directory loader lists it, or None"""
+    path = os.path.join(folder, name)
+    try:
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = os.lstat(path)  # Broken link
+    except OSError:
+        return None
+    if stat.S_ISDIR(st.st_mode):
+        return 0, st.st_mtime, KIND_DIR, is_hidden(name, st)
+    return st.st_size, st.st_mtime, KIND_FILE, is_hidden(name, st)
+
+
+class FolderWatcher(QObject):
+    """Watch one folder (the one on screen) and report coalesced changes
+
+    On Linux the folder gets an inotify watch; names from its events are
+    collected until no event arrived for COALESCE_DELAY (or MAX_DELAY has
+    passed), then each name is stat'ed once and reported as added/modified
+    or removed. Mounts inotify cannot observe (network and FUSE file
+    systems, see POLLED_FS_TYPES) and other platforms are polled instead:
+    every poll interval the folder's mtime is checked and, when it changed,
+    the folder is listed again and diffed against the previous listing.
+
+    All file system access happens on the watcher thread; results come back
+    through queued signals.
+    """
+
+    # folder, DirectoryListing of added or modified entries, List[str] of removed names
+    changed = pyqtSignal(str, object, object)
+    # folder: it was removed or moved away, or too much changed to report entry by entry
+    lost = pyqtSignal(str)
+
+    COALESCE_DELAY = 0.2   # Seconds without events before a batch is reported
+    MAX_DELAY = 1.0        # Longest a busy folder's changes are held back
+    MAX_PENDING = 20000    # More changed names than this are reported as lost (reload)
+    WAKE_INTERVAL = 0.25   # Seconds between checks for a new folder or shutdown
+
+    def __init__(self, parent: Optional[QObject] = None, poll_interval: float = 5.0):
+        super().__init__(parent)
+        self.poll_interval = poll_interval
+        self._libc = _load_inotify()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._target: Optional[str] = None   # Folder requested by the UI
+        self._generation = 0                 # Bumped by every watch() call
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ==================== PUBLIC API ====================
+
+    def watch(self, folder: Optional[str]) -> None:
+        """Watch folder instead of the previous one (None stops watching)
+
+        Calling it again for the same folder starts over, e.g. after lost.
+        """
+        with self._lock:
+            self._target = folder
+            self._generation += 1
+            if self._thread is None and folder is not None:
+                self._thread = threading.Thread(target=self._run, name='FolderWatcher', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def set_poll_interval(self, seconds: float) -> None:
+        self.poll_interval = max(0.5, float(seconds))
+        self._wake.set()
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    # ==================== WATCHER THREAD ====================
+
+    def _run(self) -> None:
+        ifd = -1
+        if self._libc is not None:
+            ifd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if ifd < 0:
+                logger.info(f"inotify_init1 failed ({os.strerror(ctypes.get_errno())}), "
+                            f"folders will be polled")
+        try:
+            while not self._stop.is_set():
+                self._wake.clear()
+                with self._lock:
+                    folder, generation = self._target, self._generation
+                if folder is not None:
+                    wd = self._add_watch(ifd, folder) if ifd >= 0 else -1
+                    try:
+                        if wd >= 0:
+                            self._follow_events(ifd, folder, generation)
+                        else:
+                            self._poll(folder, generation)
+                    finally:
+                        if wd >= 0:
+                            self._libc.inotify_rm_watch(ifd, wd)
+                            self._drain(ifd)
+                # Idle until a new watch() (the folder may be gone or already reported lost)
+                while self._current(generation):
+                    self._wake.wait()
+                    self._wake.clear()
+        except Exception as e:
+            logger.error(f"Folder watcher stopped: {e}", exc_info=True)
+        finally:
+            if ifd >= 0:
+                os.close(ifd)
+
+    def _current(self, generation: int) -> bool:
+        """True while no other folder was requested since generation"""
+        with self._lock:
+            return not self._stop.is_set() and self._generation == generation
+
+    def _add_watch(self, ifd: int, folder: str) -> int:
+        """inotify watch descriptor for folder, or -1 if it has to be polled"""
+        kind = fs_type(folder)
+        if kind in POLLED_FS_TYPES or kind.startswith('fuse.'):
+            logger.debug(f"Polling {folder} ({kind} mount)")
+            return -1
+        wd = self._libc.inotify_add_watch(ifd, os.fsencode(folder), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                logger.warning(f"inotify watch limit reached, polling {folder}")
+            else:
+                logger.debug(f"Cannot watch {folder} ({os.strerror(err)}), polling it")
+        return wd
+
+    def _follow_events(self, ifd: int, folder: str, generation: int) -> None:
+        """Report inotify events for folder until another folder is requested"""
+        pending: Set[str] = set()
+        first = last = 0.0
+        while self._current(generation):
+            timeout = self.WAKE_INTERVAL
+            if pending:
+                now = time.monotonic()
+                due = min(last + self.COALESCE_DELAY, first + self.MAX_DELAY)
+                if now >= due:
+                    self._report(folder, pending, generation)
+                    pending = set()
+                    continue
+                timeout = min(timeout, due - now)
+            readable, _, _ = select.select([ifd], [], [], timeout)
+            if not readable:
+                continue
+            names, lost = self._read_events(ifd)
+            if lost:
+                self.lost.emit(folder)
+                return
+            if names:
+                now = time.monotonic()
+                if not pending:
+                    first = now
+                last = now
+                pending.update(names)
+                if len(pending) > self.MAX_PENDING:
+                    self.lost.emit(folder)
+                    return
+
+    def _read_events(self, ifd: int) -> Tuple[Set[str], bool]:
+        """Names touched by the queued events; lost is True if the folder itself went away"""
+        names: Set[str] = set()
+        lost = False
+        while True:
+            try:
+                buf = os.read(ifd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not buf:
+                break
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(buf):
+                wd, mask, cookie, length = _EVENT_HEADER.unpack_from(buf, offset)
+                offset += _EVENT_HEADER.size
+                name = buf[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_UNMOUNT | IN_Q_OVERFLOW | IN_IGNORED):
+                    lost = True
+                elif name:
+                    names.add(os.fsdecode(name))
+        return names, lost
+
+    @staticmethod
+    def _drain(ifd: int) -> None:
+        """Discard events still queued for a removed watch"""
+        try:
+            while os.read(ifd, 64 * 1024):
+                pass
+        except OSError:
+            pass
+
+    def _report(self, folder: str, names: Set[str], generation: int) -> None:
+        """Stat the touched names and emit them as one change"""
+        upserts = DirectoryListing()
+        removed: List[str] = []
+        for name in sorted(names):
+            entry = _stat_entry(folder, name)
+            if entry is None:
+                removed.append(name)
+            else:
+                size, mtime, kind, hidden = entry
+                upserts.append(name, size, mtime, kind, hidden)
+        if self._current(generation):
+            self.changed.emit(folder, upserts, removed)
+
+    def _poll(self, folder: str, generation: int) -> None:
+        """Report changes to folder by comparing listings whenever its mtime moves
+
+        Only the folder's own mtime is checked, so files rewritten in place
+        (same name, no entry added or removed) show up with the next change.
+        """
+        snapshot = self._snapshot(folder)
+        if snapshot is None:
+            return
+        mtime_ns, entries = snapshot
+        while self._current(generation):
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            if not self._current(generation):
+                return
+            try:
+                if os.stat(folder).st_mtime_ns == mtime_ns:
+                    continue
+            except OSError:
+                self.lost.emit(folder)
+                return
+            snapshot = self._snapshot(folder)
+            if snapshot is None:
+                self.lost.emit(folder)
+                return
+            mtime_ns, current = snapshot
+            upserts = DirectoryListing()
+            for name, entry in current.items():
+                if entries.get(name) != entry:
+                    upserts.append(name, *entry)
+            removed = [name for name in entries if name not in current]
+            entries = current
+            if (len(upserts) or removed) and self._current(generation):
+                self.changed.emit(folder, upserts, removed)
+
+    @staticmethod
+    def _snapshot(folder: str) -> Optional[Tuple[int, Dict[str, Tuple[int, float, int, bool]]]]:
+        """(folder mtime_ns, {name: (size, mtime, kind, hidden)}), or None if unreadable"""
+        entries: Dict[str, Tuple[int, float, int, bool]] = {}
+        try:
+            mtime_ns = os.stat(folder).st_mtime_ns
+            with os.scandir(folder) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    hidden = is_hidden(entry.name, st)
+                    if is_dir:
+                        entries[entry.name] = (0, st.st_mtime, KIND_DIR, hidden)
+                    else:
+                        entries[entry.name] = (st.st_size, st.st_mtime, KIND_FILE, hidden)
+        except OSError as e:
+            logger.debug(f"Cannot poll {folder}: {e}")
+            return None
+        return mtime_ns, entries
@@ -0,0 +1,239 @@
+"""
+Mount Policy for File Explorer
+Decides how folder scans treat file systems mounted inside a tree
+"""
+
+import logging
+import os
+import select
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, IO, Optional, Tuple
+
+from scan_exclusions import ExclusionRules
+
+logger = logging.getLogger(__name__)
+
+# How a scan treats a folder on a given file system type
+CROSS = 'cross'     # Scan it like any other folder
+SKIP = 'skip'       # Do not enter it
+BUDGET = 'budget'   # Scan it until MountPolicies.TIME_BUDGET runs out
+SAMPLE = 'sample'   # List up to MountPolicies.SAMPLE_DIRS folders and extrapolate
+
+# How complete a measured total is (DirNode.partial); larger values win when totals are added
+EXACT = 0
+LOWER_BOUND = 1     # Something was skipped or cut off by a time budget
+ESTIMATE = 2        # Something was sampled and extrapolated
+
+FS_POLICIES: Dict[str, str] = {
+    # Local disks
+    'ext2': CROSS, 'ext3': CROSS, 'ext4': CROSS, 'xfs': CROSS, 'btrfs': CROSS, 'zfs': CROSS,
+    'f2fs': CROSS, 'jfs': CROSS, 'reiserfs': CROSS, 'vfat': CROSS, 'exfat': CROSS, 'ntfs': CROSS,
+    'ntfs3': CROSS, 'fuseblk': CROSS, 'hfsplus': CROSS, 'apfs': CROSS, 'tmpfs': CROSS, 'ramfs': CROSS,
+    'overlay': CROSS, 'squashfs': CROSS, 'iso9660': CROSS, 'udf': CROSS,
+    # Kernel and pseudo file systems: sizes are meaningless and some reads block
+    'proc': SKIP, 'sysfs': SKIP, 'devtmpfs': SKIP, 'devpts': SKIP, 'cgroup': SKIP, 'cgroup2': SKIP,
+    'debugfs': SKIP, 'tracefs': SKIP, 'securityfs': SKIP, 'pstore': SKIP, 'bpf': SKIP,
+    'autofs': SKIP, 'mqueue': SKIP, 'hugetlbfs': SKIP, 'configfs': SKIP, 'fusectl': SKIP,
+    'binfmt_misc': SKIP, 'efivarfs': SKIP, 'nsfs': SKIP, 'rpc_pipefs': SKIP,
+    # Network file systems: every listing is a round trip
+    'nfs': BUDGET, 'nfs4': BUDGET, 'cifs': BUDGET, 'smb3': BUDGET, 'smbfs': BUDGET, '9p': BUDGET,
+    'afs': BUDGET, 'ceph': BUDGET, 'glusterfs': BUDGET, 'davfs': BUDGET, 'fuse.sshfs': BUDGET,
+    'vboxsf': BUDGET,
+    # Other FUSE file systems (cloud drives, archive mounts) can be huge and slow
+    'fuse': SAMPLE,
+}
+# Unknown types (and every mount on platforms without a mount table) are scanned normally
+DEFAULT_POLICY = CROSS
+
+
+MountTable = Tuple[Dict[int, str], Dict[str, str]]
+
+# The parsed table is kept until the kernel reports a mount change: polling the
+# open mountinfo file returns POLLPRI after anything is mounted or unmounted
+_table_lock = threading.Lock()
+_table: Optional[MountTable] = None
+_mountinfo: Optional[IO[str]] = None
+_changes: Optional['select.poll'] = None
+_read_at = 0.0
+_REFRESH_AFTER = 2.0   # Seconds a table is trusted where changes cannot be polled
+
+
+def _mount_table() -> MountTable:
+    """({st_dev: fs type}, {mount point: fs type}) from /proc/self/mountinfo; empty elsewhere
+
+    Parsed once and re-read only after the mount set changed, so this is
+    cheap enough to call for every path.
+    """
+    global _table, _read_at
+    with _table_lock:
+        if _table is None or _mounts_changed():
+            _table = _read_mount_table()
+            _read_at = time.monotonic()
+        return _table
+
+
+def _mounts_changed() -> bool:
+    if _mountinfo is None:
+        return False  # No mount table on this platform: nothing to refresh
+    if _changes is None:
+        return time.monotonic() - _read_at >= _REFRESH_AFTER
+    return bool(_changes.poll(0))
+
+
+def _read_mount_table() -> MountTable:
+    global _mountinfo, _changes
+    devices: Dict[int, str] = {}
+    points: Dict[str, str] = {}
+    try:
+        if _mountinfo is None:
+            _mountinfo = open('/proc/self/mountinfo', encoding='utf-8', errors='replace')
+            if hasattr(select, 'poll'):
+                _changes = select.poll()
+                _changes.register(_mountinfo, select.POLLPRI)
+                _changes.poll(0)  # Consume the event pending since open
+        _mountinfo.seek(0)
+        for line in _mountinfo:
+            # id parent major:minor root mount-point options [optional...] - type source ...
+            head, _, tail = line.partition(' - ')
+            fields, rest = head.split(), tail.split()
+            if len(fields) < 5 or not rest:
+                continue
+            major, _, minor = fields[2].partition(':')
+            mount_point = fields[4].replace('\\040', ' ')
+            try:
+                devices[os.makedev(int(major), int(minor))] = rest[0]
+            except ValueError:
+                pass
+            points[mount_point] = rest[0]
+    except OSError:
+        pass
+    return devices, points
+
+
+def mount_point(path: str) -> str:
+    """Mount point holding path, from the mount table only (path itself is never touched)
+
+    Without a mount table the drive or UNC share is used on Windows, and
+    the first two levels of the path elsewhere (e.g. /Volumes/share).
+    """
+    points = _mount_table()[1]
+    if not points:
+        drive = os.path.splitdrive(path)[0]
+        return drive or os.sep.join(path.split(os.sep)[:3]) or os.sep
+    best = ''
+    for point in points:
+        if (path == point or path.startswith(point.rstrip('/') + '/')) and len(point) > len(best):
+            best = point
+    return best or '/'
+
+
+def fs_type(path: str) -> str:
+    """File system type of the mount holding path ('' if unknown)"""
+    return _mount_table()[1].get(mount_point(path), '')
+
+
+def _entry_dev(entry: os.DirEntry) -> int:
+    dev = entry.stat(follow_symlinks=False).st_dev
+    return dev or os.lstat(entry.path).st_dev  # DirEntry.stat leaves st_dev 0 on Windows
+
+
+class MountPolicies:
+    """Per-file-system scan policies for folder sizing
+
+    policy_for maps a folder (and its st_dev) to the policy of its file
+    system type; types are looked up once per device in the mount table.
+    Scans only ask where st_dev changes from a folder to its child, so the
+    file system a scan starts on is always crossed.
+    measure sizes a folder under a non-CROSS policy and reports how
+    complete the result is (EXACT, LOWER_BOUND or ESTIMATE). It never
+    leaves the folder's own file system: other devices met below it are
+    left out and make the result a lower bound.
+    """
+
+    TIME_BUDGET = 2.0    # Seconds a BUDGET or SAMPLE folder may be scanned
+    SAMPLE_DIRS = 200    # Folders listed before a SAMPLE folder is extrapolated
+
+    def __init__(self, overrides: Optional[Dict[str, str]] = None):
+        self.policies = dict(FS_POLICIES)
+        self.policies.update(overrides or {})
+        self._lock = threading.Lock()
+        self._types: Dict[int, str] = {}   # st_dev -> fs type
+
+    def policy_for(self, path: str, dev: int) -> str:
+        """Policy for a folder on device dev"""
+        with self._lock:
+            kind = self._types.get(dev)
+        if kind is None:
+            kind = _mount_table()[0].get(dev) or fs_type(path)
+            with self._lock:
+                self._types[dev] = kind
+        policy = self.policies.get(kind)
+        if policy is None and kind.startswith('fuse.'):
+            policy = self.policies.get('fuse')
+        return policy or DEFAULT_POLICY
+
+    def measure(self, path: str, dev: int,
+                is_cancelled: Optional[Callable[[], bool]] = None,
+                rules: Optional[ExclusionRules] = None) -> Optional[Tuple[int, int]]:
+        """(bytes, completeness) of the tree at path under its policy and rules; None if cancelled"""
+        policy = self.policy_for(path, dev)
+        if policy == SKIP:
+            return 0, LOWER_BOUND
+        deadline = time.monotonic() + self.TIME_BUDGET if policy in (BUDGET, SAMPLE) else None
+        max_dirs = self.SAMPLE_DIRS if policy == SAMPLE else None
+        t0 = time.monotonic()
+        result = self._walk(path, dev, deadline, max_dirs, is_cancelled, rules)
+        if result is not None and result[1] != EXACT:
+            logger.debug(f"{policy} policy for {path}: {result[0]:,} bytes "
+                         f"({'estimate' if result[1] == ESTIMATE else 'lower bound'}) "
+                         f"in {time.monotonic() - t0:.1f}s")
+        return result
+
+    @staticmethod
+    def _walk(root: str, dev: int, deadline: Optional[float], max_dirs: Optional[int],
+              is_cancelled: Optional[Callable[[], bool]],
+              rules: Optional[ExclusionRules] = None) -> Optional[Tuple[int, int]]:
+        """Sum file sizes breadth first within one device
+
+        Stops at the deadline (lower bound) or, when max_dirs is given,
+        after listing that many folders; the folders still queued are then
+        assumed to hold the average of those listed (estimate).
+        """
+        total = 0
+        listed = 0
+        completeness = EXACT
+        queue = deque([root])
+        while queue:
+            if is_cancelled is not None and is_cancelled():
+                return None
+            if max_dirs is not None and listed >= max_dirs:
+                total += total * len(queue) // listed
+                return total, ESTIMATE
+            if deadline is not None and time.monotonic() >= deadline:
+                if max_dirs is not None and listed:
+                    total += total * len(queue) // listed
+                    return total, ESTIMATE
+                return total, LOWER_BOUND
+            path = queue.popleft()
+            listed += 1
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                            if rules and rules.excludes(entry.path, is_dir, entry.name):
+                                continue
+                            if is_dir:
+                                if _entry_dev(entry) == dev:
+                                    queue.append(entry.path)
+                                else:
+                                    completeness = LOWER_BOUND  # Nested mount left out
+                            else:
+                                total += entry.stat(follow_symlinks=False).st_size
+                        except OSError:
+                            pass
+            except OSError as e:
+                logger.debug(f"Cannot scan {path}: {e}")
+        return total, completeness
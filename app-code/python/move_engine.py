@@ -0,0 +1,310 @@
+"""
+Move Engine for File Explorer
+Same-device moves by rename; cross-device moves as a journaled,
+per-file copy-verify-delete stream that can be resumed or rolled back
+"""
+
+import errno
+import json
+import logging
+import os
+import shutil
+import stat
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Callable, List, NamedTuple, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Suffix of a file that is still being copied into place
+PARTIAL_SUFFIX = '.partial-move'
+
+
+class MoveJournal(NamedTuple):
+    """An unfinished cross-device move recorded on disk"""
+    path: Path        # Journal file
+    source: str
+    target: str
+    started: str      # ISO timestamp
+
+
+class MoveEngine:
+    """Move files and folders safely, across file systems too
+
+    A move within one device is a single os.rename. Across devices every
+    file is copied to '<name>.partial-move', its size is verified, it is
+    flushed to disk and renamed into place, and only then is the source
+    file deleted. The tree therefore always holds every file exactly once
+    in full (in the source, the target or both), never a half-written one
+    under its real name.
+
+    While a cross-device move runs, a small journal with its source and
+    target is kept in journal_dir, and every source file is appended to a
+    '.done' list beside it once its copy is in place. If the move is
+    interrupted (cancel, crash, power loss) the journal survives and
+    resume() finishes the move or rollback() streams the moved files back
+    to the source. Only resume() trusts a file already in the target, and
+    only one the .done list names; every other file is copied again.
+    """
+
+    def __init__(self, file_ops, journal_dir: Optional[Path] = None):
+        """
+        Args:
+            file_ops: FileOperations used to copy file data
+            journal_dir: Where to keep journals of unfinished moves (None: no journal)
+        """
+        self.file_ops = file_ops
+        self.journal_dir = Path(journal_dir) if journal_dir is not None else None
+        if self.journal_dir is not None:
+            self.journal_dir.mkdir(parents=True, exist_ok=True)
+
+    # ==================== PUBLIC API ====================
+
+    def move(self, source: str, target: str,
+             on_file: Optional[Callable[[str], None]] = None,
+             progress: Optional[Callable[[int], None]] = None,
+             replace: bool = False) -> bool:
+        """Move source to target
+
+        Args:
+            on_file: Called with each source file once it has been moved
+            progress: Called with byte counts while file data is copied;
+                      on_file and progress may raise to interrupt the move
+            replace: Overwrite an existing target of the same type (a folder
+                     is merged into, replacing files with the same name);
+                     otherwise an existing target raises FileExistsError
+
+        Returns:
+            True if it was an O(1) rename, False if the data was streamed
+        """
+        if os.path.lexists(target):
+            if not replace:
+                raise FileExistsError(errno.EEXIST, "Destination already exists", target)
+            return self._move_over(source, target, on_file, progress)
+        if self.same_device(source, target):
+            try:
+                os.rename(source, target)
+                return True
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                # Same st_dev but still EXDEV (bind mounts, overlayfs): stream it
+
+        journal = self._write_journal(source, target)
+        self._stream(source, target, on_file, progress, journal=journal)
+        self._remove_journal(journal)
+        logger.info(f"Moved {source} -> {target} across devices")
+        return False
+
+    def pending(self) -> List[MoveJournal]:
+        """Journals of moves that did not finish"""
+        if self.journal_dir is None:
+            return []
+        journals = []
+        for path in sorted(self.journal_dir.glob('move-*.json')):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                journals.append(MoveJournal(path, data['source'], data['target'], data.get('started', '')))
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable move journal {path}: {e}")
+        return journals
+
+    def resume(self, journal: MoveJournal,
+               on_file: Optional[Callable[[str], None]] = None,
+               progress: Optional[Callable[[int], None]] = None) -> None:
+        """Finish an interrupted move: stream whatever is left in the source
+
+        Sources the journal lists as done were already copied into place;
+        they are only deleted.
+        """
+        if os.path.lexists(journal.source):
+            self._stream(journal.source, journal.target, on_file, progress,
+                         journal=journal.path, finished=self._finished(journal.path))
+        self._remove_journal(journal.path)
+        logger.info(f"Resumed move {journal.source} -> {journal.target}")
+
+    def rollback(self, journal: MoveJournal,
+                 on_file: Optional[Callable[[str], None]] = None,
+                 progress: Optional[Callable[[int], None]] = None) -> None:
+        """Undo an interrupted move: stream the moved files back to the source"""
+        if os.path.lexists(journal.target):
+            self._stream(journal.target, journal.source, on_file, progress, drop_partials=True)
+        self._remove_journal(journal.path)
+        logger.info(f"Rolled back move {journal.source} -> {journal.target}")
+
+    @staticmethod
+    def same_device(source: str, target: str) -> bool:
+        """True if source and the folder that will hold target are on one device"""
+        try:
+            return os.lstat(source).st_dev == os.stat(os.path.dirname(os.path.abspath(target))).st_dev
+        except OSError:
+            return False
+
+    def _move_over(self, source: str, target: str,
+                   on_file: Optional[Callable[[str], None]],
+                   progress: Optional[Callable[[int], None]]) -> bool:
+        """Move source onto an existing target of the same type"""
+        same_device = self.same_device(source, target)
+        if same_device and not os.path.isdir(target):
+            os.replace(source, target)
+            return True
+        # Folders are merged file by file; renames only if on one device
+        journal = None if same_device else self._write_journal(source, target)
+        self._stream(source, target, on_file, progress, rename=same_device, journal=journal)
+        self._remove_journal(journal)
+        logger.info(f"Moved {source} over {target}")
+        return False
+
+    # ==================== STREAMING ====================
+
+    def _stream(self, src_root: str, dst_root: str,
+                on_file: Optional[Callable[[str], None]],
+                progress: Optional[Callable[[int], None]],
+                drop_partials: bool = False, rename: bool = False,
+                journal: Optional[Path] = None, finished: Optional[Set[str]] = None) -> None:
+        """Move every file of src_root into dst_root, then remove the emptied folders
+
+        Folders already present in dst_root are merged into, so the same
+        call finishes a partially moved tree. With rename (same device)
+        files are renamed instead of copied. With a journal, each copied
+        source is recorded in its .done list before it is deleted; sources
+        in finished are deleted without copying if the target is in place.
+        """
+        done = open(self._done_path(journal), 'a', encoding='utf-8') if journal is not None else None
+        try:
+            self._stream_entries(src_root, dst_root, on_file, progress, drop_partials, rename,
+                                 done, finished)
+        finally:
+            if done is not None:
+                done.close()
+
+    def _stream_entries(self, src_root: str, dst_root: str,
+                        on_file: Optional[Callable[[str], None]],
+                        progress: Optional[Callable[[int], None]],
+                        drop_partials: bool, rename: bool,
+                        done: Optional[IO[str]], finished: Optional[Set[str]]) -> None:
+        st = os.lstat(src_root)
+        if not stat.S_ISDIR(st.st_mode):
+            self._move_file(src_root, dst_root, st, progress, rename, done, finished)
+            if on_file is not None:
+                on_file(src_root)
+            return
+
+        dirs = []  # Pre-order: parents before children
+        stack = [(src_root, dst_root)]
+        while stack:
+            src_dir, dst_dir = stack.pop()
+            os.makedirs(dst_dir, exist_ok=True)
+            dirs.append((src_dir, dst_dir))
+            with os.scandir(src_dir) as it:
+                entries = list(it)
+            for entry in entries:
+                dst = os.path.join(dst_dir, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, dst))
+                    continue
+                if drop_partials and entry.name.endswith(PARTIAL_SUFFIX):
+                    os.unlink(entry.path)  # Incomplete copy from the interrupted move
+                    continue
+                self._move_file(entry.path, dst, entry.stat(follow_symlinks=False), progress, rename,
+                                done, finished)
+                if on_file is not None:
+                    on_file(entry.path)
+
+        # Children before parents: restore folder metadata and drop the emptied sources
+        for src_dir, dst_dir in reversed(dirs):
+            try:
+                shutil.copystat(src_dir, dst_dir, follow_symlinks=False)
+            except OSError:
+                pass
+            os.rmdir(src_dir)
+
+    def _move_file(self, src: str, dst: str, st: os.stat_result,
+                   progress: Optional[Callable[[int], None]], rename: bool = False,
+                   done: Optional[IO[str]] = None, finished: Optional[Set[str]] = None) -> None:
+        """Copy, verify and flush one file (or symlink), then delete the source"""
+        if rename:
+            os.replace(src, dst)
+            if progress is not None:
+                progress(st.st_size)
+            return
+        if stat.S_ISLNK(st.st_mode):
+            if os.path.lexists(dst):
+                os.unlink(dst)
+            os.symlink(os.readlink(src), dst)
+            os.unlink(src)
+            return
+
+        if finished is not None and os.path.abspath(src) in finished:
+            try:
+                if os.lstat(dst).st_size == st.st_size:
+                    # Copied by the interrupted run, which stopped before deleting the source
+                    os.unlink(src)
+                    return
+            except FileNotFoundError:
+                pass
+
+        partial = dst + PARTIAL_SUFFIX
+        self.file_ops.copy_file(src, partial, progress)
+        copied = os.stat(partial).st_size
+        if copied != st.st_size:
+            os.unlink(partial)
+            raise OSError(errno.EIO, f"Copy verification failed ({copied} of {st.st_size} bytes)", src)
+        fd = os.open(partial, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(partial, dst)
+        if done is not None:
+            done.write(os.path.abspath(src) + '\n')
+            done.flush()
+            os.fsync(done.fileno())
+        os.unlink(src)
+
+    # ==================== JOURNAL ====================
+
+    def _write_journal(self, source: str, target: str) -> Optional[Path]:
+        if self.journal_dir is None:
+            return None
+        path = self.journal_dir / f"move-{time.time_ns()}-{os.getpid()}.json"
+        data = {'source': os.path.abspath(source), 'target': os.path.abspath(target),
+                'started': datetime.now().isoformat()}
+        fd, tmp = tempfile.mkstemp(dir=str(self.journal_dir), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        return path
+
+    @staticmethod
+    def _done_path(journal: Path) -> Path:
+        """Where a journal lists the source files already copied into place"""
+        return journal.with_suffix('.done')
+
+    def _finished(self, journal: Path) -> Set[str]:
+        try:
+            with open(self._done_path(journal), 'r', encoding='utf-8') as f:
+                return {line.rstrip('\n') for line in f if line.endswith('\n')}
+        except FileNotFoundError:
+            return set()
+
+    def _remove_journal(self, path: Optional[Path]) -> None:
+        if path is None:
+            return
+        for stale in (path, self._done_path(path)):
+            try:
+                stale.unlink()
+            except FileNotFoundError:
+                pass
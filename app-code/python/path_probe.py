@@ -0,0 +1,163 @@
+"""
+Path Probe for File Explorer
+Stat calls with deadlines, and memory of mounts that stopped answering
+"""
+
+import errno
+import logging
+import os
+import stat
+import threading
+import time
+from typing import Dict, Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from mount_policy import mount_point
+
+logger = logging.getLogger(__name__)
+
+
+class PathUnresponsive(OSError):
+    """The mount holding a path did not answer in time, or is known not to"""
+
+    def __init__(self, path: str, mount: str):
+        super().__init__(errno.ETIMEDOUT, f"Not responding ({mount})", path)
+        self.mount = mount
+
+
+class _MountState:
+    """Circuit breaker state of one unresponsive mount"""
+
+    __slots__ = ('stuck', 'retry_at')
+
+    def __init__(self):
+        self.stuck = 0        # Probes that timed out and are still blocked in the kernel
+        self.retry_at = 0.0   # Monotonic time before which the mount is not probed again
+
+
+class PathProbe(QObject):
+    """Run stat calls on throwaway threads and give up after a deadline
+
+    A stat into a dead network share can block for minutes and cannot be
+    interrupted, so each probe runs on its own daemon thread and the
+    caller waits at most TIMEOUT seconds. When a probe times out, the mount
+    point holding the path (looked up in the mount table, without touching
+    the path) is remembered as unresponsive: further probes into it fail at
+    once with PathUnresponsive while a timed-out probe is still blocked, and
+    for at least RETRY_AFTER seconds. After that the next probe tries again.
+
+    Methods may be called from any thread.
+    """
+
+    # mount point that stopped answering
+    unresponsive = pyqtSignal(str)
+    # mount point whose blocked probes all returned
+    recovered = pyqtSignal(str)
+
+    TIMEOUT = 1.5          # Seconds a caller waits for one stat
+    RETRY_AFTER = 30.0     # Seconds an unresponsive mount fails fast
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._mounts: Dict[str, _MountState] = {}
+
+    # ==================== PUBLIC API ====================
+
+    def stat(self, path: str, timeout: Optional[float] = None) -> os.stat_result:
+        """os.stat(path) with a deadline
+
+        Raises:
+            PathUnresponsive: The mount did not answer in time, or is known not to
+            OSError: Whatever os.stat raised (e.g. FileNotFoundError)
+        """
+        mount = mount_point(path)
+        if self._failing(mount):
+            raise PathUnresponsive(path, mount)
+
+        done = threading.Event()
+        outcome: Dict[str, object] = {}
+        call_lock = threading.Lock()
+
+        def run() -> None:
+            try:
+                outcome['result'] = os.stat(path)
+            except OSError as e:
+                outcome['error'] = e
+            with call_lock:
+                done.set()
+                late = outcome.get('timed_out', False)
+            if late:
+                self._probe_returned(mount)
+
+        threading.Thread(target=run, name='PathProbe', daemon=True).start()
+        done.wait(self.TIMEOUT if timeout is None else timeout)
+        with call_lock:
+            if not done.is_set():
+                outcome['timed_out'] = True
+        if outcome.get('timed_out'):
+            self._probe_timed_out(path, mount)
+            raise PathUnresponsive(path, mount)
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['result']
+
+    def exists(self, path: str, timeout: Optional[float] = None) -> Optional[bool]:
+        """True/False like os.path.exists, or None if the mount did not answer"""
+        try:
+            self.stat(path, timeout)
+            return True
+        except PathUnresponsive:
+            return None
+        except (OSError, ValueError):
+            return False
+
+    def isdir(self, path: str, timeout: Optional[float] = None) -> Optional[bool]:
+        """True/False like os.path.isdir, or None if the mount did not answer"""
+        try:
+            return stat.S_ISDIR(self.stat(path, timeout).st_mode)
+        except PathUnresponsive:
+            return None
+        except (OSError, ValueError):
+            return False
+
+    def is_unresponsive(self, path: str) -> bool:
+        """True if path is on a mount that currently fails fast (no file system access)"""
+        return self._failing(mount_point(path))
+
+    # ==================== BREAKER ====================
+
+    def _failing(self, mount: str) -> bool:
+        with self._lock:
+            state = self._mounts.get(mount)
+            if state is None:
+                return False
+            if state.stuck or time.monotonic() < state.retry_at:
+                return True
+            del self._mounts[mount]  # Cool-down over: let the next probe through
+            return False
+
+    def _probe_timed_out(self, path: str, mount: str) -> None:
+        with self._lock:
+            state = self._mounts.get(mount)
+            opened = state is None
+            if opened:
+                state = self._mounts[mount] = _MountState()
+            state.stuck += 1
+            state.retry_at = time.monotonic() + self.RETRY_AFTER
+        if opened:
+            logger.warning(f"{mount} is not responding (stat of {path} took over {self.TIMEOUT}s)")
+            self.unresponsive.emit(mount)
+
+    def _probe_returned(self, mount: str) -> None:
+        """A timed-out probe finally came back (on its own thread)"""
+        with self._lock:
+            state = self._mounts.get(mount)
+            if state is None:
+                return
+            state.stuck -= 1
+            if state.stuck:
+                return
+        logger.info(f"{mount} answered again")
+        self.recovered.emit(mount)
@@ -0,0 +1,174 @@
+"""
+Scan Exclusions for File Explorer
+gitignore-style rules for folders and files that recursive scans leave out
+"""
+
+import os
+import re
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+# Bulky trees that say little about where the space went
+DEFAULT_EXCLUSIONS = (
+    '.git/',
+    '.hg/',
+    '.svn/',
+    'node_modules/',
+    '__pycache__/',
+    '.venv/',
+    'venv/',
+    '.tox/',
+    '.mypy_cache/',
+    '.pytest_cache/',
+)
+
+_FLAGS = re.IGNORECASE if os.name == 'nt' else 0
+
+
+def _glob_to_regex(glob: str) -> str:
+    """Translate one gitignore glob into a regex ('*' and '?' stop at '/', '**' does not)"""
+    out = []
+    i, n = 0, len(glob)
+    while i < n:
+        c = glob[i]
+        if c == '*':
+            if glob.startswith('**', i):
+                i += 2
+                if i < n and glob[i] == '/':
+                    out.append('(?:.*/)?')  # Zero or more folders
+                    i += 1
+                else:
+                    out.append('.*')
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = glob.find(']', i + 2 if glob.startswith('[!', i) or glob.startswith('[]', i) else i + 1)
+            if end < 0:
+                out.append(re.escape(c))
+            else:
+                body = glob[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(glob[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+class _Rule:
+    """One compiled pattern line"""
+
+    __slots__ = ('regex', 'on_path', 'dir_only', 'negate')
+
+    def __init__(self, line: str):
+        self.negate = line.startswith('!')
+        if self.negate:
+            line = line[1:]
+        elif line.startswith('\\'):
+            line = line[1:]  # \# and \! stand for a literal first character
+        self.dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        absolute = line.startswith('/') or bool(os.path.splitdrive(line)[0])
+        # Patterns without a slash match a name at any depth; others match a path
+        self.on_path = absolute or '/' in line
+        body = _glob_to_regex(line)
+        if not self.on_path:
+            self.regex = f'^{body}$'
+        elif absolute:
+            self.regex = f'^{body}$'
+        else:
+            self.regex = f'(?:^|/){body}$'
+
+
+class ExclusionRules:
+    """Compiled exclusion patterns, one gitignore-style glob per line
+
+    - Blank lines and lines starting with # are ignored.
+    - A trailing / matches folders only; ! re-includes what an earlier line
+      excluded (the last matching line wins).
+    - A pattern without a slash matches a file or folder name at any depth
+      (e.g. node_modules/, *.pyc); '*' and '?' do not cross '/', '**' does.
+    - A pattern with a slash matches the end of a path (build/cache/), or
+      the whole path when it starts with / or a drive (/home/me/Downloads/).
+      Unlike a .gitignore there is no file to anchor to, so relative paths
+      match below any folder.
+
+    Scans prune an excluded folder before listing it, so nothing below it
+    can be re-included. Instances are immutable and may be shared between
+    threads.
+    """
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        lines: List[str] = []
+        for line in patterns:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                lines.append(line.replace(os.sep, '/') if os.sep != '/' else line)
+        self.patterns: Tuple[str, ...] = tuple(lines)
+        rules = [_Rule(line) for line in lines]
+        self._ordered: Optional[List[Tuple[Pattern[str], bool, bool, bool]]] = None
+        if any(rule.negate for rule in rules):
+            self._ordered = [(re.compile(rule.regex, _FLAGS), rule.on_path, rule.dir_only, rule.negate)
+                             for rule in reversed(rules)]
+        # Without negations every kind of rule collapses into one alternation
+        self._name_files = self._combine(r for r in rules if not r.on_path and not r.dir_only)
+        self._name_dirs = self._combine(r for r in rules if not r.on_path)
+        self._path_files = self._combine(r for r in rules if r.on_path and not r.dir_only)
+        self._path_dirs = self._combine(r for r in rules if r.on_path)
+
+    @staticmethod
+    def _combine(rules: Iterable[_Rule]) -> Optional[Pattern[str]]:
+        parts = [f'(?:{rule.regex})' for rule in rules]
+        return re.compile('|'.join(parts), _FLAGS) if parts else None
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, ExclusionRules) and other.patterns == self.patterns
+
+    def __hash__(self) -> int:
+        return hash(self.patterns)
+
+    def excludes(self, path: str, is_dir: bool, name: Optional[str] = None) -> bool:
+        """True if the file or folder at path is excluded (its parents are not checked)
+
+        name may be passed when already known (e.g. DirEntry.name).
+        """
+        if not self.patterns:
+            return False
+        if name is None:
+            name = os.path.basename(path.rstrip('/\\')) or path
+        if os.sep != '/':
+            path = path.replace(os.sep, '/')
+        if self._ordered is not None:
+            for regex, on_path, dir_only, negate in self._ordered:
+                if dir_only and not is_dir:
+                    continue
+                if regex.search(path) if on_path else regex.match(name):
+                    return not negate
+            return False
+        names = self._name_dirs if is_dir else self._name_files
+        if names is not None and names.match(name):
+            return True
+        paths = self._path_dirs if is_dir else self._path_files
+        return paths is not None and paths.search(path) is not None
+
+    def excludes_tree(self, folder: str) -> bool:
+        """True if folder or any folder above it is excluded"""
+        if not self.patterns:
+            return False
+        folder = os.path.abspath(folder)
+        while True:
+            if self.excludes(folder, True):
+                return True
+            parent = os.path.dirname(folder)
+            if parent == folder:
+                return False
+            folder = parent
@@ -0,0 +1,143 @@
+"""
+Search Results Dialog for Liquid Glass File Explorer
+Non-modal list of name or content search hits that can be filled incrementally
+"""
+
+import os
+from datetime import datetime
+from typing import Iterable
+
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
+                            QPushButton, QTreeWidget, QTreeWidgetItem, QHeaderView)
+from PyQt6.QtCore import Qt, pyqtSignal
+
+from content_search import ContentMatch
+from file_index import IndexEntry
+
+
+class SearchResultsDialog(QDialog):
+    """Window listing search hits
+
+    Name searches list name, folder, size and date modified; content
+    searches list name, folder, line number and the matching line.
+    Results can be replaced at once (set_results) or appended as they
+    stream in (add_results / add_matches); while a search runs the list
+    is left unsorted and is sorted once when it ends (set_status without
+    running). Double-clicking a hit emits open_requested.
+    """
+
+    NAME_COLUMNS = ["Name", "Folder", "Size", "Date Modified"]
+    CONTENT_COLUMNS = ["Name", "Folder", "Line", "Text"]
+
+    open_requested = pyqtSignal(str)   # Path of the activated hit
+    stop_requested = pyqtSignal()      # The running search should be cancelled
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setModal(False)
+        self.init_ui()
+
+    def init_ui(self):
+        """Initialize the results UI"""
+        self.setWindowTitle("🔍 Search Results")
+        self.setMinimumSize(700, 420)
+
+        layout = QVBoxLayout(self)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        self.results = QTreeWidget()
+        self.results.setHeaderLabels(self.NAME_COLUMNS)
+        self.results.setRootIsDecorated(False)
+        self.results.setUniformRowHeights(True)
+        self.results.setSortingEnabled(True)
+        self.results.header().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.results.itemDoubleClicked.connect(
+            lambda item, column: self.open_requested.emit(item.data(0, Qt.ItemDataRole.UserRole)))
+        layout.addWidget(self.results)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+
+        self.stop_btn = QPushButton("⏹ Stop")
+        self.stop_btn.clicked.connect(self.stop_requested.emit)
+        button_layout.addWidget(self.stop_btn)
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        button_layout.addWidget(close_btn)
+
+        layout.addLayout(button_layout)
+
+    def start(self, title: str, content: bool = False):
+        """Clear the list for a new name (or content) search"""
+        self.setWindowTitle(f"🔍 {title}")
+        self.results.clear()
+        self.results.setSortingEnabled(False)
+        self.results.setHeaderLabels(self.CONTENT_COLUMNS if content else self.NAME_COLUMNS)
+        self.set_status("Searching…", running=True)
+
+    def set_status(self, text: str, running: bool = False):
+        self.status_label.setText(text)
+        self.stop_btn.setEnabled(running)
+        if not running:
+            self.results.setSortingEnabled(True)  # The search is over: sort once
+
+    def set_results(self, entries: Iterable[IndexEntry]):
+        """Replace the list with entries"""
+        self.results.clear()
+        self.add_results(entries)
+
+    def add_results(self, entries: Iterable[IndexEntry]):
+        """Append entries"""
+        self._insert(self._entry_item(entry) for entry in entries)
+
+    def add_matches(self, matches: Iterable[ContentMatch]):
+        """Append content search hits"""
+        items = []
+        for match in matches:
+            item = QTreeWidgetItem([
+                os.path.basename(match.path),
+                os.path.dirname(match.path),
+                "",
+                match.text.strip(),
+            ])
+            item.setData(2, Qt.ItemDataRole.DisplayRole, match.line)  # Sorts numerically
+            item.setData(0, Qt.ItemDataRole.UserRole, match.path)
+            item.setToolTip(0, match.path)
+            item.setToolTip(3, match.text)
+            items.append(item)
+        self._insert(items)
+
+    def _insert(self, items: Iterable[QTreeWidgetItem]):
+        """Add items; a finished (sorted) list is re-sorted once per call"""
+        sorting = self.results.isSortingEnabled()
+        self.results.setSortingEnabled(False)
+        self.results.addTopLevelItems(list(items))
+        self.results.setSortingEnabled(sorting)
+
+    def _entry_item(self, entry: IndexEntry) -> QTreeWidgetItem:
+        item = QTreeWidgetItem([
+            os.path.basename(entry.path),
+            os.path.dirname(entry.path),
+            "" if entry.is_dir else self._format_size(entry.size),
+            datetime.fromtimestamp(entry.mtime).strftime('%Y-%m-%d %H:%M') if entry.mtime else "",
+        ])
+        item.setData(0, Qt.ItemDataRole.UserRole, entry.path)
+        item.setToolTip(0, entry.path)
+        return item
+
+    def count(self) -> int:
+        return self.results.topLevelItemCount()
+
+    @staticmethod
+    def _format_size(size: int) -> str:
+        if size < 1024:
+            return f"{size} bytes"
+        value = float(size)
+        for unit in ('KB', 'MB', 'GB', 'TB'):
+            value /= 1024
+            if value < 1024 or unit == 'TB':
+                break
+        return f"{value:.1f} {unit}"
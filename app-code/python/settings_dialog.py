@@ -6,10 +6,12 @@ Provides in-app configuration options
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
                             QPushButton, QComboBox, QSpinBox, QCheckBox,
                             QGroupBox, QSlider, QTabWidget, QWidget,
-                            QColorDialog, QFontDialog)
+                            QColorDialog, QFontDialog, QPlainTextEdit)
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont
 
+from scan_exclusions import DEFAULT_EXCLUSIONS
+
 
 class SettingsDialog(QDialog):
     """Settings dialog with multiple configuration tabs"""
@@ -304,6 +306,41 @@ class SettingsDialog(QDialog):
         dev_group.setLayout(dev_layout)
         layout.addWidget(dev_group)
         
+        # Search index
+        index_group = QGroupBox("Search Index")
+        index_layout = QVBoxLayout()
+        
+        index_label = QLabel("Folders to keep indexed for instant search (one per line):")
+        index_label.setWordWrap(True)
+        index_layout.addWidget(index_label)
+        
+        self.index_roots_edit = QPlainTextEdit()
+        self.index_roots_edit.setPlaceholderText("e.g. /home/me/Projects")
+        self.index_roots_edit.setMaximumHeight(80)
+        index_layout.addWidget(self.index_roots_edit)
+        
+        index_group.setLayout(index_layout)
+        layout.addWidget(index_group)
+        
+        # Scan exclusions
+        exclusions_group = QGroupBox("Scan Exclusions")
+        exclusions_layout = QVBoxLayout()
+        
+        exclusions_label = QLabel(
+            "Skipped by folder sizes, search in files and the search index "
+            "(gitignore-style patterns, one per line; a trailing / matches folders only, "
+            "! re-includes):")
+        exclusions_label.setWordWrap(True)
+        exclusions_layout.addWidget(exclusions_label)
+        
+        self.scan_exclusions_edit = QPlainTextEdit()
+        self.scan_exclusions_edit.setPlaceholderText("e.g. node_modules/\n*.tmp\n/home/me/Downloads/")
+        self.scan_exclusions_edit.setMaximumHeight(100)
+        exclusions_layout.addWidget(self.scan_exclusions_edit)
+        
+        exclusions_group.setLayout(exclusions_layout)
+        layout.addWidget(exclusions_group)
+        
         # Experimental
         exp_group = QGroupBox("Experimental Features")
         exp_layout = QVBoxLayout()
@@ -382,6 +419,13 @@ class SettingsDialog(QDialog):
         index = self.toolbar_style_combo.findData(toolbar_style)
         if index >= 0:
             self.toolbar_style_combo.setCurrentIndex(index)
+        
+        # Search index
+        self.index_roots_edit.setPlainText("\n".join(self.current_settings.get('index_roots', [])))
+        
+        # Scan exclusions
+        self.scan_exclusions_edit.setPlainText(
+            "\n".join(self.current_settings.get('scan_exclusions', DEFAULT_EXCLUSIONS)))
     
     def get_settings(self):
         """Get current settings from UI"""
@@ -414,6 +458,10 @@ class SettingsDialog(QDialog):
             # Advanced
             'debug_mode': self.debug_mode_checkbox.isChecked(),
             'show_file_extensions': self.show_file_extensions_checkbox.isChecked(),
+            'index_roots': [line.strip() for line in self.index_roots_edit.toPlainText().splitlines()
+                            if line.strip()],
+            'scan_exclusions': [line.strip() for line in self.scan_exclusions_edit.toPlainText().splitlines()
+                                if line.strip()],
         }
     
     def apply_settings(self):
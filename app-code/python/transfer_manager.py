@@ -0,0 +1,523 @@
+"""
+Transfer Manager for File Explorer
+Runs copy, move, trash and delete jobs on a worker thread with progress, pause and cancel
+"""
+
+import errno
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from PyQt6.QtCore import QObject, pyqtSignal
+from send2trash import send2trash
+
+from conflict_resolver import KEEP_BOTH, ConflictResolver
+from file_operations import FileOperations
+from move_engine import MoveEngine, MoveJournal
+
+logger = logging.getLogger(__name__)
+
+
+class TransferCancelled(Exception):
+    """Raised inside a worker when its job is cancelled"""
+
+
+class TransferStatus(NamedTuple):
+    """Immutable progress snapshot of one job, safe to hand to the UI thread"""
+    job_id: int
+    operation: str           # 'copy', 'move', 'rollback', 'trash' or 'delete'
+    destination: str         # Target folder ('' for trash and deletes)
+    state: str               # queued / running / paused / done / cancelled / failed
+    files_done: int
+    files_total: int
+    bytes_done: int
+    bytes_total: int
+    bytes_per_sec: float
+    files_per_sec: float
+    eta: Optional[float]     # Seconds remaining, None if unknown
+    current: str             # Item being transferred
+    errors: Tuple[Tuple[str, str], ...]  # (path, message) per failed item
+    queued: int              # Jobs waiting behind this one
+    skipped: int             # Items left out by the conflict policy
+
+
+class TransferJob:
+    """One paste (a list of sources into one destination folder) or delete"""
+
+    def __init__(self, job_id: int, operation: str, sources: List[str], destination: str,
+                 policy: str = KEEP_BOTH):
+        self.job_id = job_id
+        self.operation = operation
+        self.sources = list(sources)
+        self.destination = destination
+        self.policy = policy    # Conflict policy for the whole batch
+        self.state = 'queued'
+        self.recovery: Optional[Tuple[MoveJournal, str]] = None  # (journal, 'resume' | 'rollback')
+        self.cancelled = threading.Event()
+        self.files_total = 0
+        self.bytes_total = 0
+        self.files_done = 0
+        self.bytes_done = 0
+        self.current = ''
+        self.errors: List[Tuple[str, str]] = []
+        self.skipped = 0
+        self.measured: Dict[str, Tuple[int, int]] = {}  # source -> (files, bytes)
+        self.started = 0.0
+        self.rate_bytes = 0.0   # Smoothed bytes/s
+        self.rate_files = 0.0   # Smoothed files/s
+
+
+class TransferManager(QObject):
+    """Background queue for paste operations
+
+    Jobs run one at a time, in submission order, on a single worker thread,
+    so several pastes can be queued while the window stays responsive.
+    Each job first measures its sources, then copies file by file in chunks;
+    progress snapshots are emitted at most every PROGRESS_INTERVAL seconds
+    through queued signals. Pausing blocks the worker between chunks;
+    cancelling removes the partially written file and stops the job.
+    A failing item is recorded and the job carries on with the next one.
+
+    Name conflicts are settled per job by a ConflictResolver: the
+    destination is listed once and one policy (keep both, overwrite, skip,
+    keep newer) applies to the whole batch, so nothing is asked or probed
+    per item.
+
+    Permanent deletes run through DeleteEngine, which clears many folders
+    in parallel; progress counts removed files. Trash jobs group their
+    paths by device and hand them to send2trash TRASH_BATCH at a time;
+    progress counts trashed items.
+
+    Moves go through MoveEngine: a rename on the same device, otherwise a
+    journaled per-file stream. Interrupted moves are listed by
+    pending_moves() and can be queued again with submit_recovery().
+    """
+
+    # TransferStatus snapshots; emitted from the worker thread
+    progress = pyqtSignal(object)
+    finished = pyqtSignal(object)
+
+    PROGRESS_INTERVAL = 0.1   # Seconds between progress snapshots
+    RATE_SMOOTHING = 0.3      # Weight of the newest sample in the speed average
+    TRASH_BATCH = 256         # Paths per send2trash call (progress/cancel granularity)
+
+    def __init__(self, file_ops: Optional[FileOperations] = None, journal_dir=None,
+                 parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.file_ops = file_ops or FileOperations()
+        self.move_engine = MoveEngine(self.file_ops, journal_dir)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._queue: Deque[TransferJob] = deque()
+        self._active: Optional[TransferJob] = None
+        self._next_id = 1
+        self._resume = threading.Event()
+        self._resume.set()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        # Progress sampling for the active job
+        self._last_emit = 0.0
+        self._last_sample: Tuple[float, int, int] = (0.0, 0, 0)
+
+    # ==================== PUBLIC API ====================
+
+    def submit(self, operation: str, sources: List[str], destination: str,
+               policy: str = KEEP_BOTH) -> int:
+        """Queue a copy or move of sources into destination; returns the job id
+
+        policy decides what happens to names that already exist in the
+        destination (see conflict_resolver.POLICIES).
+        """
+        if operation not in ('copy', 'move'):
+            raise ValueError(f"Unknown transfer operation: {operation}")
+        job = self._enqueue(operation, sources, destination, policy=policy)
+        logger.info(f"Queued {operation} of {len(sources)} item(s) to {destination} "
+                    f"(job {job.job_id}, conflicts: {policy})")
+        return job.job_id
+
+    def submit_trash(self, paths: List[str]) -> int:
+        """Queue moving paths to the trash; returns the job id"""
+        job = self._enqueue('trash', paths, '')
+        logger.info(f"Queued trash of {len(paths)} item(s) (job {job.job_id})")
+        return job.job_id
+
+    def submit_delete(self, paths: List[str]) -> int:
+        """Queue a permanent delete of paths; returns the job id"""
+        job = self._enqueue('delete', paths, '')
+        logger.info(f"Queued permanent delete of {len(paths)} item(s) (job {job.job_id})")
+        return job.job_id
+
+    def pending_moves(self) -> List[MoveJournal]:
+        """Cross-device moves that were interrupted and not yet resumed or rolled back"""
+        with self._lock:
+            busy = [j.recovery[0].path for j in list(self._queue) + [self._active]
+                    if j is not None and j.recovery is not None]
+        return [j for j in self.move_engine.pending() if j.path not in busy]
+
+    def submit_recovery(self, journal: MoveJournal, action: str) -> int:
+        """Queue 'resume' (finish) or 'rollback' (undo) of an interrupted move"""
+        if action == 'resume':
+            job = self._enqueue('move', [journal.source], os.path.dirname(journal.target),
+                                (journal, action))
+        elif action == 'rollback':
+            job = self._enqueue('rollback', [journal.target], os.path.dirname(journal.source),
+                                (journal, action))
+        else:
+            raise ValueError(f"Unknown recovery action: {action}")
+        logger.info(f"Queued {action} of move {journal.source} -> {journal.target} (job {job.job_id})")
+        return job.job_id
+
+    def _enqueue(self, operation: str, sources: List[str], destination: str,
+                 recovery: Optional[Tuple[MoveJournal, str]] = None,
+                 policy: str = KEEP_BOTH) -> TransferJob:
+        with self._lock:
+            job = TransferJob(self._next_id, operation, sources, destination, policy)
+            job.recovery = recovery
+            self._next_id += 1
+            self._queue.append(job)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name='Transfers', daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+        return job
+
+    def pause(self) -> None:
+        """Pause the running job after its current chunk"""
+        self._resume.clear()
+        with self._lock:
+            job = self._active
+        if job is not None:
+            job.state = 'paused'
+            self.progress.emit(self._snapshot(job))
+
+    def resume(self) -> None:
+        """Continue a paused job"""
+        with self._lock:
+            job = self._active
+        if job is not None and job.state == 'paused':
+            job.state = 'running'
+        self._resume.set()
+
+    def is_paused(self) -> bool:
+        return not self._resume.is_set()
+
+    def cancel(self, job_id: Optional[int] = None) -> None:
+        """Cancel one job, or the running job and everything queued if job_id is None"""
+        with self._lock:
+            jobs = ([self._active] if self._active is not None else []) + list(self._queue)
+            if job_id is not None:
+                jobs = [j for j in jobs if j.job_id == job_id]
+            for job in jobs:
+                job.cancelled.set()
+        self._resume.set()  # A paused job must wake up to notice
+
+    def has_active_jobs(self) -> bool:
+        with self._lock:
+            return self._active is not None or bool(self._queue)
+
+    def shutdown(self) -> None:
+        """Cancel all jobs and let the worker exit"""
+        self.cancel()
+        with self._lock:
+            self._stopping = True
+            self._wakeup.notify()
+
+    # ==================== WORKER ====================
+
+    def _worker(self) -> None:
+        while True:
+            with self._lock:
+                while not self._queue and not self._stopping:
+                    self._wakeup.wait()
+                if self._stopping:
+                    return
+                job = self._queue.popleft()
+                self._active = job
+            try:
+                self._run_job(job)
+            except Exception as e:
+                logger.error(f"Transfer job {job.job_id} failed: {e}", exc_info=True)
+                job.errors.append((job.current, str(e)))
+                job.state = 'failed'
+            finally:
+                with self._lock:
+                    self._active = None
+            self.finished.emit(self._snapshot(job))
+
+    def _run_job(self, job: TransferJob) -> None:
+        if job.cancelled.is_set():
+            job.state = 'cancelled'
+            return
+        job.state = 'running' if self._resume.is_set() else 'paused'
+        job.started = time.monotonic()
+        self._last_emit = 0.0
+        self._last_sample = (job.started, 0, 0)
+        self._emit_progress(job, force=True)
+
+        # Measure first so progress and ETA have a total; trashing is per item
+        for source in job.sources:
+            files, size = (1, 0) if job.operation == 'trash' else self._measure(source, job)
+            job.measured[source] = (files, size)
+            job.files_total += files
+            job.bytes_total += size
+        self._emit_progress(job, force=True)
+
+        if job.recovery is not None:
+            self._recover(job)
+            job.sources = []
+        elif job.operation == 'delete':
+            self._delete(job)
+            job.sources = []
+        elif job.operation == 'trash':
+            self._trash(job)
+            job.sources = []
+
+        # One listing of the destination settles every name conflict of the batch
+        resolver = None
+        if job.sources:
+            resolver = ConflictResolver(job.destination, job.policy,
+                                        'copy' if job.operation == 'copy' else 'move')
+        for source in job.sources:
+            if job.cancelled.is_set():
+                break
+            job.current = source
+            try:
+                if os.path.abspath(source) == os.path.abspath(job.destination) or \
+                        os.path.abspath(job.destination).startswith(os.path.abspath(source) + os.sep):
+                    raise OSError(errno.EINVAL, "Cannot paste a folder into itself")
+                target, action = resolver.resolve(source)
+                if action == 'skip':
+                    files, size = job.measured.get(source, (0, 0))
+                    job.files_total -= files
+                    job.bytes_total -= size
+                    job.skipped += 1
+                    self._checkpoint(job)
+                    continue
+                if job.operation == 'copy':
+                    self._copy_any(source, target, job)
+                else:
+                    self._move(source, target, job, replace=action == 'overwrite')
+            except TransferCancelled:
+                break
+            except Exception as e:
+                logger.warning(f"Transfer of {source} failed: {e}")
+                job.errors.append((source, str(e)))
+
+        if job.cancelled.is_set():
+            job.state = 'cancelled'
+        else:
+            job.state = 'failed' if job.errors and job.files_done == 0 else 'done'
+        job.current = ''
+        elapsed = time.monotonic() - job.started
+        logger.info(f"Transfer job {job.job_id} {job.state}: {job.files_done}/{job.files_total} files, "
+                    f"{job.bytes_done:,} bytes in {elapsed:.1f}s, {job.skipped} skipped, "
+                    f"{len(job.errors)} error(s)")
+
+    def _measure(self, path: str, job: TransferJob) -> Tuple[int, int]:
+        """Count files and bytes below path (one scandir pass)"""
+        try:
+            if not os.path.isdir(path):
+                return 1, os.path.getsize(path)
+        except OSError:
+            return 1, 0
+        files = size = 0
+        stack = [path]
+        while stack:
+            if job.cancelled.is_set():
+                break
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir():
+                                stack.append(entry.path)
+                            else:
+                                files += 1
+                                size += entry.stat().st_size
+                        except OSError:
+                            files += 1
+            except OSError:
+                pass
+        return files, size
+
+    def _copy_any(self, source: str, target: str, job: TransferJob) -> None:
+        """Copy a file or a folder tree; per-file errors inside a tree are recorded"""
+        if not os.path.isdir(source):
+            self._copy_file(source, target, job)
+            return
+        # Small files go through the parallel tree copy; callbacks run on this thread
+        on_file, on_chunk = self._progress_callbacks(job)
+
+        def on_tree_file(path: str) -> None:
+            job.current = path
+            on_file(path)
+
+        errors = self.file_ops.copy_tree(source, target, on_chunk, on_tree_file)
+        for path, message in errors:
+            logger.warning(f"Could not copy {path}: {message}")
+        job.errors.extend(errors)
+
+    def _copy_file(self, source: str, target: str, job: TransferJob) -> None:
+        job.current = source
+
+        def on_chunk(nbytes: int) -> None:
+            job.bytes_done += nbytes
+            self._checkpoint(job)
+
+        self.file_ops.copy_file(source, target, on_chunk)
+        job.files_done += 1
+        self._checkpoint(job)
+
+    def _move(self, source: str, target: str, job: TransferJob, replace: bool = False) -> None:
+        """Rename on the same device; otherwise stream file by file (journaled)"""
+        on_file, on_chunk = self._progress_callbacks(job)
+        if self.move_engine.move(source, target, on_file, on_chunk, replace):
+            files, size = job.measured.get(source, (0, 0))
+            job.files_done += files
+            job.bytes_done += size
+            self._checkpoint(job)
+
+    def _recover(self, job: TransferJob) -> None:
+        """Resume or roll back an interrupted move"""
+        journal, action = job.recovery
+        job.current = journal.source if action == 'resume' else journal.target
+        on_file, on_chunk = self._progress_callbacks(job)
+        try:
+            if action == 'resume':
+                self.move_engine.resume(journal, on_file, on_chunk)
+            else:
+                self.move_engine.rollback(journal, on_file, on_chunk)
+        except TransferCancelled:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not {action} move {journal.source} -> {journal.target}: {e}")
+            job.errors.append((job.current, str(e)))
+
+    def _delete(self, job: TransferJob) -> None:
+        """Permanently remove every source; a failing item does not stop the rest"""
+        def on_removed(count: int) -> None:
+            job.files_done += count
+            self._checkpoint(job)
+
+        for source in job.sources:
+            if job.cancelled.is_set():
+                break
+            job.current = source
+            try:
+                files, size = job.measured.get(source, (0, 0))
+                done_before = job.files_done
+                errors = self.file_ops.delete_permanently(source, on_removed)
+                if not errors:
+                    job.bytes_done += size
+                    job.files_done = done_before + files  # Measured count, in case the tree changed
+                job.errors.extend(errors)
+            except TransferCancelled:
+                break
+            except Exception as e:
+                logger.warning(f"Could not delete {source}: {e}")
+                job.errors.append((source, str(e)))
+
+    def _trash(self, job: TransferJob) -> None:
+        """Send sources to the trash in batches of paths on the same device
+
+        If a batch fails, its remaining items are retried one by one, and
+        an item that cannot be trashed is deleted permanently (as
+        FileOperations.delete_item does).
+        """
+        groups: Dict[int, List[str]] = {}
+        for source in job.sources:
+            try:
+                groups.setdefault(os.lstat(source).st_dev, []).append(source)
+            except OSError as e:
+                job.errors.append((source, str(e)))
+        try:
+            for paths in groups.values():
+                for start in range(0, len(paths), self.TRASH_BATCH):
+                    self._checkpoint(job)
+                    batch = paths[start:start + self.TRASH_BATCH]
+                    job.current = batch[0]
+                    try:
+                        send2trash(batch)
+                        job.files_done += len(batch)
+                    except Exception as e:
+                        logger.warning(f"Batch trash failed ({e}); retrying item by item")
+                        for path in batch:
+                            self._trash_one(path, job)
+                            self._checkpoint(job)
+        except TransferCancelled:
+            pass
+
+    def _trash_one(self, path: str, job: TransferJob) -> None:
+        job.current = path
+        if os.path.lexists(path):  # Otherwise trashed before its batch failed
+            try:
+                send2trash(path)
+            except Exception as e:
+                logger.warning(f"Could not trash {path} ({e}); deleting permanently")
+                try:
+                    job.errors.extend(self.file_ops.delete_permanently(path))
+                except OSError as e2:
+                    job.errors.append((path, str(e2)))
+        job.files_done += 1
+
+    def _progress_callbacks(self, job: TransferJob):
+        """(on_file, on_chunk) callbacks that account transferred files and bytes"""
+        def on_file(path: str) -> None:
+            job.files_done += 1
+            self._checkpoint(job)
+
+        def on_chunk(nbytes: int) -> None:
+            job.bytes_done += nbytes
+            self._checkpoint(job)
+
+        return on_file, on_chunk
+
+    # ==================== PROGRESS ====================
+
+    def _checkpoint(self, job: TransferJob) -> None:
+        """Called between chunks: honour pause/cancel and emit progress"""
+        if not self._resume.is_set():
+            job.state = 'paused'
+            self._emit_progress(job, force=True)
+            self._resume.wait()
+            # Restart the speed sample so paused time does not count
+            self._last_sample = (time.monotonic(), job.bytes_done, job.files_done)
+            if not job.cancelled.is_set():
+                job.state = 'running'
+        if job.cancelled.is_set():
+            raise TransferCancelled()
+        self._emit_progress(job)
+
+    def _emit_progress(self, job: TransferJob, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_emit < self.PROGRESS_INTERVAL:
+            return
+        t0, b0, f0 = self._last_sample
+        dt = now - t0
+        if dt > 0 and job.state == 'running':
+            w = self.RATE_SMOOTHING if job.rate_bytes else 1.0
+            job.rate_bytes += w * ((job.bytes_done - b0) / dt - job.rate_bytes)
+            job.rate_files += w * ((job.files_done - f0) / dt - job.rate_files)
+            self._last_sample = (now, job.bytes_done, job.files_done)
+        self._last_emit = now
+        self.progress.emit(self._snapshot(job))
+
+    def _snapshot(self, job: TransferJob) -> TransferStatus:
+        eta = None
+        if job.operation in ('trash', 'delete'):
+            # Deletes free whole trees at the end; only the file count moves steadily
+            if job.rate_files > 0 and job.files_total >= job.files_done:
+                eta = (job.files_total - job.files_done) / job.rate_files
+        elif job.rate_bytes > 0 and job.bytes_total >= job.bytes_done:
+            eta = (job.bytes_total - job.bytes_done) / job.rate_bytes
+        with self._lock:
+            queued = len(self._queue)
+        return TransferStatus(
+            job.job_id, job.operation, job.destination, job.state,
+            job.files_done, job.files_total, job.bytes_done, job.bytes_total,
+            job.rate_bytes, job.rate_files, eta, job.current, tuple(job.errors), queued,
+            job.skipped,
+        )